@@ -1,27 +1,271 @@
+"""
+Command line of the scraper.
+
+    python main.py scrape [--lang fr] [--bloc sv] [--set sv01] [--card sv01-001] [--profile [DIR]] [--offline]
+    python main.py plan [--lang fr] [--json]
+    python main.py schema [--apply]
+    python main.py export [DIR] [--full] [--format json parquet]
+    python main.py stats [--by set|bloc|lang] [--parquet DIR] [--json]
+    python main.py search QUERY [--lang fr] [--kind card|pokemon] | search --serve [--port 8765] [--refresh SECONDS]
+    python main.py verify <verify_serie_cards.py arguments>
+    python main.py bench <bench_decoding.py arguments>
+
+Without a command, scrape runs (python main.py keeps working). The modes set
+through environment variables (see src/config.py) still apply, PLAN_MODE=1
+runs plan. Modules are imported by the command that needs them, so plan,
+verify and bench do not load the crawl or image stacks.
+"""
 import sys
 import os
+import argparse
+import runpy
 from dotenv import load_dotenv
-# Import from other folder -> Ugly
-from src.database.database import create_connection
-from src.scrapper.scrapper import scrap_poke_data
-from src.config import setup_debug_mode
-
-
-class Langs(str):
-    FR = "fr"
-    EN = "en"
-    JP = "jp"
-    
-def main():
+
+LANGUAGES = ("fr", "en", "jp")
+COMMANDS = ("scrape", "plan", "schema", "export", "stats", "search", "verify", "bench")
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts")
+
+
+def open_connection():
+    """Database connection wrapped for batched writes (and SQL statistics when SQL_STATS is set)"""
+    from src.database.database import create_connection
+    from src.database.batch import BatchConnection
+    from src.config import get_batch_size, get_sql_recorder
+
+    # The .env file is loaded once, by main
+    connection = create_connection(load_env=False)
+    sql_recorder = get_sql_recorder()
+    if sql_recorder:
+        from src.database.instrument import InstrumentedConnection, report_on_signal
+        connection = InstrumentedConnection(connection, sql_recorder)
+        report_on_signal(sql_recorder)
+    return BatchConnection(connection, get_batch_size()), sql_recorder
+
+
+def scrape(args):
+    from src.config import (setup_refresh_mode, setup_incremental_mode, load_worklist, get_image_settings, setup_response_cache,
+                            get_slug_snapshot_path, get_failed_cards_path, get_graphql_url, setup_http_client, setup_offline_mode,
+                            schema_migration_enabled)
+    from src.database.snapshot import slug_snapshot
+    from src.scrapper.scrapper import scrap_poke_data
+
+    refresh = setup_refresh_mode()
+    lookback_days = setup_incremental_mode()
+    card_refs = load_worklist()
+    if args.card:
+        card_refs = (card_refs or []) + args.card
+
+    image_settings = get_image_settings()
+    graphql_url = get_graphql_url()
+    setup_response_cache()
+    setup_http_client()
+    setup_offline_mode(args.offline)
+
+    connection, sql_recorder = open_connection()
+    if schema_migration_enabled():
+        from src.database.schema import migrate_schema
+        migrate_schema(connection)
+    snapshot_path = get_slug_snapshot_path()
+    if snapshot_path:
+        slug_snapshot.open(snapshot_path, connection)
+
+    image_downloader = None
+    if image_settings:
+        from src.images.downloader import ImageDownloader
+        image_downloader = ImageDownloader(connection, image_settings['storage_dir'], image_settings['manifest_path'],
+                                           image_settings['max_workers'], image_settings['bandwidth_per_host'])
+    crawl_options = dict(refresh=refresh, lookback_days=lookback_days, card_refs=card_refs, image_downloader=image_downloader,
+                         graphql_url=graphql_url, bloc_ids=args.bloc, set_ids=args.set)
+    try:
+        for lang in args.lang:
+            if args.profile:
+                from src.utils.profiling import run_profiled
+                run_profiled(scrap_poke_data, os.path.join(args.profile, lang) if len(args.lang) > 1 else args.profile,
+                             connection, lang, **crawl_options)
+            else:
+                scrap_poke_data(connection, lang, **crawl_options)
+    finally:
+        if image_downloader:
+            image_downloader.close()
+        connection.flush()
+        connection.save_failures(get_failed_cards_path())
+        slug_snapshot.close()
+        if sql_recorder:
+            sql_recorder.print_report()
+
+    if image_settings and image_settings['derivatives']:
+        from src.images.derivatives import run_derivatives
+        run_derivatives(connection, image_settings['storage_dir'])
+
+
+def plan(args):
+    from src.config import setup_refresh_mode, setup_incremental_mode, setup_response_cache, setup_http_client, setup_offline_mode
+    from src.scrapper.planner import plan_scrap, print_plan
+
+    refresh = setup_refresh_mode()
+    lookback_days = setup_incremental_mode()
+    setup_response_cache()
+    setup_http_client()
+    setup_offline_mode(args.offline)
+    connection, _ = open_connection()
+    for lang in args.lang:
+        print_plan(plan_scrap(connection, lang, lookback_days=lookback_days, refresh=refresh), as_json=args.json)
+
+
+def schema(args):
+    from src.database.schema import audit_schema, print_audit, migrate_schema
+
+    connection, _ = open_connection()
+    if args.apply:
+        migrate_schema(connection)
+    print_audit(audit_schema(connection))
+
+
+def export(args):
+    from src.export.catalog import export_catalog
+
+    connection, _ = open_connection()
+    try:
+        stats = export_catalog(connection, args.output, formats=args.format, full=args.full)
+    finally:
+        connection.close()
+    return 0 if stats is not None else 1
+
+
+def stats(args):
+    import json
+    from src.stats.catalog import run_stats, print_stats
+
+    connection = None
+    if not args.parquet:
+        connection, _ = open_connection()
+    try:
+        result = run_stats(connection, args.parquet, args.by)
+    finally:
+        if connection:
+            connection.close()
+    if result is None:
+        return 1
+    catalog_stats, elapsed = result
+    if args.json:
+        print(json.dumps(catalog_stats, ensure_ascii=False, indent=1))
+    else:
+        print_stats(catalog_stats, args.by, elapsed)
+    return 0
+
+
+def search(args):
+    import json
+    from src.search.index import search_index
+
+    connection, _ = open_connection()
+    try:
+        if args.serve:
+            from src.search.server import serve
+            return 0 if serve(connection, args.host, args.port, args.refresh) else 1
+        if not args.query:
+            print("Usage: python main.py search QUERY, or python main.py search --serve")
+            return 1
+        if not search_index.refresh(connection):
+            return 1
+        for result in search_index.search(" ".join(args.query), args.lang, args.limit, args.kind):
+            print(json.dumps(result, ensure_ascii=False))
+        return 0
+    finally:
+        connection.close()
+
+
+def run_script(name: str, arguments: list):
+    """Run a script of scripts/ as if it was called with these arguments"""
+    if arguments[:1] == ["--"]:
+        arguments = arguments[1:]
+    path = os.path.join(SCRIPTS_DIR, name)
+    sys.argv = [path] + arguments
+    runpy.run_path(path, run_name="__main__")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Scrap the tcgdex catalog into the database')
+    commands = parser.add_subparsers(dest='command')
+
+    scrape_parser = commands.add_parser('scrape', help='Scrap blocs, sets and cards (default command)')
+    scrape_parser.add_argument('--bloc', action='append', metavar='ID', help='Only visit this bloc (tcgdex id, e.g. sv), repeatable')
+    scrape_parser.add_argument('--set', action='append', metavar='ID', help='Only visit this set (tcgdex id, e.g. sv01), repeatable')
+    scrape_parser.add_argument('--card', action='append', metavar='ID', help='Only fetch this card (tcgdex id or slug, e.g. sv01-001), repeatable')
+    scrape_parser.add_argument('--profile', nargs='?', const='profile', metavar='DIR',
+                               help='Run the crawl under the profilers and write pstats/collapsed stacks to DIR (default: profile)')
+
+    plan_parser = commands.add_parser('plan', help='Print what scrape would do, without writing anything')
+    plan_parser.add_argument('--json', action='store_true', help='Print the plan as JSON')
+
+    schema_parser = commands.add_parser('schema', help='Audit the lookup indexes (information_schema and EXPLAIN)')
+    schema_parser.add_argument('--apply', action='store_true', help='Add the missing indexes before the audit')
+
+    export_parser = commands.add_parser('export', help='Write the catalog as static JSON files per set and a Parquet dataset')
+    export_parser.add_argument('output', nargs='?', default='export', metavar='DIR', help='Output directory (default: export)')
+    export_parser.add_argument('--full', action='store_true', help='Rewrite every set, not only the changed ones')
+    export_parser.add_argument('--format', nargs='+', choices=('json', 'parquet'), default=['json', 'parquet'],
+                               help='Formats to write (default: json parquet, Parquet requires pyarrow)')
+
+    stats_parser = commands.add_parser('stats', help='Rarity, HP, illustrator and completeness statistics of the catalog (NumPy)')
+    stats_parser.add_argument('--by', choices=('set', 'bloc', 'lang'), default='set', help='Group the cards by set, bloc or language (default: set)')
+    stats_parser.add_argument('--parquet', metavar='DIR', help='Read the Parquet dataset of an export instead of the database')
+    stats_parser.add_argument('--json', action='store_true', help='Print the statistics as JSON')
+
+    search_parser = commands.add_parser('search', help='Fuzzy search of card and Pokémon names (trigram index)')
+    search_parser.add_argument('query', nargs='*', help='Name to look for, partial or misspelled')
+    search_parser.add_argument('--lang', choices=LANGUAGES, default=LANGUAGES[0], help='Language of the names (default: fr)')
+    search_parser.add_argument('--kind', choices=('card', 'pokemon'), help='Only return card or Pokémon names')
+    search_parser.add_argument('--limit', type=int, default=10, help='Number of results (default: 10)')
+    search_parser.add_argument('--serve', action='store_true', help='Serve the index over HTTP: GET /search?q=...&lang=fr, POST /refresh')
+    search_parser.add_argument('--host', default='127.0.0.1', help='Address of the HTTP endpoint (default: 127.0.0.1)')
+    search_parser.add_argument('--port', type=int, default=8765, help='Port of the HTTP endpoint (default: 8765)')
+    search_parser.add_argument('--refresh', type=float, metavar='SECONDS', help='Refresh the served index at this interval')
+
+    for command_parser in (scrape_parser, plan_parser):
+        command_parser.add_argument('--lang', action='append', choices=LANGUAGES, help='Language to scrap, repeatable (default: fr)')
+        command_parser.add_argument('--offline', action='store_true', help='Replay the API responses from the response cache')
+
+    verify_parser = commands.add_parser('verify', help='Check the data of the cards of a serie (scripts/verify_serie_cards.py)')
+    verify_parser.add_argument('arguments', nargs=argparse.REMAINDER)
+    bench_parser = commands.add_parser('bench', help='Benchmark the decoding of API responses (scripts/bench_decoding.py)')
+    bench_parser.add_argument('arguments', nargs=argparse.REMAINDER)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS + ('-h', '--help'):
+        argv = ['scrape'] + argv
+    args = build_parser().parse_args(argv)
+
     # Load environment variables from .env file
     load_dotenv()
-    
+
+    from src.config import setup_debug_mode, env_flag
     # Setup debug mode from environment variable
     setup_debug_mode()
-    
-    connection = create_connection()
-    scrap_poke_data(connection, Langs.FR)
-    
-    
+
+    if args.command == 'verify':
+        return run_script('verify_serie_cards.py', args.arguments)
+    if args.command == 'bench':
+        return run_script('bench_decoding.py', args.arguments)
+    if args.command == 'schema':
+        return schema(args)
+    if args.command == 'export':
+        return export(args)
+    if args.command == 'stats':
+        return stats(args)
+    if args.command == 'search':
+        return search(args)
+
+    args.lang = args.lang or [LANGUAGES[0]]
+    if args.command == 'plan' or env_flag('PLAN_MODE'):
+        if args.command != 'plan':
+            args.json = env_flag('PLAN_JSON')
+        return plan(args)
+    return scrape(args)
+
+
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Decoding Benchmark
+
+Compares the current decoding path (json.loads, as done by response.json(),
+with no validation) against src/scrapper/decoding.py (fastest installed
+decoder + schema validation) on a recorded corpus of tcgdex responses.
+
+Usage:
+    python bench_decoding.py --record corpus/ --lang fr --set sv01
+    python bench_decoding.py corpus/
+    python bench_decoding.py corpus/ --rounds 20
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.scrapper.decoding import decode, get_backend, SET_SCHEMA, CARD_SCHEMA
+
+
+def record_corpus(corpus_dir: str, lang: str, set_id: str):
+    """Save the raw bytes of a set detail and of all its cards."""
+    import requests
+
+    os.makedirs(corpus_dir, exist_ok=True)
+    base_url = f"https://api.tcgdex.net/v2/{lang}"
+    response = requests.get(f"{base_url}/sets/{set_id}")
+    response.raise_for_status()
+    with open(os.path.join(corpus_dir, f"set_{set_id}.json"), 'wb') as file:
+        file.write(response.content)
+
+    for card in response.json()["cards"]:
+        card_response = requests.get(f"{base_url}/cards/{card['id']}")
+        if card_response.status_code != 200:
+            print(f"Skipping {card['id']} (HTTP {card_response.status_code})")
+            continue
+        with open(os.path.join(corpus_dir, f"card_{card['id']}.json"), 'wb') as file:
+            file.write(card_response.content)
+    print(f"Recorded {len(response.json()['cards']) + 1} responses in {corpus_dir}")
+
+
+def load_corpus(corpus_dir: str):
+    """Load (raw bytes, schema) pairs, the schema is picked from the file prefix."""
+    corpus = []
+    for name in sorted(os.listdir(corpus_dir)):
+        if not name.endswith('.json'):
+            continue
+        with open(os.path.join(corpus_dir, name), 'rb') as file:
+            raw = file.read()
+        schema = SET_SCHEMA if name.startswith('set_') else CARD_SCHEMA
+        corpus.append((raw, schema))
+    return corpus
+
+
+def bench(label: str, func, corpus, rounds: int):
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for raw, schema in corpus:
+            func(raw, schema)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    total_bytes = sum(len(raw) for raw, _ in corpus)
+    print(f"  {label:<32} {best * 1000:8.2f} ms  "
+          f"{len(corpus) / best:10.0f} docs/s  {total_bytes / best / 1e6:8.1f} MB/s")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark tcgdex response decoding')
+    parser.add_argument('corpus', nargs='?', help='Directory of recorded responses')
+    parser.add_argument('--record', metavar='DIR', help='Record a corpus into DIR instead of benchmarking')
+    parser.add_argument('--lang', default='fr', help='API language to record (default: fr)')
+    parser.add_argument('--set', default='sv01', help='Set to record (default: sv01)')
+    parser.add_argument('--rounds', type=int, default=10, help='Rounds, best one is reported (default: 10)')
+    args = parser.parse_args()
+
+    if args.record:
+        record_corpus(args.record, args.lang, args.set)
+        return
+    if not args.corpus:
+        parser.error('a corpus directory or --record is required')
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        print(f"No .json response found in {args.corpus}")
+        sys.exit(1)
+
+    print(f"Corpus: {len(corpus)} responses, {sum(len(raw) for raw, _ in corpus) / 1e6:.2f} MB")
+    baseline = bench('json.loads (current path)', lambda raw, schema: json.loads(raw), corpus, args.rounds)
+    decoded = bench(f'{get_backend()} + schema validation', decode, corpus, args.rounds)
+    print(f"  Speedup: {baseline / decoded:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,7 @@ Usage:
     python verify_serie_cards.py --all
     python verify_serie_cards.py 176 --json
     python verify_serie_cards.py 176 --verbose
+    python verify_serie_cards.py --all --ndjson
 """
 
 import sys
@@ -241,6 +242,80 @@ def check_illustrator_exists(connection, illustrator_ids: List[int]) -> Dict[int
     return {illus_id: illus_id in existing_ids for illus_id in illustrator_ids}
 
 
+def get_card_issues(card: Dict[str, Any], illustrator_valid: bool, poke_data: Dict[str, Any],
+                    has_energy_card: bool, has_trainer_card: bool) -> List[Dict[str, str]]:
+    """Compute the issues of a single card from the state of its related rows."""
+    card_issues = []
+
+    # Check translation
+    if not card['name']:
+        card_issues.append({
+            'type': 'missing_translation',
+            'severity': 'critical',
+            'message': 'Missing card_translation entry'
+        })
+
+    # Check illustrator
+    if not card['illustrator_id']:
+        card_issues.append({
+            'type': 'missing_illustrator_id',
+            'severity': 'critical',
+            'message': 'Card has NULL illustrator_id'
+        })
+    elif not illustrator_valid:
+        card_issues.append({
+            'type': 'invalid_illustrator',
+            'severity': 'critical',
+            'message': f'Illustrator ID {card["illustrator_id"]} does not exist'
+        })
+
+    # Check category-specific data
+    if card['category_id'] == CATEGORY_POKEMON:
+        if poke_data is None:
+            card_issues.append({
+                'type': 'missing_pokemon_card',
+                'severity': 'critical',
+                'message': 'Missing pokemon_card entry (required for pokemon_id/dexID, hp, level)'
+            })
+        else:
+            if poke_data['pokemon_id'] is None or poke_data['pokemon_id'] == 0:
+                card_issues.append({
+                    'type': 'invalid_pokemon_id',
+                    'severity': 'warning',
+                    'message': 'pokemon_id is NULL or 0'
+                })
+            if poke_data['hp'] is None or poke_data['hp'] == 0:
+                card_issues.append({
+                    'type': 'invalid_hp',
+                    'severity': 'warning',
+                    'message': 'HP is NULL or 0'
+                })
+            if poke_data['level'] is None or poke_data['level'] == '':
+                card_issues.append({
+                    'type': 'invalid_level',
+                    'severity': 'warning',
+                    'message': 'Level is NULL or empty'
+                })
+
+    elif card['category_id'] == CATEGORY_ENERGY:
+        if not has_energy_card:
+            card_issues.append({
+                'type': 'missing_energy_card',
+                'severity': 'warning',
+                'message': 'Missing energy_card entry (has fallback in code)'
+            })
+
+    elif card['category_id'] == CATEGORY_TRAINER:
+        if not has_trainer_card:
+            card_issues.append({
+                'type': 'missing_trainer_card',
+                'severity': 'info',
+                'message': 'Missing trainer_card entry (optional)'
+            })
+
+    return card_issues
+
+
 def analyze_cards(connection, serie_id: int, verbose: bool = False) -> Dict[str, Any]:
     """Analyze all cards in a serie for missing data."""
 
@@ -279,74 +354,13 @@ def analyze_cards(connection, serie_id: int, verbose: bool = False) -> Dict[str,
     issues = []
 
     for card in cards:
-        card_issues = []
-
-        # Check translation
-        if not card['name']:
-            card_issues.append({
-                'type': 'missing_translation',
-                'severity': 'critical',
-                'message': 'Missing card_translation entry'
-            })
-
-        # Check illustrator
-        if not card['illustrator_id']:
-            card_issues.append({
-                'type': 'missing_illustrator_id',
-                'severity': 'critical',
-                'message': 'Card has NULL illustrator_id'
-            })
-        elif not illustrator_exists.get(card['illustrator_id'], False):
-            card_issues.append({
-                'type': 'invalid_illustrator',
-                'severity': 'critical',
-                'message': f'Illustrator ID {card["illustrator_id"]} does not exist'
-            })
-
-        # Check category-specific data
-        if card['category_id'] == CATEGORY_POKEMON:
-            if card['id'] not in pokemon_data:
-                card_issues.append({
-                    'type': 'missing_pokemon_card',
-                    'severity': 'critical',
-                    'message': 'Missing pokemon_card entry (required for pokemon_id/dexID, hp, level)'
-                })
-            else:
-                poke_data = pokemon_data[card['id']]
-                if poke_data['pokemon_id'] is None or poke_data['pokemon_id'] == 0:
-                    card_issues.append({
-                        'type': 'invalid_pokemon_id',
-                        'severity': 'warning',
-                        'message': 'pokemon_id is NULL or 0'
-                    })
-                if poke_data['hp'] is None or poke_data['hp'] == 0:
-                    card_issues.append({
-                        'type': 'invalid_hp',
-                        'severity': 'warning',
-                        'message': 'HP is NULL or 0'
-                    })
-                if poke_data['level'] is None or poke_data['level'] == '':
-                    card_issues.append({
-                        'type': 'invalid_level',
-                        'severity': 'warning',
-                        'message': 'Level is NULL or empty'
-                    })
-
-        elif card['category_id'] == CATEGORY_ENERGY:
-            if card['id'] not in energy_data:
-                card_issues.append({
-                    'type': 'missing_energy_card',
-                    'severity': 'warning',
-                    'message': 'Missing energy_card entry (has fallback in code)'
-                })
-
-        elif card['category_id'] == CATEGORY_TRAINER:
-            if card['id'] not in trainer_data:
-                card_issues.append({
-                    'type': 'missing_trainer_card',
-                    'severity': 'info',
-                    'message': 'Missing trainer_card entry (optional)'
-                })
+        card_issues = get_card_issues(
+            card,
+            illustrator_exists.get(card['illustrator_id'], False),
+            pokemon_data.get(card['id']),
+            card['id'] in energy_data,
+            card['id'] in trainer_data
+        )
 
         if card_issues:
             issues.append({
@@ -386,6 +400,278 @@ def analyze_cards(connection, serie_id: int, verbose: bool = False) -> Dict[str,
     }
 
 
+CATALOG_SERIES_QUERY = """
+    SELECT
+        s.id AS serie_id,
+        s.slug,
+        st.name,
+        s.card_number AS total_cards,
+        COUNT(c.id) AS actual_cards
+    FROM serie s
+    LEFT JOIN serie_translation st ON s.id = st.serie_id AND st.translation_language_id = %s
+    LEFT JOIN card c ON c.serie_id = s.id
+    {serie_filter}
+    GROUP BY s.id, s.slug, st.name, s.card_number
+    ORDER BY s.id
+"""
+
+# One pass over card with anti-joins on every related table, only cards with at
+# least one issue are returned. Conditions mirror get_card_issues().
+CATALOG_ISSUES_QUERY = """
+    SELECT
+        c.id,
+        c.slug,
+        c.category_id,
+        c.rarity_id,
+        c.serie_id,
+        c.illustrator_id,
+        ct.name,
+        ct.translation_language_id,
+        c.position,
+        i.id AS existing_illustrator_id,
+        pc.card_id AS pokemon_card_id,
+        pc.pokemon_id,
+        pc.hp,
+        pc.level,
+        ec.card_id AS energy_card_id,
+        tc.card_id AS trainer_card_id
+    FROM card c
+    LEFT JOIN card_translation ct ON c.id = ct.card_id AND ct.translation_language_id = %s
+    LEFT JOIN illustrator i ON i.id = c.illustrator_id
+    LEFT JOIN pokemon_card pc ON pc.card_id = c.id
+    LEFT JOIN energy_card ec ON ec.card_id = c.id
+    LEFT JOIN trainer_card tc ON tc.card_id = c.id
+    WHERE (ct.name IS NULL OR ct.name = ''
+        OR c.illustrator_id IS NULL OR i.id IS NULL
+        OR (c.category_id = {pokemon} AND (pc.card_id IS NULL
+            OR pc.pokemon_id IS NULL OR pc.pokemon_id = 0
+            OR pc.hp IS NULL OR pc.hp = 0
+            OR pc.level IS NULL OR pc.level = ''))
+        OR (c.category_id = {energy} AND ec.card_id IS NULL)
+        OR (c.category_id = {trainer} AND tc.card_id IS NULL))
+    {serie_filter}
+    ORDER BY c.serie_id, c.position
+"""
+
+
+def get_catalog_series(connection, language_id: int = 1, serie_id: int = None) -> List[Dict[str, Any]]:
+    """Get every serie (or only serie_id) with its expected and actual card count in a single aggregate query."""
+    query = CATALOG_SERIES_QUERY.format(serie_filter='WHERE s.id = %s' if serie_id is not None else '')
+    params = (language_id, serie_id) if serie_id is not None else (language_id,)
+    cursor = connection.cursor(dictionary=True)
+    cursor.execute(query, params)
+    results = cursor.fetchall()
+    cursor.close()
+
+    return results
+
+
+def iter_catalog_card_issues(connection, language_id: int = 1, serie_id: int = None):
+    """
+    Yield (card, card_issues) for every card with issues, ordered by serie.
+
+    Rows are streamed from an unbuffered (server-side) cursor, so the whole
+    catalog is never held in memory.
+    """
+    query = CATALOG_ISSUES_QUERY.format(
+        pokemon=CATEGORY_POKEMON,
+        energy=CATEGORY_ENERGY,
+        trainer=CATEGORY_TRAINER,
+        serie_filter='AND c.serie_id = %s' if serie_id is not None else ''
+    )
+    params = (language_id, serie_id) if serie_id is not None else (language_id,)
+
+    cursor = connection.cursor(dictionary=True, buffered=False)
+    try:
+        cursor.execute(query, params)
+        for row in cursor:
+            card_issues = get_card_issues(
+                row,
+                row['existing_illustrator_id'] is not None,
+                row if row['pokemon_card_id'] is not None else None,
+                row['energy_card_id'] is not None,
+                row['trainer_card_id'] is not None
+            )
+            if card_issues:
+                yield row, card_issues
+    finally:
+        # Drain the result set if the consumer stopped early
+        if connection.unread_result:
+            connection.consume_results()
+        cursor.close()
+
+
+def new_serie_summary(serie: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the empty issue counters of a serie from a get_catalog_series() row."""
+    return {
+        'serie_id': serie['serie_id'],
+        'serie_name': serie['name'],
+        'serie_slug': serie['slug'],
+        'expected_cards': serie['total_cards'],
+        'actual_cards': serie['actual_cards'],
+        'cards_with_issues': 0,
+        'cards_ok': serie['actual_cards'],
+        'issues_by_category': {name: 0 for name in CATEGORY_NAMES.values()},
+        'issue_types': {}
+    }
+
+
+def serie_summary(summaries: Dict[int, Dict[str, Any]], card: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return the counters of the serie of a card.
+
+    A card whose serie is missing from get_catalog_series() (orphan serie_id)
+    gets a placeholder summary instead of aborting the report; its card count
+    grows with the orphan cards seen, since the serie total is unknown.
+    """
+    summary = summaries.get(card['serie_id'])
+    if summary is None:
+        print(f"{Colors.WARNING}Serie {card['serie_id']} of card {card['slug']} not found, "
+              f"counted as an orphan serie{Colors.ENDC}", file=sys.stderr)
+        summary = summaries.setdefault(card['serie_id'], new_serie_summary({
+            'serie_id': card['serie_id'],
+            'name': None,
+            'slug': None,
+            'total_cards': None,
+            'actual_cards': 0
+        }))
+        summary['orphan'] = True
+    if summary.get('orphan'):
+        summary['actual_cards'] += 1
+        summary['cards_ok'] += 1
+    return summary
+
+
+def count_card_issues(summary: Dict[str, Any], card: Dict[str, Any], card_issues: List[Dict[str, str]]):
+    """Add the issues of one card to the running counters of its serie."""
+    summary['cards_with_issues'] += 1
+    summary['cards_ok'] -= 1
+    category_name = CATEGORY_NAMES.get(card['category_id'])
+    if category_name:
+        summary['issues_by_category'][category_name] += 1
+    for issue in card_issues:
+        summary['issue_types'][issue['type']] = summary['issue_types'].get(issue['type'], 0) + 1
+
+
+def analyze_catalog(connection, language_id: int = 1, keep_issues: bool = False) -> Dict[str, Any]:
+    """Analyze every card of every serie with set-based queries."""
+    series = get_catalog_series(connection, language_id)
+    summaries = {serie['serie_id']: new_serie_summary(serie) for serie in series}
+
+    issues = []
+    for card, card_issues in iter_catalog_card_issues(connection, language_id):
+        count_card_issues(serie_summary(summaries, card), card, card_issues)
+        if keep_issues:
+            issues.append({
+                'card': card,
+                'issues': card_issues
+            })
+
+    total = {
+        'series': len(summaries),
+        'series_with_issues': len([s for s in summaries.values() if s['cards_with_issues'] > 0]),
+        'series_incomplete': len([s for s in summaries.values() if s['actual_cards'] != s['expected_cards']]),
+        'actual_cards': sum(s['actual_cards'] for s in summaries.values()),
+        'cards_with_issues': sum(s['cards_with_issues'] for s in summaries.values()),
+        'issue_types': {}
+    }
+    for summary in summaries.values():
+        for issue_type, count in summary['issue_types'].items():
+            total['issue_types'][issue_type] = total['issue_types'].get(issue_type, 0) + count
+
+    return {
+        'summary': total,
+        'series': list(summaries.values()),
+        'issues': issues,
+        'timestamp': datetime.now().isoformat()
+    }
+
+
+NDJSON_CARD_FIELDS = ('id', 'slug', 'serie_id', 'category_id', 'position', 'name', 'illustrator_id')
+
+
+def stream_report(connection, out=sys.stdout, serie_id: int = None, language_id: int = 1) -> Dict[str, Any]:
+    """
+    Write the verification report as NDJSON: one record per card with issues,
+    emitted as soon as the card is read, then one summary record per serie.
+
+    Cards come from an unbuffered cursor and only the per-serie counters are
+    kept, so memory stays flat whatever the size of the catalog.
+    Returns None when serie_id does not exist.
+    """
+    series = get_catalog_series(connection, language_id, serie_id)
+    if serie_id is not None and not series:
+        return None
+    summaries = {serie['serie_id']: new_serie_summary(serie) for serie in series}
+
+    for card, card_issues in iter_catalog_card_issues(connection, language_id, serie_id):
+        count_card_issues(serie_summary(summaries, card), card, card_issues)
+        record = {
+            'record': 'card',
+            'card': {field: card[field] for field in NDJSON_CARD_FIELDS},
+            'issues': card_issues
+        }
+        out.write(json.dumps(record, default=str, ensure_ascii=False) + '\n')
+        out.flush()
+
+    for summary in summaries.values():
+        out.write(json.dumps({'record': 'summary', **summary}, default=str, ensure_ascii=False) + '\n')
+    out.flush()
+
+    return summaries
+
+
+def write_worklist(connection, out=sys.stdout, serie_id: int = None, language_id: int = 1) -> int:
+    """
+    Write the slugs of the cards with issues, one per line, for a targeted re-scrape:
+        WORKLIST_FILE=worklist.txt python3 main.py
+    """
+    count = 0
+    for card, _ in iter_catalog_card_issues(connection, language_id, serie_id):
+        out.write(card['slug'] + '\n')
+        count += 1
+    out.flush()
+    return count
+
+
+def print_catalog_report(analysis: Dict[str, Any], verbose: bool = False):
+    """Print a formatted report of the whole catalog analysis."""
+    total = analysis['summary']
+
+    print(f"\n{Colors.HEADER}{Colors.BOLD}{'='*80}{Colors.ENDC}")
+    print(f"{Colors.HEADER}{Colors.BOLD}Catalog Data Integrity Report{Colors.ENDC}")
+    print(f"{Colors.HEADER}{Colors.BOLD}{'='*80}{Colors.ENDC}\n")
+
+    print(f"{Colors.OKBLUE}{Colors.BOLD}Catalog Information:{Colors.ENDC}")
+    print(f"  Series:             {total['series']}")
+    print(f"  Cards:              {total['actual_cards']}")
+    print(f"  Incomplete series:  {total['series_incomplete']}")
+
+    print(f"\n{Colors.OKBLUE}{Colors.BOLD}Status:{Colors.ENDC}")
+    if total['cards_with_issues'] == 0:
+        print(f"  {Colors.OKGREEN}✓ All cards have complete data!{Colors.ENDC}")
+    else:
+        print(f"  {Colors.FAIL}✗ Cards with issues: {total['cards_with_issues']} in {total['series_with_issues']} serie(s){Colors.ENDC}")
+
+        print(f"\n{Colors.WARNING}{Colors.BOLD}Issues by Type:{Colors.ENDC}")
+        for issue_type, count in total['issue_types'].items():
+            print(f"  {issue_type}: {count} occurrence(s)")
+
+    series = [s for s in analysis['series']
+              if s['cards_with_issues'] > 0 or s['actual_cards'] != s['expected_cards']]
+    if series:
+        print(f"\n{Colors.WARNING}{Colors.BOLD}Series with Issues:{Colors.ENDC}")
+        for summary in series:
+            print(f"  {Colors.BOLD}[{summary['serie_id']}] {summary['serie_name'] or '(missing)'}{Colors.ENDC} "
+                  f"({summary['serie_slug']}): {summary['actual_cards']}/{summary['expected_cards']} cards, "
+                  f"{summary['cards_with_issues']} with issues")
+            if verbose:
+                for issue_type, count in summary['issue_types'].items():
+                    print(f"      {issue_type}: {count}")
+
+    print(f"\n{Colors.HEADER}{'='*80}{Colors.ENDC}\n")
+
+
 def print_report(analysis: Dict[str, Any], verbose: bool = False):
     """Print a formatted report of the analysis."""
 
@@ -534,15 +820,27 @@ Examples:
   python verify_serie_cards.py 176 --verbose
   python verify_serie_cards.py 176 --json
   python verify_serie_cards.py 176 --fixes > fixes.sql
+  python verify_serie_cards.py --all
+  python verify_serie_cards.py --all --json
+  python verify_serie_cards.py --all --ndjson > report.ndjson
+  python verify_serie_cards.py 176 --worklist > worklist.txt
         """
     )
 
-    parser.add_argument('serie_id', type=int, help='Serie ID to verify')
+    parser.add_argument('serie_id', type=int, nargs='?', help='Serie ID to verify')
+    parser.add_argument('--all', action='store_true', help='Verify every serie of the catalog')
+    parser.add_argument('--language-id', type=int, default=1, help='Translation language to check (default: 1)')
     parser.add_argument('--verbose', '-v', action='store_true', help='Show verbose output')
     parser.add_argument('--json', action='store_true', help='Output results as JSON')
+    parser.add_argument('--ndjson', action='store_true', help='Stream results as NDJSON (one record per card with issues)')
+    parser.add_argument('--worklist', action='store_true', help='Output the slugs of the cards to re-scrape, one per line')
     parser.add_argument('--fixes', action='store_true', help='Generate SQL fix suggestions')
 
     args = parser.parse_args()
+    if args.serie_id is None and not args.all:
+        parser.error('a serie_id or --all is required')
+    if args.all and args.fixes:
+        parser.error('--fixes works on one serie, it cannot be combined with --all')
 
     # Create database connection
     try:
@@ -555,6 +853,24 @@ Examples:
         sys.exit(1)
 
     try:
+        if args.worklist:
+            write_worklist(connection, sys.stdout, None if args.all else args.serie_id, args.language_id)
+            return
+
+        if args.ndjson:
+            if stream_report(connection, sys.stdout, None if args.all else args.serie_id, args.language_id) is None:
+                print(f"{Colors.FAIL}Serie {args.serie_id} not found{Colors.ENDC}", file=sys.stderr)
+                sys.exit(1)
+            return
+
+        if args.all:
+            analysis = analyze_catalog(connection, args.language_id, keep_issues=args.json)
+            if args.json:
+                print(json.dumps(analysis, indent=2, default=str))
+            else:
+                print_catalog_report(analysis, args.verbose)
+            return
+
         # Analyze the serie
         analysis = analyze_cards(connection, args.serie_id, args.verbose)
 
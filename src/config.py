@@ -4,6 +4,58 @@ Configuration module for poke-scrapper
 Debug mode can be enabled via:
 1. Environment variable: DEBUG_MODE=1
 2. Programmatically: from utils.logger import enable_debug; enable_debug()
+
+Refresh mode (update already scrapped cards whose API payload changed) can be enabled via:
+1. Environment variable: REFRESH_MODE=1
+
+Incremental mode (only visit new, changed or recently released sets) can be enabled via:
+1. Environment variable: INCREMENTAL_MODE=1
+2. INCREMENTAL_LOOKBACK_DAYS sets the look-back window (default: 30)
+
+Targeted repair (only fetch and fix the listed cards) can be enabled via:
+1. Environment variable: WORKLIST_FILE=path/to/worklist.txt (one card slug or tcgdex id per line)
+
+Card image download (content-addressed by SHA-256) can be enabled via:
+1. Environment variable: IMAGE_DIR=path/to/images
+2. IMAGE_WORKERS sets the number of parallel downloads (default: 4)
+3. IMAGE_BANDWIDTH_KBPS caps the download rate per host (default: no cap)
+4. IMAGE_DERIVATIVES=1 generates thumbnails and WebP/AVIF variants after the crawl
+
+Dry-run plan (diff the API catalog against the database without writing) can be enabled via:
+1. Environment variable: PLAN_MODE=1 (PLAN_JSON=1 prints the plan as JSON)
+2. Command line: python main.py plan [--json]
+
+Raw API responses can be cached on disk via:
+1. Environment variable: RESPONSE_CACHE_DIR=path/to/cache
+2. RESPONSE_CACHE_TTL sets the maximum age of a cached response in seconds (default: no expiry)
+
+The slug -> id maps are kept in a warm-start snapshot between runs, it can be disabled via:
+1. Environment variable: SLUG_SNAPSHOT=0
+
+Card writes are committed in batches, one SAVEPOINT per card, configured via:
+1. Environment variable: BATCH_SIZE=50 (cards per commit, 1 commits every card)
+Cards rolled back are listed in SCRAPPER_STATE_DIR/failed_cards.txt, a WORKLIST_FILE for a retry run
+
+Card details can be fetched a set at a time through GraphQL via:
+1. Environment variable: FETCH_BACKEND=graphql (default: rest, one request per card)
+2. GRAPHQL_URL overrides the endpoint (default: https://api.tcgdex.net/v2/graphql)
+Cards the GraphQL query could not return are fetched through REST
+
+Failed API requests (timeouts, 429, 5xx) are retried, configured via:
+1. HTTP_RETRIES (default: 4), HTTP_BACKOFF base delay in seconds (default: 1), HTTP_BACKOFF_MAX (default: 60)
+2. CIRCUIT_THRESHOLD consecutive failures open the circuit (default: 5) for CIRCUIT_COOLDOWN seconds (default: 60)
+
+A run can be replayed from the response cache, without network, via:
+1. Environment variable: OFFLINE_MODE=1 (or main.py --offline), RESPONSE_CACHE_DIR defaults to SCRAPPER_STATE_DIR/responses
+
+SQL statements can be timed and reported (ranked shapes, p95, N+1 patterns) via:
+1. Environment variable: SQL_STATS=1 (SQL_NPLUS1_THRESHOLD: statements of one shape per card before flagging, default: 3)
+
+Missing lookup indexes (slugs, names, card_id) are added before a crawl, it can be disabled via:
+1. Environment variable: SCHEMA_MIGRATE=0
+2. Command line: python main.py schema [--apply] audits the indexes with EXPLAIN
+
+Local state (watermarks, caches) is stored in SCRAPPER_STATE_DIR (default: .scrapper_state)
 """
 import os
 from .utils.logger import enable_debug, disable_debug, is_debug_enabled
@@ -21,6 +73,17 @@ def setup_debug_mode():
     
     return is_debug_enabled()
 
+def env_flag(name: str) -> bool:
+    """Read a boolean flag from the environment"""
+    return os.getenv(name, '0').lower() in ('1', 'true', 'on', 'yes')
+
+def setup_refresh_mode():
+    """Setup refresh mode based on environment variables"""
+    refresh_mode = env_flag('REFRESH_MODE')
+    if refresh_mode:
+        print("Refresh mode: ON - Already scrapped cards will be updated when their data changed")
+    return refresh_mode
+
 def enable_debug_mode():
     """Enable debug mode programmatically"""
     enable_debug()
@@ -29,4 +92,115 @@ def enable_debug_mode():
 def disable_debug_mode():
     """Disable debug mode programmatically"""
     disable_debug()
-    print("Debug mode disabled - Only error logs will be shown")
\ No newline at end of file
+    print("Debug mode disabled - Only error logs will be shown")
+
+def setup_incremental_mode():
+    """Setup incremental mode based on environment variables, returns the look-back window in days or None"""
+    if not env_flag('INCREMENTAL_MODE'):
+        return None
+    lookback_days = int(os.getenv('INCREMENTAL_LOOKBACK_DAYS', '30'))
+    print(f"Incremental mode: ON - Only new sets and sets released in the last {lookback_days} days will be visited")
+    return lookback_days
+
+def get_state_dir() -> str:
+    """Directory holding the local state kept between runs"""
+    return os.getenv('SCRAPPER_STATE_DIR', '.scrapper_state')
+
+def load_worklist():
+    """Read the card references listed in WORKLIST_FILE, None if not set"""
+    path = os.getenv('WORKLIST_FILE')
+    if not path:
+        return None
+    with open(path, encoding='utf-8') as file:
+        card_refs = [line.strip() for line in file if line.strip() and not line.startswith('#')]
+    print(f"Targeted repair: {len(card_refs)} card(s) listed in {path}")
+    return card_refs
+
+def get_image_settings():
+    """Read the image download settings, None if IMAGE_DIR is not set"""
+    storage_dir = os.getenv('IMAGE_DIR')
+    if not storage_dir:
+        return None
+    bandwidth = os.getenv('IMAGE_BANDWIDTH_KBPS')
+    settings = {
+        'storage_dir': storage_dir,
+        'manifest_path': os.path.join(get_state_dir(), 'images_manifest.ndjson'),
+        'max_workers': int(os.getenv('IMAGE_WORKERS', '4')),
+        'bandwidth_per_host': int(bandwidth) * 1024 if bandwidth else None,
+        'derivatives': env_flag('IMAGE_DERIVATIVES')
+    }
+    print(f"Image download: ON - Images will be stored in {storage_dir}")
+    return settings
+
+def setup_response_cache():
+    """Enable the on-disk response cache if RESPONSE_CACHE_DIR is set"""
+    directory = os.getenv('RESPONSE_CACHE_DIR')
+    if not directory:
+        return False
+    from .scrapper.cache import response_cache
+    ttl = os.getenv('RESPONSE_CACHE_TTL')
+    response_cache.configure(directory, int(ttl) if ttl else None)
+    print(f"Response cache: ON - API responses are cached in {directory}")
+    return True
+
+def get_slug_snapshot_path():
+    """Path of the slug -> id snapshot, None if SLUG_SNAPSHOT=0"""
+    if os.getenv('SLUG_SNAPSHOT', '1').lower() in ('0', 'false', 'off', 'no'):
+        print("Slug snapshot: OFF - Every slug is looked up in the database")
+        return None
+    return os.path.join(get_state_dir(), 'slugs.sqlite3')
+
+def get_batch_size() -> int:
+    """Number of cards committed together"""
+    return int(os.getenv('BATCH_SIZE', '50'))
+
+def get_failed_cards_path() -> str:
+    return os.path.join(get_state_dir(), 'failed_cards.txt')
+
+def get_graphql_url():
+    """GraphQL endpoint when FETCH_BACKEND=graphql, None for the REST backend"""
+    backend = os.getenv('FETCH_BACKEND', 'rest').lower()
+    if backend != 'graphql':
+        return None
+    from .scrapper.graphql import DEFAULT_GRAPHQL_URL
+    url = os.getenv('GRAPHQL_URL', DEFAULT_GRAPHQL_URL)
+    print(f"Fetch backend: GraphQL - Cards are fetched a set at a time from {url}")
+    return url
+
+def setup_http_client():
+    """Configure retries and circuit breaker of the API client from the environment"""
+    from .scrapper.client import http_client
+    http_client.configure(
+        retries=int(os.getenv('HTTP_RETRIES', '4')),
+        base_delay=float(os.getenv('HTTP_BACKOFF', '1')),
+        max_delay=float(os.getenv('HTTP_BACKOFF_MAX', '60')),
+        breaker_threshold=int(os.getenv('CIRCUIT_THRESHOLD', '5')),
+        breaker_cooldown=float(os.getenv('CIRCUIT_COOLDOWN', '60'))
+    )
+
+def setup_offline_mode(offline: bool = False):
+    """Serve every API response from the response cache, never from the network"""
+    if not (offline or env_flag('OFFLINE_MODE')):
+        return False
+    from .scrapper.cache import response_cache
+    from .scrapper.client import http_client
+    if not response_cache.enabled:
+        response_cache.configure(os.path.join(get_state_dir(), 'responses'))
+    http_client.offline = True
+    print(f"Offline mode: ON - API responses are replayed from {response_cache.directory}")
+    return True
+
+def get_sql_recorder():
+    """Statement recorder when SQL_STATS is enabled, None otherwise"""
+    if not env_flag('SQL_STATS'):
+        return None
+    from .database.instrument import StatementRecorder
+    print("SQL stats: ON - Statements are timed and reported at the end of the run")
+    return StatementRecorder(int(os.getenv('SQL_NPLUS1_THRESHOLD', '3')))
+
+def schema_migration_enabled() -> bool:
+    """Add the missing lookup indexes before a crawl, unless SCHEMA_MIGRATE=0"""
+    if os.getenv('SCHEMA_MIGRATE', '1').lower() in ('0', 'false', 'off', 'no'):
+        print("Schema migration: OFF - Missing indexes are not added")
+        return False
+    return True
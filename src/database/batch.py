@@ -0,0 +1,146 @@
+"""
+Batched writes with per-card failure isolation.
+
+BatchConnection wraps a MySQL connection and is passed to the database helpers
+in its place. The writes of one card (card, translation, subtype row, elements,
+variants, content hash) form a unit of work wrapped in a SAVEPOINT:
+- inside a unit, the commit() of every helper is deferred and a rollback() of a
+  helper rolls back the whole unit, which is recorded as failed for retry
+- a successful unit moves the batch_tail savepoint forward, the batch commits
+  once every batch_size units
+- outside a unit (blocs, sets, images), commit() commits the batch and
+  rollback() only discards what was written since the last unit
+
+A failed card therefore leaves no row behind instead of a card without subtype.
+"""
+import os
+from contextlib import contextmanager
+
+import mysql.connector
+from ..utils.logger import debug, info, error
+from .element import element_resolver
+from .pokemon import pokemon_name_index
+from .snapshot import slug_snapshot
+
+
+class BatchConnection:
+    def __init__(self, conn, batch_size: int = 50):
+        self.conn = conn
+        self.batch_size = max(1, batch_size)
+        # Slugs of the units written since the last commit
+        self.pending = []
+        self.failed = []
+        self.in_unit = False
+        self.unit_failed = False
+        self.commits = 0
+
+    def __getattr__(self, name):
+        # Everything else (cursor options, close, is_connected, ...) is the wrapped connection's
+        return getattr(self.conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return self.conn.cursor(*args, **kwargs)
+
+    def execute(self, statement: str):
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    def commit(self):
+        if self.in_unit:
+            # Deferred to the batch commit
+            return
+        self.flush()
+
+    def rollback(self):
+        if self.in_unit:
+            self.unit_failed = True
+            self.rollback_unit()
+        elif self.pending:
+            self.execute("ROLLBACK TO SAVEPOINT batch_tail")
+        else:
+            self.conn.rollback()
+
+    def rollback_unit(self):
+        try:
+            self.execute("ROLLBACK TO SAVEPOINT card_unit")
+        except mysql.connector.Error as err:
+            error("Error rolling back card unit: %s", err)
+        # Ids remembered by the unit may point to rows that no longer exist
+        slug_snapshot.undo()
+        element_resolver.reset()
+        pokemon_name_index.reset()
+
+    @contextmanager
+    def unit(self, slug: str):
+        """
+        Unit of work of one card. Call fail() on the yielded batch (or raise) to
+        roll back every row written by the unit.
+        """
+        self.execute("SAVEPOINT card_unit")
+        slug_snapshot.begin()
+        self.in_unit = True
+        self.unit_failed = False
+        try:
+            yield self
+        except mysql.connector.Error as err:
+            error("Error writing card '%s': %s", slug, err)
+            self.unit_failed = True
+        except BaseException:
+            self.in_unit = False
+            self.rollback_unit()
+            slug_snapshot.end()
+            raise
+        finally:
+            self.in_unit = False
+        if self.unit_failed:
+            self.rollback_unit()
+            slug_snapshot.end()
+            self.failed.append(slug)
+            error("Card '%s' rolled back, it will be retried", slug)
+            return
+
+        slug_snapshot.end()
+        self.execute("SAVEPOINT batch_tail")
+        self.pending.append(slug)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def fail(self):
+        """Mark the current unit as failed"""
+        self.unit_failed = True
+
+    def flush(self):
+        """Commit the batch"""
+        try:
+            self.conn.commit()
+        except mysql.connector.Error as err:
+            error("Error committing batch of %s card(s): %s", len(self.pending), err)
+            self.conn.rollback()
+            self.failed.extend(self.pending)
+            # The maps may hold ids of rows that were never committed
+            slug_snapshot.invalidate()
+            element_resolver.reset()
+            pokemon_name_index.reset()
+        else:
+            if self.pending:
+                debug("Committed batch of %s card(s)", len(self.pending))
+                self.commits += 1
+        self.pending = []
+
+    def save_failures(self, path: str):
+        """Write the failed card slugs as a work list (WORKLIST_FILE) for a retry run"""
+        if not self.failed:
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("# Cards rolled back during the last run\n")
+            for slug in self.failed:
+                file.write(f"{slug}\n")
+        info("%s card(s) failed, retry them with WORKLIST_FILE=%s", len(self.failed), path)
+
+    def close(self):
+        self.flush()
+        self.conn.close()
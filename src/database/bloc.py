@@ -1,9 +1,16 @@
 import uuid
+from typing import NamedTuple
 import mysql.connector
 from ..utils.logger import debug, error
+from .snapshot import slug_snapshot, UNKNOWN
+from .database import like_prefix
 
 def get_tcg_language_id_by_slug(conn, slug: str):
     """Get the tcg_language ID (integer) by slug"""
+    row_id = slug_snapshot.lookup("tcg_language", slug)
+    if row_id is not UNKNOWN:
+        return row_id
+
     cursor = conn.cursor()
     try:
         cursor.execute(
@@ -24,6 +31,10 @@ def get_tcg_language_id_by_slug(conn, slug: str):
 
 def get_bloc_id_by_slug(conn, slug: str):
     """Get existing bloc ID by slug to handle duplicates"""
+    row_id = slug_snapshot.lookup("bloc", slug)
+    if row_id is not UNKNOWN:
+        return row_id
+
     cursor = conn.cursor()
     try:
         cursor.execute(
@@ -43,28 +54,36 @@ def get_bloc_id_by_slug(conn, slug: str):
         cursor.close()
 
 
-class Bloc:
-    def __init__(
-        self, id, set_number, 
-        position, tcg_id,
-    ):
-        self.id = id
-        self.set_number = set_number
-        self.position = position
-        self.tcg_id = tcg_id
-
-class BlocTranslation:
-    def __init__(
-        self, id, bloc_id, name, description, language_id
-    ):
-        self.id = id
-        self.bloc_id = bloc_id
-        self.name = name
-        self.description = description
-        self.language_id = language_id
+class Bloc(NamedTuple):
+    slug: str
+    set_number: int
+    position: int
+    tcg_id: int
+
+    @property
+    def id(self):
+        """Legacy name of the slug field"""
+        return self.slug
+
+class BlocTranslation(NamedTuple):
+    """bloc_translation row, fields in the column order of the INSERT"""
+    slug: str
+    bloc_id: int
+    name: str
+    description: str
+    language_id: int
+
+    @property
+    def id(self):
+        """Legacy name of the slug field"""
+        return self.slug
 
 def get_bloc_translation_id_by_slug(conn, slug: str):
     """Get existing bloc translation ID by slug to handle duplicates"""
+    row_id = slug_snapshot.lookup("bloc_translation", slug)
+    if row_id is not UNKNOWN:
+        return row_id
+
     cursor = conn.cursor()
     try:
         cursor.execute(
@@ -85,19 +104,20 @@ def get_bloc_translation_id_by_slug(conn, slug: str):
 
 def insert_bloc_translation(conn, data: BlocTranslation):
     # Check if bloc translation already exists
-    existing_id = get_bloc_translation_id_by_slug(conn, data.id)
+    existing_id = get_bloc_translation_id_by_slug(conn, data.slug)
     if existing_id is not None:
-        debug("Bloc translation '%s' already exists with id: %s", data.id, existing_id)
+        debug("Bloc translation '%s' already exists with id: %s", data.slug, existing_id)
         return existing_id
     
     cursor = conn.cursor()
     try:
         cursor.execute(
             "INSERT INTO bloc_translation (slug, bloc_id, name, description, translation_language_id) VALUES (%s, %s, %s, %s, %s)",
-            (data.id, data.bloc_id, data.name, data.description, data.language_id)
+            tuple(data)
         )
         # Valider les changements
         conn.commit()
+        slug_snapshot.remember("bloc_translation", data.slug, cursor.lastrowid)
         return cursor.lastrowid
     
     except mysql.connector.Error as err:
@@ -110,19 +130,20 @@ def insert_bloc_translation(conn, data: BlocTranslation):
 
 def insert_bloc(conn, data: Bloc):
     # Check if bloc already exists
-    existing_id = get_bloc_id_by_slug(conn, data.id)
+    existing_id = get_bloc_id_by_slug(conn, data.slug)
     if existing_id is not None:
-        debug("Bloc '%s' already exists with id: %s", data.id, existing_id)
+        debug("Bloc '%s' already exists with id: %s", data.slug, existing_id)
         return existing_id
     
     cursor = conn.cursor()
     try:
         cursor.execute(
             "INSERT INTO bloc (slug, tcg_language_id, serie_number, position) VALUES (%s, %s, %s, %s)",
-            (data.id, data.tcg_id, data.set_number, data.position)
+            (data.slug, data.tcg_id, data.set_number, data.position)
         )
         # Valider les changements
         conn.commit()
+        slug_snapshot.remember("bloc", data.slug, cursor.lastrowid)
         return cursor.lastrowid
     
     except mysql.connector.Error as err:
@@ -131,4 +152,21 @@ def insert_bloc(conn, data: Bloc):
         return None
 
     finally:
-        cursor.close()
\ No newline at end of file
+        cursor.close()
+
+def get_bloc_slugs_by_prefix(conn, slug_prefix: str) -> set:
+    """Get every bloc slug starting with slug_prefix in one query"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT slug FROM bloc WHERE slug LIKE %s",
+            (like_prefix(slug_prefix),)
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+    except mysql.connector.Error as err:
+        error("Error getting bloc slugs: %s", err)
+        return set()
+
+    finally:
+        cursor.close()
@@ -1,9 +1,14 @@
 import mysql.connector
 import uuid
 import re
+import json
+import hashlib
+from typing import NamedTuple
 from ..utils.logger import debug, error
+from .snapshot import slug_snapshot, UNKNOWN
 
-from .element import get_element_id_by_name
+from .element import element_resolver
+from .database import like_prefix
 
 def clean_seo_name(name: str) -> str:
     """Clean name for SEO path usage - matches SQL script logic"""
@@ -113,6 +118,10 @@ def build_seo_path(card_name: str, seo_data: dict) -> str:
 
 def get_card_id_by_slug(conn, slug: str):
     """Get existing card ID by slug to handle duplicates"""
+    row_id = slug_snapshot.lookup("card", slug)
+    if row_id is not UNKNOWN:
+        return row_id
+
     cursor = conn.cursor()
     try:
         cursor.execute(
@@ -133,6 +142,10 @@ def get_card_id_by_slug(conn, slug: str):
 
 def get_card_translation_id_by_slug(conn, slug: str):
     """Get existing card translation ID by slug to handle duplicates"""
+    row_id = slug_snapshot.lookup("card_translation", slug)
+    if row_id is not UNKNOWN:
+        return row_id
+
     cursor = conn.cursor()
     try:
         cursor.execute(
@@ -152,22 +165,32 @@ def get_card_translation_id_by_slug(conn, slug: str):
         cursor.close()
 
 
-class PokemonCard:
-    def __init__(self, id, card_id, pokemon_id, hp, level):
-        self.id = id
-        self.card_id = card_id
-        self.pokemon_id = pokemon_id
-        self.hp = hp
-        self.level = level
-
-class Card:
-    def __init__(self, id, position, category_id, rarity_id, set_id, illustrator_id):
-        self.id = id
-        self.position = position
-        self.category_id = category_id
-        self.rarity_id = rarity_id
-        self.set_id = set_id
-        self.illustrator_id = illustrator_id
+class PokemonCard(NamedTuple):
+    """pokemon_card row, fields in the column order of the INSERT"""
+    slug: str
+    card_id: int
+    pokemon_id: int
+    hp: int
+    level: str
+
+    @property
+    def id(self):
+        """Legacy name of the slug field"""
+        return self.slug
+
+class Card(NamedTuple):
+    """card row, fields in the column order of the INSERT"""
+    slug: str
+    position: str
+    category_id: int
+    rarity_id: int
+    set_id: int
+    illustrator_id: int
+
+    @property
+    def id(self):
+        """Legacy name of the slug field"""
+        return self.slug
  
 def check_energy_card(conn, id: str):
     cursor = conn.cursor()
@@ -235,19 +258,20 @@ def get_card_id(conn, id: str):
         
 def insert_card(conn, data: Card):
     # Check if card already exists
-    existing_id = get_card_id_by_slug(conn, data.id)
+    existing_id = get_card_id_by_slug(conn, data.slug)
     if existing_id is not None:
-        debug("Card '%s' already exists with id: %s", data.id, existing_id)
+        debug("Card '%s' already exists with id: %s", data.slug, existing_id)
         return existing_id
     
     cursor = conn.cursor()
     try:
         cursor.execute(
             "INSERT INTO card (slug, position, category_id, rarity_id, serie_id, illustrator_id) VALUES (%s, %s, %s, %s, %s, %s)",
-            (data.id, data.position, data.category_id, data.rarity_id, data.set_id, data.illustrator_id)
+            tuple(data)
         )
         # Valider les changements
         conn.commit()
+        slug_snapshot.remember("card", data.slug, cursor.lastrowid)
         return cursor.lastrowid
     
     except mysql.connector.Error as err:
@@ -279,6 +303,7 @@ def insert_card_translation(conn, slug: str, card_id: str, language_id: str, nam
         )
         # Valider les changements
         conn.commit()
+        slug_snapshot.remember("card_translation", slug, cursor.lastrowid)
         return cursor.lastrowid
     
     except mysql.connector.Error as err:
@@ -291,6 +316,10 @@ def insert_card_translation(conn, slug: str, card_id: str, language_id: str, nam
         
 def get_energy_card_id_by_slug(conn, slug: str):
     """Get existing energy card ID by slug to handle duplicates"""
+    row_id = slug_snapshot.lookup("energy_card", slug)
+    if row_id is not UNKNOWN:
+        return row_id
+
     cursor = conn.cursor()
     try:
         cursor.execute(
@@ -318,16 +347,8 @@ def insert_energy_card(conn, slug: str, card_id: str, energy_type: str, langId:
     
     cursor = conn.cursor()
     try:
-        # Try to get element by first word, with auto-create enabled
-        element_id = get_element_id_by_name(conn, energy_type.split(' ')[0], langId, auto_create=True)
-        if element_id == 0 and len(energy_type.split(' ')) > 1:
-            element_id = get_element_id_by_name(conn, energy_type.split(' ')[1], langId, auto_create=True)
-        if element_id == 0:
-            # Fallback: try full energy type name with auto-create
-            element_id = get_element_id_by_name(conn, energy_type, langId, auto_create=True)
-        if element_id == 0:
-            # Last resort: use Special
-            element_id = get_element_id_by_name(conn, "Spéciale", langId, auto_create=True)
+        # Element named in the energy card name, "Spéciale" if none
+        element_id = element_resolver.resolve_energy(conn, energy_type, langId)
 
         cursor.execute(
             "INSERT INTO energy_card (slug, card_id, element_id) VALUES (%s, %s, %s)",
@@ -335,6 +356,7 @@ def insert_energy_card(conn, slug: str, card_id: str, energy_type: str, langId:
         )
         # Valider les changements
         conn.commit()
+        slug_snapshot.remember("energy_card", slug, cursor.lastrowid)
         return cursor.lastrowid
     
     except mysql.connector.Error as err:
@@ -347,6 +369,10 @@ def insert_energy_card(conn, slug: str, card_id: str, energy_type: str, langId:
                 
 def get_trainer_card_id_by_slug(conn, slug: str):
     """Get existing trainer card ID by slug to handle duplicates"""
+    row_id = slug_snapshot.lookup("trainer_card", slug)
+    if row_id is not UNKNOWN:
+        return row_id
+
     cursor = conn.cursor()
     try:
         cursor.execute(
@@ -380,6 +406,7 @@ def insert_trainer_card(conn, slug: str, card_id: str):
         )
         # Valider les changements
         conn.commit()
+        slug_snapshot.remember("trainer_card", slug, cursor.lastrowid)
         return cursor.lastrowid
     
     except mysql.connector.Error as err:
@@ -392,6 +419,10 @@ def insert_trainer_card(conn, slug: str, card_id: str):
         
 def get_pokemon_card_id_by_slug(conn, slug: str):
     """Get existing pokemon card ID by slug to handle duplicates"""
+    row_id = slug_snapshot.lookup("pokemon_card", slug)
+    if row_id is not UNKNOWN:
+        return row_id
+
     cursor = conn.cursor()
     try:
         cursor.execute(
@@ -412,19 +443,20 @@ def get_pokemon_card_id_by_slug(conn, slug: str):
 
 def insert_pokemon_card(conn, data: PokemonCard):
     # Check if pokemon card already exists
-    existing_id = get_pokemon_card_id_by_slug(conn, data.id)
+    existing_id = get_pokemon_card_id_by_slug(conn, data.slug)
     if existing_id is not None:
-        debug("Pokemon card '%s' already exists with id: %s", data.id, existing_id)
+        debug("Pokemon card '%s' already exists with id: %s", data.slug, existing_id)
         return existing_id
     
     cursor = conn.cursor()
     try:
         cursor.execute(
             "INSERT INTO pokemon_card (slug, card_id, pokemon_id, hp, level) VALUES (%s, %s, %s, %s, %s)",
-            (data.id, data.card_id, data.pokemon_id, data.hp, data.level)
+            tuple(data)
         )
         # Valider les changements
         conn.commit()
+        slug_snapshot.remember("pokemon_card", data.slug, cursor.lastrowid)
         return cursor.lastrowid
     
     except mysql.connector.Error as err:
@@ -440,7 +472,7 @@ def insert_pokemon_card_element(conn, pokemon_card_id: str, element: str, langId
     cursor = conn.cursor()
     try:
         # Get element with auto-create enabled
-        element_id = get_element_id_by_name(conn, element, langId, auto_create=True)
+        element_id = element_resolver.resolve_type(conn, element, langId)
 
         if element_id == 0:
             error("Failed to get or create element '%s' for language %s", element, langId)
@@ -478,4 +510,313 @@ def insert_card_variant(conn, card_id: str, variant: str):
         conn.rollback()
 
     finally:
-        cursor.close()
\ No newline at end of file
+        cursor.close()
+
+# Fields of the tcgdex card payload that end up in our tables. Only these are
+# hashed so that API-side noise (pricing, "updated" timestamps, ...) does not
+# trigger a refresh.
+HASHED_CARD_FIELDS = (
+    "name", "localId", "category", "rarity", "illustrator", "hp", "level",
+    "dexId", "types", "variants", "description", "effect"
+)
+
+SUBTYPE_TABLES = ("pokemon_card", "energy_card", "trainer_card")
+
+def delete_other_subtypes(conn, card_id: str, keep: str):
+    """
+    Delete the subtype rows of a card other than keep (one of SUBTYPE_TABLES), e.g. the
+    pokemon_card row of a card tcgdex moved to trainers. Returns the number of rows deleted, None on error.
+    """
+    cursor = conn.cursor()
+    try:
+        deleted = 0
+        for table in SUBTYPE_TABLES:
+            if table == keep:
+                continue
+            cursor.execute(f"SELECT id, slug FROM `{table}` WHERE card_id = %s", (card_id,))
+            rows = cursor.fetchall()
+            if not rows:
+                continue
+            if table == "pokemon_card":
+                placeholders = ", ".join(["%s"] * len(rows))
+                cursor.execute(f"DELETE FROM pokemon_card_elements WHERE pokemon_card_id IN ({placeholders})",
+                               tuple(row[0] for row in rows))
+            cursor.execute(f"DELETE FROM `{table}` WHERE card_id = %s", (card_id,))
+            for _, slug in rows:
+                slug_snapshot.forget(table, slug)
+            debug("Deleted %s %s row(s) of card %s", len(rows), table, card_id)
+            deleted += len(rows)
+        # Valider les changements
+        conn.commit()
+        return deleted
+
+    except mysql.connector.Error as err:
+        error("Error deleting subtype rows of card %s: %s", card_id, err)
+        conn.rollback()
+        return None
+
+    finally:
+        cursor.close()
+
+def compute_card_hash(card_data: dict) -> str:
+    """Compute a stable SHA-256 hash of the normalized card payload"""
+    normalized = {field: card_data.get(field) for field in HASHED_CARD_FIELDS}
+    payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def ensure_card_hash_table(conn):
+    """Create the card_content_hash table if it does not exist yet"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS card_content_hash (
+                card_id INT NOT NULL PRIMARY KEY,
+                content_hash CHAR(64) NOT NULL,
+                updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            )
+        """)
+        conn.commit()
+
+    except mysql.connector.Error as err:
+        error("Error creating card_content_hash table: %s", err)
+        conn.rollback()
+
+    finally:
+        cursor.close()
+
+def get_card_hash(conn, card_id: str):
+    """Get the stored content hash of a card, None if never hashed"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT content_hash FROM card_content_hash WHERE card_id = %s LIMIT 1",
+            (card_id,)
+        )
+        res = cursor.fetchone()
+        if res is None:
+            return None
+        return res[0]
+
+    except mysql.connector.Error as err:
+        error("Error getting card hash: %s", err)
+        return None
+
+    finally:
+        cursor.close()
+
+def set_card_hash(conn, card_id: str, content_hash: str):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "INSERT INTO card_content_hash (card_id, content_hash) VALUES (%s, %s) ON DUPLICATE KEY UPDATE content_hash = VALUES(content_hash)",
+            (card_id, content_hash)
+        )
+        # Valider les changements
+        conn.commit()
+
+    except mysql.connector.Error as err:
+        error("Error storing card hash: %s", err)
+        conn.rollback()
+
+    finally:
+        cursor.close()
+
+def update_card(conn, card_id: str, data: Card):
+    """Update the mutable columns of an existing card"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "UPDATE card SET position = %s, category_id = %s, rarity_id = %s, illustrator_id = %s WHERE id = %s",
+            (data.position, data.category_id, data.rarity_id, data.illustrator_id, card_id)
+        )
+        # Valider les changements
+        conn.commit()
+        return card_id
+
+    except mysql.connector.Error as err:
+        error("Error updating card: %s", err)
+        conn.rollback()
+        return None
+
+    finally:
+        cursor.close()
+
+def update_card_translation(conn, slug: str, card_id: str, language_id: str, name: str, description: str):
+    """Update name, description and SEO path of a card translation, creating it if missing"""
+    existing_id = get_card_translation_id_by_slug(conn, slug)
+    if existing_id is None:
+        return insert_card_translation(conn, slug, card_id, language_id, name, description)
+
+    cursor = conn.cursor()
+    try:
+        seo_data = get_card_seo_data(conn, card_id, language_id)
+        seo_path = build_seo_path(name, seo_data)
+
+        cursor.execute(
+            "UPDATE card_translation SET name = %s, description = %s, seo_path = %s WHERE id = %s",
+            (name, description, seo_path, existing_id)
+        )
+        # Valider les changements
+        conn.commit()
+        return existing_id
+
+    except mysql.connector.Error as err:
+        error("Error updating card translation: %s", err)
+        conn.rollback()
+        return None
+
+    finally:
+        cursor.close()
+
+def update_pokemon_card(conn, data: PokemonCard):
+    """Update pokemon, hp and level of a pokemon card, creating it if missing"""
+    existing_id = get_pokemon_card_id_by_slug(conn, data.slug)
+    if existing_id is None:
+        return insert_pokemon_card(conn, data)
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "UPDATE pokemon_card SET pokemon_id = %s, hp = %s, level = %s WHERE id = %s",
+            (data.pokemon_id, data.hp, data.level, existing_id)
+        )
+        # Valider les changements
+        conn.commit()
+        return existing_id
+
+    except mysql.connector.Error as err:
+        error("Error updating pokemon card: %s", err)
+        conn.rollback()
+        return None
+
+    finally:
+        cursor.close()
+
+def update_energy_card(conn, slug: str, card_id: str, energy_type: str, langId: str):
+    """Update the element of an energy card from its name, creating the row if missing"""
+    existing_id = get_energy_card_id_by_slug(conn, slug)
+    if existing_id is None:
+        return insert_energy_card(conn, slug, card_id, energy_type, langId)
+
+    cursor = conn.cursor()
+    try:
+        element_id = element_resolver.resolve_energy(conn, energy_type, langId)
+        if not element_id:
+            error("Failed to get the element of energy card '%s'", slug)
+            return None
+
+        cursor.execute(
+            "UPDATE energy_card SET element_id = %s WHERE id = %s",
+            (element_id, existing_id)
+        )
+        # Valider les changements
+        conn.commit()
+        return existing_id
+
+    except mysql.connector.Error as err:
+        error("Error updating energy card: %s", err)
+        conn.rollback()
+        return None
+
+    finally:
+        cursor.close()
+
+def sync_pokemon_card_elements(conn, pokemon_card_id: str, elements: list, langId: str):
+    """
+    Make the elements of a pokemon card match the given list (insert missing, delete stale).
+    Returns the pokemon card id, None on error: an element that cannot be resolved aborts
+    the sync, the current elements would otherwise be deleted in its place.
+    """
+    wanted_ids = set()
+    for element in elements:
+        element_id = element_resolver.resolve_type(conn, element, langId)
+        if not element_id:
+            error("Failed to get or create element '%s' for language %s", element, langId)
+            return None
+        wanted_ids.add(element_id)
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT element_id FROM pokemon_card_elements WHERE pokemon_card_id = %s",
+            (pokemon_card_id,)
+        )
+        current_ids = {row[0] for row in cursor.fetchall()}
+
+        for element_id in wanted_ids - current_ids:
+            cursor.execute(
+                "INSERT INTO pokemon_card_elements (pokemon_card_id, element_id) VALUES (%s, %s)",
+                (pokemon_card_id, element_id)
+            )
+        for element_id in current_ids - wanted_ids:
+            cursor.execute(
+                "DELETE FROM pokemon_card_elements WHERE pokemon_card_id = %s AND element_id = %s",
+                (pokemon_card_id, element_id)
+            )
+        # Valider les changements
+        conn.commit()
+        return pokemon_card_id
+
+    except mysql.connector.Error as err:
+        error("Error syncing pokemon card elements: %s", err)
+        conn.rollback()
+        return None
+
+    finally:
+        cursor.close()
+
+def sync_card_variants(conn, card_id: str, variants: list):
+    """Make the variants of a card match the given list of variant names (insert missing, delete stale). Returns the card id, None on error"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT v.name FROM card_variants cv JOIN variant v ON cv.variant_id = v.id WHERE cv.card_id = %s",
+            (card_id,)
+        )
+        current = {row[0] for row in cursor.fetchall()}
+        wanted = set(variants)
+
+        for variant in wanted - current:
+            cursor.execute(
+                "INSERT INTO card_variants (card_id, variant_id) VALUES (%s, (SELECT id FROM variant WHERE name = %s)) ON DUPLICATE KEY UPDATE card_id=card_id",
+                (card_id, variant)
+            )
+        for variant in current - wanted:
+            cursor.execute(
+                "DELETE cv FROM card_variants cv JOIN variant v ON cv.variant_id = v.id WHERE cv.card_id = %s AND v.name = %s",
+                (card_id, variant)
+            )
+        # Valider les changements
+        conn.commit()
+        return card_id
+
+    except mysql.connector.Error as err:
+        error("Error syncing card variants: %s", err)
+        conn.rollback()
+        return None
+
+    finally:
+        cursor.close()
+
+
+def get_card_slugs_by_prefix(conn, slug_prefix: str) -> dict:
+    """Map every card slug starting with slug_prefix to whether its pokemon/energy/trainer row exists"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT
+                c.slug,
+                EXISTS(SELECT 1 FROM pokemon_card pc WHERE pc.card_id = c.id)
+                    OR EXISTS(SELECT 1 FROM energy_card ec WHERE ec.card_id = c.id)
+                    OR EXISTS(SELECT 1 FROM trainer_card tc WHERE tc.card_id = c.id)
+            FROM card c
+            WHERE c.slug LIKE %s
+        """, (like_prefix(slug_prefix),))
+        return {slug: bool(has_subtype) for slug, has_subtype in cursor.fetchall()}
+
+    except mysql.connector.Error as err:
+        error("Error getting card slugs: %s", err)
+        return {}
+
+    finally:
+        cursor.close()
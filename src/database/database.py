@@ -3,8 +3,9 @@ import os
 from dotenv import load_dotenv
 from mysql.connector import Error
         
-def create_connection():
-    load_dotenv()
+def create_connection(load_env: bool = True):
+    if load_env:
+        load_dotenv()
     connection = None
     try:
         connection = mysql.connector.connect(
@@ -18,4 +19,7 @@ def create_connection():
     except Error as e:
         print(f"The error '{e}' occurred")
     return connection
-    
\ No newline at end of file
+
+def like_prefix(prefix: str) -> str:
+    """LIKE pattern matching every string starting with prefix"""
+    return prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
@@ -1,6 +1,7 @@
 import mysql.connector
 import re
 from ..utils.logger import debug, error, info
+from ..utils.text import fold_name
 
 class Element:
     def __init__(self, name, image_uuid):
@@ -100,3 +101,99 @@ def get_element_id_by_name(conn, element_name: str, langId: int, auto_create: bo
 
     finally:
         cursor.close()
+
+
+# Words of an energy card name that never name an element ("Énergie Feu", "Fire Energy")
+ENERGY_WORDS = {"energie", "energy", "エネルギー"}
+# Element used when an energy card name contains no known element
+SPECIAL_ELEMENT = "Spéciale"
+
+class ElementResolver:
+    """
+    In-memory element resolution.
+    The element names of a language are loaded in one query on first use, then
+    types and energy card names are matched on their folded form. Decisions are
+    cached, so resolution costs no query once every name has been seen.
+    """
+    def __init__(self):
+        # lang_id -> {folded name: element_id}
+        self.names = {}
+        # (lang_id, energy card name) -> element_id
+        self.energy_decisions = {}
+
+    def reset(self):
+        """Forget everything, names are reloaded on next use"""
+        self.names = {}
+        self.energy_decisions = {}
+
+    def load(self, conn, lang_id: int) -> dict:
+        names = self.names.get(lang_id)
+        if names is not None:
+            return names
+
+        names = {}
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "SELECT name, element_id FROM element_translation WHERE translation_language_id = %s",
+                (lang_id,)
+            )
+            for name, element_id in cursor.fetchall():
+                folded = fold_name(name)
+                # Elements created from an energy word by older runs are never matched
+                if folded and folded not in ENERGY_WORDS:
+                    names.setdefault(folded, element_id)
+            debug("Element resolver: %s element name(s) loaded for language %s", len(names), lang_id)
+        except mysql.connector.Error as err:
+            error("Error loading elements: %s", err)
+            # Retry on next use
+            return names
+        finally:
+            cursor.close()
+
+        self.names[lang_id] = names
+        return names
+
+    def resolve_type(self, conn, element_name: str, lang_id: int, auto_create: bool = True):
+        """Element id of a pokemon type, created if unknown. 0 on failure."""
+        names = self.load(conn, lang_id)
+        folded = fold_name(element_name)
+        element_id = names.get(folded)
+        if element_id is not None:
+            return element_id
+        if not auto_create:
+            return 0
+
+        element_id = insert_element_if_not_exists(conn, element_name, lang_id)
+        if element_id and folded:
+            names[folded] = element_id
+        return element_id
+
+    def resolve_energy(self, conn, energy_name: str, lang_id: int):
+        """Element id of an energy card from its name, the special element if it names none"""
+        key = (lang_id, energy_name)
+        element_id = self.energy_decisions.get(key)
+        if element_id is not None:
+            return element_id
+
+        names = self.load(conn, lang_id)
+        words = [word for word in fold_name(energy_name).split(' ') if word and word not in ENERGY_WORDS]
+        element_id = None
+        # First word naming an element, then the whole name without the energy words
+        for word in words:
+            element_id = names.get(word)
+            if element_id is not None:
+                break
+        if element_id is None:
+            element_id = names.get(' '.join(words))
+        if element_id is None:
+            debug("No element in energy name '%s', using '%s'", energy_name, SPECIAL_ELEMENT)
+            element_id = self.resolve_type(conn, SPECIAL_ELEMENT, lang_id)
+
+        if element_id:
+            self.energy_decisions[key] = element_id
+        return element_id
+
+
+# Shared by every helper of the process
+element_resolver = ElementResolver()
@@ -1,10 +1,10 @@
 import mysql.connector
 import uuid
+from typing import NamedTuple
 from ..utils.logger import debug, error
 
-class Illustrator:
-    def __init__(self, name):
-        self.name = name
+class Illustrator(NamedTuple):
+    name: str
         
 def get_illustrator_id(conn, data: Illustrator):
     cursor = conn.cursor()
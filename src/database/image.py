@@ -1,10 +1,10 @@
 import mysql.connector
 import uuid
+from typing import NamedTuple
 
-class Image:
-    def __init__(self, path, mime_type):
-        self.path = path
-        self.mime_type = mime_type
+class Image(NamedTuple):
+    path: str
+    mime_type: str
         
 def insert_image(conn, data: Image):
     id = str(uuid.uuid4())
@@ -25,4 +25,134 @@ def insert_image(conn, data: Image):
         conn.rollback()
 
     finally:
-        cursor.close()
\ No newline at end of file
+        cursor.close()
+
+def get_existing_image_paths(conn, paths: list) -> set:
+    """Return the subset of the given paths already recorded in the image table"""
+    if not paths:
+        return set()
+    cursor = conn.cursor()
+    try:
+        placeholders = ','.join(['%s'] * len(paths))
+        cursor.execute(
+            f"SELECT path FROM image WHERE path IN ({placeholders})",
+            tuple(paths)
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+    except mysql.connector.Error as err:
+        print(f"Error getting images: {err}")
+        return set()
+
+    finally:
+        cursor.close()
+
+def insert_images(conn, images: list):
+    """Insert several images in one statement and one commit, returns their uuids"""
+    if not images:
+        return []
+    ids = [str(uuid.uuid4()) for _ in images]
+    cursor = conn.cursor()
+    try:
+        cursor.executemany(
+            "INSERT INTO image (uuid, path, mime_type) VALUES (%s, %s, %s)",
+            [(id, data.path, data.mime_type) for id, data in zip(ids, images)]
+        )
+
+        # Valider les changements
+        conn.commit()
+        return ids
+
+    except mysql.connector.Error as err:
+        print(f"Error creating images: {err}")
+        conn.rollback()
+        return []
+
+    finally:
+        cursor.close()
+
+def get_image_uuids(conn, paths: list) -> dict:
+    """Return path -> uuid of the given paths already recorded in the image table, None on error"""
+    if not paths:
+        return {}
+    cursor = conn.cursor()
+    try:
+        placeholders = ','.join(['%s'] * len(paths))
+        cursor.execute(
+            f"SELECT path, uuid FROM image WHERE path IN ({placeholders})",
+            tuple(paths)
+        )
+        return {path: id for path, id in cursor.fetchall()}
+
+    except mysql.connector.Error as err:
+        print(f"Error getting images: {err}")
+        return None
+
+    finally:
+        cursor.close()
+
+def ensure_card_image_table(conn):
+    """Create the card_image table (image of each card) if it does not exist yet"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS card_image (
+                card_id INT NOT NULL PRIMARY KEY,
+                image_uuid CHAR(36) NOT NULL,
+                KEY idx_card_image_image_uuid (image_uuid)
+            )
+        """)
+        conn.commit()
+
+    except mysql.connector.Error as err:
+        print(f"Error creating card_image table: {err}")
+        conn.rollback()
+
+    finally:
+        cursor.close()
+
+def get_linked_card_slugs(conn):
+    """Slugs of the cards linked to an image, None on error"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT c.slug FROM card_image ci JOIN card c ON c.id = ci.card_id")
+        return {row[0] for row in cursor.fetchall()}
+
+    except mysql.connector.Error as err:
+        print(f"Error getting card images: {err}")
+        return None
+
+    finally:
+        cursor.close()
+
+def link_card_images(conn, links: list):
+    """
+    Link cards to their image from (card slug, image uuid) pairs in one commit.
+    Returns the slugs of the linked cards (cards not in the database are left out), None on error.
+    """
+    if not links:
+        return set()
+    cursor = conn.cursor()
+    try:
+        slugs = list({card_slug for card_slug, _ in links})
+        placeholders = ','.join(['%s'] * len(slugs))
+        cursor.execute(f"SELECT slug, id FROM card WHERE slug IN ({placeholders})", tuple(slugs))
+        card_ids = {slug: id for slug, id in cursor.fetchall()}
+        rows = [(card_ids[card_slug], image_uuid) for card_slug, image_uuid in links if card_slug in card_ids]
+        if rows:
+            cursor.executemany(
+                "INSERT INTO card_image (card_id, image_uuid) VALUES (%s, %s) ON DUPLICATE KEY UPDATE image_uuid = VALUES(image_uuid)",
+                rows
+            )
+
+        # Valider les changements
+        conn.commit()
+        return set(card_ids)
+
+    except mysql.connector.Error as err:
+        print(f"Error linking card images: {err}")
+        conn.rollback()
+        return None
+
+    finally:
+        cursor.close()
@@ -0,0 +1,229 @@
+"""
+SQL statement instrumentation.
+
+InstrumentedConnection wraps a MySQL connection (under the BatchConnection) and
+times every statement executed through its cursors. Statements are grouped by
+shape: the text with literals and placeholders replaced by "?" and IN lists
+collapsed, so "WHERE slug = 'a'" and "WHERE slug = 'b'" count as one.
+
+Each "SAVEPOINT card_unit" (see batch.py) starts a new card: a shape executed
+more than nplus1_threshold times by the same card is flagged as an N+1 pattern.
+print_report ranks the shapes by total time with calls, mean and p95 latency,
+rows returned and statements per card. The p95 is estimated from a fixed-size
+uniform sample of the latencies (reservoir sampling), so memory stays flat
+however long the run. On SIGUSR1 the handler only raises a
+flag, the report is printed by the next statement recorded (outside the lock).
+"""
+import copy
+import random
+import re
+import signal
+import threading
+import time
+
+from ..utils.logger import info
+
+LITERAL_PATTERNS = (
+    (re.compile(r"'(?:[^'\\]|\\.)*'"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"%s"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(?+)"),
+    (re.compile(r"\s+"), " "),
+)
+UNIT_STATEMENT = "SAVEPOINT card_unit"
+# Latencies kept per shape for the p95
+LATENCY_SAMPLES = 1024
+
+
+def normalize_statement(statement: str) -> str:
+    """Shape of a statement, the same for every set of parameters"""
+    shape = statement.strip()
+    for pattern, replacement in LITERAL_PATTERNS:
+        shape = pattern.sub(replacement, shape)
+    return shape
+
+
+class StatementStats:
+    __slots__ = ("calls", "total", "latencies", "rows", "max_per_unit", "nplus1_units")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.latencies = []
+        self.rows = 0
+        self.max_per_unit = 0
+        self.nplus1_units = 0
+
+    def add_latency(self, elapsed: float):
+        """Keep a uniform sample of the latencies, calls must already count this one"""
+        if len(self.latencies) < LATENCY_SAMPLES:
+            self.latencies.append(elapsed)
+        else:
+            index = random.randrange(self.calls)
+            if index < LATENCY_SAMPLES:
+                self.latencies[index] = elapsed
+
+    def p95(self) -> float:
+        latencies = sorted(self.latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0.0
+
+
+class StatementRecorder:
+    def __init__(self, nplus1_threshold: int = 3):
+        self.nplus1_threshold = nplus1_threshold
+        self.stats = {}
+        self.units = 0
+        self.unit_counts = {}
+        self.lock = threading.Lock()
+        self.report_requested = False
+
+    def record(self, statement: str, elapsed: float, rows: int) -> str:
+        """Record one execution, returns the shape of the statement"""
+        shape = normalize_statement(statement)
+        with self.lock:
+            if shape == UNIT_STATEMENT:
+                self.end_unit()
+                self.units += 1
+            stats = self.stats.get(shape)
+            if stats is None:
+                stats = self.stats[shape] = StatementStats()
+            stats.calls += 1
+            stats.total += elapsed
+            stats.add_latency(elapsed)
+            stats.rows += max(rows, 0)
+            self.unit_counts[shape] = self.unit_counts.get(shape, 0) + 1
+            report, self.report_requested = self.report_requested, False
+        if report:
+            self.print_report()
+        return shape
+
+    def request_report(self):
+        """Signal handler side: only raise the flag, taking the lock here could deadlock"""
+        self.report_requested = True
+
+    def add_rows(self, shape: str, rows: int):
+        with self.lock:
+            stats = self.stats.get(shape)
+            if stats is not None:
+                stats.rows += rows
+
+    def end_unit(self):
+        """Close the statement counts of the current card (called with the lock held)"""
+        for shape, count in self.unit_counts.items():
+            stats = self.stats[shape]
+            stats.max_per_unit = max(stats.max_per_unit, count)
+            if count > self.nplus1_threshold:
+                stats.nplus1_units += 1
+        self.unit_counts = {}
+
+    def ranked(self) -> list:
+        """Copy of the statistics by total time, the card in progress is counted without being closed"""
+        with self.lock:
+            snapshot = []
+            for shape, stats in self.stats.items():
+                stats = copy.copy(stats)
+                stats.latencies = list(stats.latencies)
+                count = self.unit_counts.get(shape, 0)
+                stats.max_per_unit = max(stats.max_per_unit, count)
+                if count > self.nplus1_threshold:
+                    stats.nplus1_units += 1
+                snapshot.append((shape, stats))
+        return sorted(snapshot, key=lambda item: item[1].total, reverse=True)
+
+    def print_report(self, top: int = 20):
+        ranked = self.ranked()
+        calls = sum(stats.calls for _, stats in ranked)
+        total = sum(stats.total for _, stats in ranked)
+        print(f"\nSQL: {calls} statement(s), {total:.2f}s, {len(ranked)} shape(s), {self.units} card unit(s)")
+        if self.units:
+            print(f"     {calls / self.units:.1f} statement(s) per card")
+        print(f"  {'calls':>8} {'total s':>9} {'mean ms':>8} {'p95 ms':>8} {'rows':>8} {'max/card':>8}  statement")
+        for shape, stats in ranked[:top]:
+            flag = f"  <- N+1 in {stats.nplus1_units} card(s)" if stats.nplus1_units else ""
+            print(f"  {stats.calls:>8} {stats.total:>9.3f} {stats.total / stats.calls * 1000:>8.2f} {stats.p95() * 1000:>8.2f} "
+                  f"{stats.rows:>8} {stats.max_per_unit:>8}  {shape[:100]}{flag}")
+
+        nplus1 = [(shape, stats) for shape, stats in ranked if stats.nplus1_units]
+        if nplus1:
+            print(f"\nN+1 patterns (more than {self.nplus1_threshold} identical statement(s) per card):")
+            for shape, stats in sorted(nplus1, key=lambda item: item[1].nplus1_units, reverse=True):
+                print(f"  {stats.nplus1_units:>6} card(s), up to {stats.max_per_unit}x: {shape[:120]}")
+
+
+class InstrumentedCursor:
+    def __init__(self, cursor, recorder: StatementRecorder):
+        self.cursor = cursor
+        self.recorder = recorder
+        self.shape = None
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def timed(self, method, statement: str, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(statement, *args, **kwargs)
+        finally:
+            # Rows of writes are known now, rows of reads are added when fetched
+            is_read = statement.lstrip()[:6].upper() == "SELECT"
+            self.shape = self.recorder.record(statement, time.perf_counter() - started, 0 if is_read else (self.cursor.rowcount or 0))
+
+    def execute(self, statement, params=None, *args, **kwargs):
+        if params is None:
+            return self.timed(self.cursor.execute, statement, *args, **kwargs)
+        return self.timed(self.cursor.execute, statement, params, *args, **kwargs)
+
+    def executemany(self, statement, seq_params, *args, **kwargs):
+        return self.timed(self.cursor.executemany, statement, seq_params, *args, **kwargs)
+
+    def fetchone(self):
+        row = self.cursor.fetchone()
+        if row is not None:
+            self.recorder.add_rows(self.shape, 1)
+        return row
+
+    def fetchall(self):
+        rows = self.cursor.fetchall()
+        self.recorder.add_rows(self.shape, len(rows))
+        return rows
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self.cursor.fetchmany(*args, **kwargs)
+        self.recorder.add_rows(self.shape, len(rows))
+        return rows
+
+
+class InstrumentedConnection:
+    def __init__(self, conn, recorder: StatementRecorder):
+        self.conn = conn
+        self.recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self.conn.cursor(*args, **kwargs), self.recorder)
+
+    def commit(self):
+        started = time.perf_counter()
+        try:
+            return self.conn.commit()
+        finally:
+            self.recorder.record("COMMIT", time.perf_counter() - started, 0)
+
+    def rollback(self):
+        started = time.perf_counter()
+        try:
+            return self.conn.rollback()
+        finally:
+            self.recorder.record("ROLLBACK", time.perf_counter() - started, 0)
+
+
+def report_on_signal(recorder: StatementRecorder):
+    """Print the report on SIGUSR1 (kill -USR1 <pid>) while the run goes on"""
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda *_: recorder.request_report())
+        info("SQL report available on demand: kill -USR1 <pid>")
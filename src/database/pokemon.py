@@ -1,9 +1,15 @@
 import mysql.connector
 import uuid
 from ..utils.logger import debug, error
+from .snapshot import slug_snapshot, UNKNOWN
+from ..utils.text import fold_name
 
 def get_pokemon_translation_id_by_slug(conn, slug: str):
     """Get existing pokemon translation ID by slug to handle duplicates"""
+    row_id = slug_snapshot.lookup("pokemon_translation", slug)
+    if row_id is not UNKNOWN:
+        return row_id
+
     cursor = conn.cursor()
     try:
         cursor.execute(
@@ -104,6 +110,7 @@ def insert_pokemon_translation(conn, slug: str, pokemon_id: str, name: str, lang
         )
         # Valider les changements
         conn.commit()
+        slug_snapshot.remember("pokemon_translation", slug, cursor.lastrowid)
         return cursor.lastrowid
     
     except mysql.connector.Error as err:
@@ -118,6 +125,10 @@ def insert_pokemon_if_not_exist(conn, dexId: str, transNewSlug: str, name: str,
     """Insert pokemon and its translation if they don't exist"""
     try:
         # First check if pokemon translation already exists
+        pokemon_id = pokemon_name_index.pokemon_id_by_slug(conn, transNewSlug, langId)
+        if pokemon_id is not None:
+            debug("Pokemon translation '%s' already exists", transNewSlug)
+            return pokemon_id
         existing_translation_id = get_pokemon_translation_id_by_slug(conn, transNewSlug)
         if existing_translation_id is not None:
             debug("Pokemon translation '%s' already exists", transNewSlug)
@@ -130,23 +141,134 @@ def insert_pokemon_if_not_exist(conn, dexId: str, transNewSlug: str, name: str,
             finally:
                 cursor.close()
         
-        # Check if pokemon exists by name
-        pokemon_id = get_pokemon_id_by_name(conn, name, langId)
-        if pokemon_id == 0:
+        # The dexId is the pokemon id, the name is only a fallback: names can fold together (Nidoran♀ / Nidoran♂)
+        if dexId:
+            pokemon_id = get_pokemon_id_by_dex_id(conn, dexId)
+        else:
+            pokemon_id = pokemon_name_index.lookup(conn, name, langId) or None
+            if pokemon_id is None:
+                error("No dex ID and no pokemon named '%s'", name)
+                return None
+
+        if pokemon_id is None:
             # Create new pokemon
             pokemon_id = insert_pokemon(conn, dexId)
             if pokemon_id is None:
                 error("Failed to create pokemon with dex ID: %s", dexId)
                 return None
-                
-            # Create pokemon translation
-            translation_id = insert_pokemon_translation(conn, transNewSlug, pokemon_id, name, langId)
-            if translation_id is None:
-                error("Failed to create pokemon translation: %s", transNewSlug)
-                return None
-        
+        elif pokemon_name_index.lookup(conn, name, langId) == pokemon_id:
+            # Already translated in this language under another slug
+            return pokemon_id
+
+        # Create pokemon translation
+        translation_id = insert_pokemon_translation(conn, transNewSlug, pokemon_id, name, langId)
+        if translation_id is None:
+            error("Failed to create pokemon translation: %s", transNewSlug)
+            return None
+        pokemon_name_index.add(langId, name, pokemon_id, transNewSlug)
+
         return pokemon_id
     
     except mysql.connector.Error as err:
         error("Error in insert_pokemon_if_not_exist: %s", err)
-        return None
\ No newline at end of file
+        return None
+
+class PokemonNameIndex:
+    """
+    In-memory index of the pokemon names of a language.
+    Loaded once per language from pokemon_translation, names are folded (case and
+    accents) and stored in a word-level trie so a card name resolves to the
+    longest pokemon name it contains: "Dracaufeu de Blaine", "Méga-Dracaufeu X-ex".
+    """
+    def __init__(self):
+        # lang_id -> {folded name: pokemon_id}
+        self.names = {}
+        # lang_id -> word trie, a node is {word: node} with the pokemon_id under the None key
+        self.tries = {}
+        # translation slug -> pokemon_id
+        self.slugs = {}
+
+    def reset(self):
+        """Forget everything, names are reloaded on next use"""
+        self.names = {}
+        self.tries = {}
+        self.slugs = {}
+
+    def load(self, conn, lang_id) -> bool:
+        if lang_id in self.names:
+            return True
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "SELECT slug, name, pokemon_id FROM pokemon_translation WHERE translation_language_id = %s",
+                (lang_id,)
+            )
+            rows = cursor.fetchall()
+        except mysql.connector.Error as err:
+            error("Error loading pokemon names: %s", err)
+            return False
+        finally:
+            cursor.close()
+
+        self.names[lang_id] = {}
+        self.tries[lang_id] = {}
+        for slug, name, pokemon_id in rows:
+            self.add(lang_id, name, pokemon_id, slug)
+        debug("Pokemon name index: %s name(s) loaded for language %s", len(self.names[lang_id]), lang_id)
+        return True
+
+    def add(self, lang_id, name: str, pokemon_id, slug: str = None):
+        """Index a pokemon name, called for every translation inserted by the run"""
+        if slug:
+            self.slugs[slug] = pokemon_id
+        names = self.names.get(lang_id)
+        folded = fold_name(name or '')
+        if names is None or not folded or folded in names:
+            return
+        names[folded] = pokemon_id
+        node = self.tries[lang_id]
+        for word in folded.split(' '):
+            node = node.setdefault(word, {})
+        node[None] = pokemon_id
+
+    def pokemon_id_by_slug(self, conn, slug: str, lang_id):
+        """pokemon_id of an existing translation, None if unknown"""
+        if not self.load(conn, lang_id):
+            return None
+        return self.slugs.get(slug)
+
+    def lookup(self, conn, name: str, lang_id):
+        """pokemon_id of an exact (folded) name, 0 if not found"""
+        if not self.load(conn, lang_id):
+            return get_pokemon_id_by_name(conn, name, lang_id)
+        return self.names[lang_id].get(fold_name(name), 0)
+
+    def find(self, conn, card_name: str, lang_id, cleaned_name: str = None):
+        """pokemon_id of the longest pokemon name found in a card name, 0 if none"""
+        if not self.load(conn, lang_id):
+            return get_pokemon_id_by_name(conn, cleaned_name or card_name, lang_id)
+        names = self.names[lang_id]
+        for candidate in (card_name, cleaned_name):
+            if candidate:
+                pokemon_id = names.get(fold_name(candidate))
+                if pokemon_id is not None:
+                    return pokemon_id
+
+        # Longest run of words naming a pokemon, the earliest one on ties
+        words = fold_name(card_name).split(' ')
+        trie = self.tries[lang_id]
+        best_id, best_length = 0, 0
+        for start in range(len(words)):
+            node = trie
+            for index in range(start, len(words)):
+                node = node.get(words[index])
+                if node is None:
+                    break
+                if None in node and index - start + 1 > best_length:
+                    best_id, best_length = node[None], index - start + 1
+        return best_id
+
+
+# Shared by every helper of the process
+pokemon_name_index = PokemonNameIndex()
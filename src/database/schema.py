@@ -0,0 +1,258 @@
+"""
+Indexes the scraper relies on.
+
+Every helper of src/database looks rows up by slug, by name and language or by
+card_id, and the inserts rely on unique keys for their ON DUPLICATE KEY UPDATE.
+REQUIRED_INDEXES declares them with one statement each, the lookup the helpers
+actually run.
+
+audit_schema reads information_schema.STATISTICS and runs EXPLAIN on those
+statements, migrate_schema adds the missing indexes (ALTER TABLE ... ADD INDEX).
+Both are idempotent: an index is only created when no existing index of the
+table starts with the required columns. A unique key is never forced on a table
+holding duplicates, a plain index is added and the audit reports it.
+"""
+from typing import NamedTuple
+
+import mysql.connector
+from ..utils.logger import debug, info, error, warning
+
+# Prefix indexed on TEXT/BLOB columns (191 characters fit utf8mb4 keys of 767 bytes)
+TEXT_PREFIX = 191
+TEXT_TYPES = {"tinytext", "text", "mediumtext", "longtext", "tinyblob", "blob", "mediumblob", "longblob"}
+
+
+class IndexSpec(NamedTuple):
+    table: str
+    name: str
+    columns: tuple
+    unique: bool
+    # Lookup run by the helpers, EXPLAINed with sample parameters
+    statement: str
+    params: tuple
+
+
+def slug_index(table: str) -> IndexSpec:
+    return IndexSpec(table, f"uq_{table}_slug", ("slug",), True,
+                     f"SELECT id FROM `{table}` WHERE slug = %s LIMIT 1", ("poke-fr/sv",))
+
+def name_language_index(table: str, selected: str) -> IndexSpec:
+    return IndexSpec(table, f"ix_{table}_name_language", ("name", "translation_language_id"), False,
+                     f"SELECT {selected} FROM `{table}` WHERE name = %s AND translation_language_id = %s LIMIT 1", ("Pikachu", 1))
+
+def card_id_index(table: str) -> IndexSpec:
+    return IndexSpec(table, f"ix_{table}_card_id", ("card_id",), False,
+                     f"SELECT id FROM `{table}` WHERE card_id = %s LIMIT 1", (1,))
+
+
+REQUIRED_INDEXES = (
+    slug_index("tcg_language"),
+    slug_index("bloc"),
+    slug_index("bloc_translation"),
+    slug_index("serie"),
+    slug_index("serie_translation"),
+    slug_index("card"),
+    slug_index("card_translation"),
+    slug_index("pokemon_card"),
+    slug_index("energy_card"),
+    slug_index("trainer_card"),
+    slug_index("pokemon_translation"),
+    slug_index("element"),
+    slug_index("rarity"),
+    name_language_index("pokemon_translation", "pokemon_id"),
+    name_language_index("element_translation", "element_id"),
+    name_language_index("rarity_translation", "rarity_id"),
+    IndexSpec("illustrator", "uq_illustrator_name", ("name",), True,
+              "SELECT id FROM illustrator WHERE name = %s", ("Ken Sugimori",)),
+    card_id_index("pokemon_card"),
+    card_id_index("energy_card"),
+    card_id_index("trainer_card"),
+    IndexSpec("card_variants", "uq_card_variants_card_variant", ("card_id", "variant_id"), True,
+              "SELECT variant_id FROM card_variants WHERE card_id = %s", (1,)),
+    IndexSpec("pokemon_card_elements", "ix_pokemon_card_elements_card", ("pokemon_card_id",), False,
+              "SELECT element_id FROM pokemon_card_elements WHERE pokemon_card_id = %s", (1,)),
+)
+
+
+def get_table_indexes(conn, table: str) -> list:
+    """(index name, columns, unique) of every index of a table, None if the table does not exist"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT 1 FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (table,)
+        )
+        if cursor.fetchone() is None:
+            return None
+        cursor.execute(
+            """
+            SELECT INDEX_NAME, COLUMN_NAME, NON_UNIQUE FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+            ORDER BY INDEX_NAME, SEQ_IN_INDEX
+            """,
+            (table,)
+        )
+        indexes = {}
+        for index_name, column, non_unique in cursor.fetchall():
+            columns, _ = indexes.get(index_name, ((), True))
+            indexes[index_name] = (columns + (column.lower(),), not int(non_unique))
+        return [(name, columns, unique) for name, (columns, unique) in indexes.items()]
+
+    except mysql.connector.Error as err:
+        error("Error reading the indexes of %s: %s", table, err)
+        return None
+
+    finally:
+        cursor.close()
+
+def covering_index(indexes: list, spec: IndexSpec):
+    """
+    (name, unique) of the existing index serving the spec lookups: same leading columns,
+    preferring a unique key on exactly these columns. (None, False) if there is none.
+    """
+    found = (None, False)
+    for name, columns, unique in indexes:
+        if columns[:len(spec.columns)] != spec.columns:
+            continue
+        if unique and columns == spec.columns:
+            return name, True
+        found = found if found[0] else (name, False)
+    return found
+
+def explain(conn, spec: IndexSpec) -> dict:
+    """First row of EXPLAIN of the spec statement, as a dict (type, key, rows, ...)"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"EXPLAIN {spec.statement}", spec.params)
+        row = cursor.fetchone()
+        if row is None:
+            return {}
+        return {column[0].lower(): value.decode() if isinstance(value, (bytes, bytearray)) else value
+                for column, value in zip(cursor.description, row)}
+
+    except mysql.connector.Error as err:
+        error("Error explaining lookup of %s: %s", spec.table, err)
+        return {}
+
+    finally:
+        cursor.close()
+
+def audit_schema(conn, with_explain: bool = True) -> list:
+    """
+    State of every required index: dicts with the spec, the existing index serving it
+    (None if missing), whether it is a unique key and the EXPLAIN plan of its lookup.
+    Missing tables are left out.
+    """
+    table_indexes = {}
+    audit = []
+    for spec in REQUIRED_INDEXES:
+        if spec.table not in table_indexes:
+            table_indexes[spec.table] = get_table_indexes(conn, spec.table)
+        indexes = table_indexes[spec.table]
+        if indexes is None:
+            debug("Schema audit: table %s not found", spec.table)
+            continue
+        index, unique = covering_index(indexes, spec)
+        entry = {"spec": spec, "index": index, "unique": unique, "plan": {}}
+        if with_explain:
+            entry["plan"] = explain(conn, spec)
+        audit.append(entry)
+    return audit
+
+def print_audit(audit: list):
+    print(f"  {'table':<24} {'columns':<34} {'index':<36} {'access':<8} {'key':<36} rows")
+    for entry in audit:
+        spec, plan = entry["spec"], entry["plan"]
+        wanted = ", ".join(spec.columns) + (" (unique)" if spec.unique else "")
+        # type ALL is a full table scan
+        access = plan.get("type") or "-"
+        index = entry["index"] or "MISSING"
+        if entry["index"] and spec.unique and not entry["unique"]:
+            index += " (not unique)"
+        print(f"  {spec.table:<24} {wanted:<34} {index:<36} {access:<8} "
+              f"{plan.get('key') or '-':<36} {plan.get('rows') or '-'}")
+    missing = sum(1 for entry in audit if entry["index"] is None)
+    not_unique = sum(1 for entry in audit if entry["index"] and entry["spec"].unique and not entry["unique"])
+    scans = sum(1 for entry in audit if entry["plan"].get("type") == "ALL")
+    print(f"\n{len(audit)} lookup(s), {missing} missing index(es), {not_unique} index(es) that should be unique, "
+          f"{scans} full table scan(s)")
+
+
+def get_column_types(conn, table: str) -> dict:
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT COLUMN_NAME, DATA_TYPE FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (table,)
+        )
+        return {column.lower(): data_type.lower() for column, data_type in cursor.fetchall()}
+
+    except mysql.connector.Error as err:
+        error("Error reading the columns of %s: %s", table, err)
+        return {}
+
+    finally:
+        cursor.close()
+
+def has_duplicates(conn, spec: IndexSpec) -> bool:
+    """True if the rows of the table would violate a unique key on the spec columns"""
+    columns = ", ".join(f"`{column}`" for column in spec.columns)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT 1 FROM `{spec.table}` GROUP BY {columns} HAVING COUNT(*) > 1 LIMIT 1")
+        return cursor.fetchone() is not None
+
+    except mysql.connector.Error as err:
+        error("Error checking duplicates of %s: %s", spec.table, err)
+        return True
+
+    finally:
+        cursor.close()
+
+def add_index(conn, spec: IndexSpec) -> bool:
+    column_types = get_column_types(conn, spec.table)
+    missing_columns = [column for column in spec.columns if column not in column_types]
+    if missing_columns:
+        warning("Cannot index %s: no column %s", spec.table, ", ".join(missing_columns))
+        return False
+
+    unique = spec.unique
+    if unique and any(column_types[column] in TEXT_TYPES for column in spec.columns):
+        # A unique key on a prefix would reject distinct values sharing it
+        warning("%s.%s is a TEXT column, adding a plain prefix index instead of a unique key", spec.table, ", ".join(spec.columns))
+        unique = False
+    if unique and has_duplicates(conn, spec):
+        warning("Duplicate %s in %s, adding a plain index instead of a unique key", ", ".join(spec.columns), spec.table)
+        unique = False
+
+    columns = ", ".join(f"`{column}`({TEXT_PREFIX})" if column_types[column] in TEXT_TYPES else f"`{column}`"
+                        for column in spec.columns)
+    name = spec.name if unique or not spec.unique else spec.name.replace("uq_", "ix_", 1)
+    statement = f"ALTER TABLE `{spec.table}` ADD {'UNIQUE ' if unique else ''}INDEX `{name}` ({columns})"
+    cursor = conn.cursor()
+    try:
+        # DDL commits implicitly, the migration runs before any card unit
+        cursor.execute(statement)
+        info("Schema migration: %s", statement)
+        return True
+
+    except mysql.connector.Error as err:
+        error("Error adding index %s on %s: %s", name, spec.table, err)
+        return False
+
+    finally:
+        cursor.close()
+
+def migrate_schema(conn) -> int:
+    """Add the missing required indexes, returns the number of indexes created"""
+    created = 0
+    for entry in audit_schema(conn, with_explain=False):
+        if entry["index"] is not None:
+            continue
+        if add_index(conn, entry["spec"]):
+            created += 1
+    if created:
+        info("Schema migration: %s index(es) added", created)
+    else:
+        debug("Schema migration: every required index exists")
+    return created
@@ -1,9 +1,16 @@
 import uuid
+from typing import NamedTuple
 import mysql.connector
 from ..utils.logger import debug, error
+from .snapshot import slug_snapshot, UNKNOWN
+from .database import like_prefix
 
 def get_set_id_by_slug(conn, slug: str):
     """Get existing set ID by slug to handle duplicates"""
+    row_id = slug_snapshot.lookup("serie", slug)
+    if row_id is not UNKNOWN:
+        return row_id
+
     cursor = conn.cursor()
     try:
         cursor.execute(
@@ -24,6 +31,10 @@ def get_set_id_by_slug(conn, slug: str):
 
 def get_set_translation_id_by_slug(conn, slug: str):
     """Get existing set translation ID by slug to handle duplicates"""
+    row_id = slug_snapshot.lookup("serie_translation", slug)
+    if row_id is not UNKNOWN:
+        return row_id
+
     cursor = conn.cursor()
     try:
         cursor.execute(
@@ -42,36 +53,47 @@ def get_set_translation_id_by_slug(conn, slug: str):
     finally:
         cursor.close()
 
-class SetTranslation:
-    def __init__(self, id, set_id, name, description, language_id):
-        self.id = id
-        self.set_id = set_id
-        self.name = name
-        self.description = description
-        self.language_id = language_id
-
-class Set:
-    def __init__(self, id, card_number, position, bloc_id):
-        self.id = id
-        self.card_number = card_number
-        self.position = position
-        self.bloc_id = bloc_id
+class SetTranslation(NamedTuple):
+    """serie_translation row, fields in the column order of the INSERT"""
+    slug: str
+    set_id: int
+    name: str
+    description: str
+    language_id: int
+
+    @property
+    def id(self):
+        """Legacy name of the slug field"""
+        return self.slug
+
+class Set(NamedTuple):
+    """serie row, fields in the column order of the INSERT"""
+    slug: str
+    card_number: int
+    position: int
+    bloc_id: int
+
+    @property
+    def id(self):
+        """Legacy name of the slug field"""
+        return self.slug
   
 def insert_set_translation(conn, data: SetTranslation):
     # Check if set translation already exists
-    existing_id = get_set_translation_id_by_slug(conn, data.id)
+    existing_id = get_set_translation_id_by_slug(conn, data.slug)
     if existing_id is not None:
-        debug("Set translation '%s' already exists with id: %s", data.id, existing_id)
+        debug("Set translation '%s' already exists with id: %s", data.slug, existing_id)
         return existing_id
     
     cursor = conn.cursor()
     try:
         cursor.execute(
             "INSERT INTO `serie_translation` (slug, serie_id, name, description, translation_language_id) VALUES (%s, %s, %s, %s, %s)",
-            (data.id, data.set_id, data.name, data.description, data.language_id)
+            tuple(data)
         )
         # Valider les changements
         conn.commit()
+        slug_snapshot.remember("serie_translation", data.slug, cursor.lastrowid)
         return cursor.lastrowid
 
     except mysql.connector.Error as err:
@@ -84,19 +106,20 @@ def insert_set_translation(conn, data: SetTranslation):
         
 def insert_set(conn, data: Set):
     # Check if set already exists
-    existing_id = get_set_id_by_slug(conn, data.id)
+    existing_id = get_set_id_by_slug(conn, data.slug)
     if existing_id is not None:
-        debug("Set '%s' already exists with id: %s", data.id, existing_id)
+        debug("Set '%s' already exists with id: %s", data.slug, existing_id)
         return existing_id
     
     cursor = conn.cursor()
     try:
         cursor.execute(
             "INSERT INTO `serie` (slug, card_number, position, bloc_id) VALUES (%s, %s, %s, %s)",
-            (data.id, data.card_number, data.position, data.bloc_id)
+            tuple(data)
         )
         # Valider les changements
         conn.commit()
+        slug_snapshot.remember("serie", data.slug, cursor.lastrowid)
         return cursor.lastrowid
 
     except mysql.connector.Error as err:
@@ -105,4 +128,21 @@ def insert_set(conn, data: Set):
         return None
 
     finally:
-        cursor.close()
\ No newline at end of file
+        cursor.close()
+
+def get_set_slugs_by_prefix(conn, slug_prefix: str) -> set:
+    """Get every set slug starting with slug_prefix in one query"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT slug FROM `serie` WHERE slug LIKE %s",
+            (like_prefix(slug_prefix),)
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+    except mysql.connector.Error as err:
+        error("Error getting set slugs: %s", err)
+        return set()
+
+    finally:
+        cursor.close()
@@ -0,0 +1,214 @@
+"""
+Warm-start snapshot of slug -> id maps.
+
+The get_*_id_by_slug helpers answer from memory once the snapshot is open. The
+maps are persisted between runs in a SQLite file of the state directory and
+loaded at startup. Each table is validated against MySQL with a single
+MAX(id)/COUNT(*) query:
+- unchanged stamp: the map is trusted as is, a slug it does not hold does not
+  exist in the database either
+- rows only appended since the last run: the new rows are loaded (id > old max)
+- anything else (deleted rows, unknown table): the table is reloaded in one query
+
+Rows inserted by the run are added to the maps as they are created, so the
+snapshot stays valid as long as the scraper is the only writer while it runs.
+"""
+import os
+import sqlite3
+import time
+
+import mysql.connector
+from ..utils.logger import debug, info, error
+
+# Tables keyed by slug, in the order they are validated
+SLUG_TABLES = (
+    "tcg_language",
+    "bloc",
+    "bloc_translation",
+    "serie",
+    "serie_translation",
+    "card",
+    "card_translation",
+    "pokemon_card",
+    "energy_card",
+    "trainer_card",
+    "pokemon_translation",
+)
+
+# Returned by lookup() when the snapshot cannot answer and the database must be queried
+UNKNOWN = object()
+
+
+class SlugSnapshot:
+    def __init__(self):
+        self.maps = {}
+        self.stamps = {}
+        self.db = None
+        self.pending = 0
+        # (table, slug, previous id, previous stamp) of the rows remembered since begin()
+        self.journal = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.db is not None
+
+    def open(self, path: str, conn):
+        """Load the snapshot file at path and bring every table up to date with the database"""
+        started = time.perf_counter()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("CREATE TABLE IF NOT EXISTS slug_id (tbl TEXT, slug TEXT, id INTEGER, PRIMARY KEY (tbl, slug)) WITHOUT ROWID")
+        self.db.execute("CREATE TABLE IF NOT EXISTS stamp (tbl TEXT PRIMARY KEY, max_id INTEGER, row_count INTEGER)")
+
+        self.maps = {table: {} for table in SLUG_TABLES}
+        for table, slug, row_id in self.db.execute("SELECT tbl, slug, id FROM slug_id"):
+            if table in self.maps:
+                self.maps[table][slug] = row_id
+        self.stamps = {table: (max_id, row_count) for table, max_id, row_count in self.db.execute("SELECT tbl, max_id, row_count FROM stamp")}
+        loaded = sum(len(slugs) for slugs in self.maps.values())
+        debug("Slug snapshot: %s slug(s) loaded from %s in %.1f ms", loaded, path, (time.perf_counter() - started) * 1000)
+
+        for table in SLUG_TABLES:
+            if not self.validate(conn, table):
+                # The table stays out of the snapshot, lookups go to the database
+                del self.maps[table]
+        self.db.commit()
+        info("Slug snapshot ready: %s table(s), %s slug(s) in %.1f ms",
+             len(self.maps), sum(len(slugs) for slugs in self.maps.values()), (time.perf_counter() - started) * 1000)
+
+    def validate(self, conn, table: str) -> bool:
+        """Compare the stamp of a table with the database, load what changed. False if the table is unusable."""
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT COALESCE(MAX(id), 0), COUNT(*) FROM `{table}`")
+            max_id, row_count = cursor.fetchone()
+            stamp = self.stamps.get(table)
+            if stamp == (max_id, row_count):
+                return True
+
+            if stamp is not None and max_id >= stamp[0] and row_count - stamp[1] == self.count_after(cursor, table, stamp[0]):
+                # Rows were only appended since the last run
+                rows = self.fetch_rows(cursor, table, stamp[0])
+                debug("Slug snapshot: %s new row(s) in %s", len(rows), table)
+            else:
+                self.maps[table] = {}
+                self.db.execute("DELETE FROM slug_id WHERE tbl = ?", (table,))
+                rows = self.fetch_rows(cursor, table, None)
+                debug("Slug snapshot: %s reloaded (%s row(s))", table, len(rows))
+
+            self.maps[table].update(rows)
+            self.db.executemany("INSERT OR REPLACE INTO slug_id (tbl, slug, id) VALUES (?, ?, ?)",
+                                [(table, slug, row_id) for slug, row_id in rows])
+            self.set_stamp(table, max_id, row_count)
+            return True
+
+        except mysql.connector.Error as err:
+            error("Error validating slug snapshot of %s: %s", table, err)
+            return False
+
+        finally:
+            cursor.close()
+
+    def count_after(self, cursor, table: str, after_id: int) -> int:
+        cursor.execute(f"SELECT COUNT(*) FROM `{table}` WHERE id > %s", (after_id,))
+        return cursor.fetchone()[0]
+
+    def fetch_rows(self, cursor, table: str, after_id):
+        if after_id is None:
+            cursor.execute(f"SELECT slug, id FROM `{table}`")
+        else:
+            cursor.execute(f"SELECT slug, id FROM `{table}` WHERE id > %s", (after_id,))
+        return cursor.fetchall()
+
+    def set_stamp(self, table: str, max_id: int, row_count: int):
+        self.stamps[table] = (max_id, row_count)
+        self.db.execute("INSERT OR REPLACE INTO stamp (tbl, max_id, row_count) VALUES (?, ?, ?)", (table, max_id, row_count))
+
+    def lookup(self, table: str, slug: str):
+        """Id of slug, None if the slug is known not to exist, UNKNOWN if the database must be asked"""
+        slugs = self.maps.get(table)
+        if slugs is None:
+            return UNKNOWN
+        return slugs.get(slug)
+
+    def remember(self, table: str, slug: str, row_id):
+        """Record a row found or inserted by the run"""
+        slugs = self.maps.get(table)
+        if slugs is None or row_id is None or slugs.get(slug) == row_id:
+            return
+        is_new = slug not in slugs
+        if self.journal is not None:
+            self.journal.append((table, slug, slugs.get(slug), self.stamps.get(table)))
+        slugs[slug] = row_id
+        self.db.execute("INSERT OR REPLACE INTO slug_id (tbl, slug, id) VALUES (?, ?, ?)", (table, slug, row_id))
+        if is_new:
+            max_id, row_count = self.stamps.get(table, (0, 0))
+            self.set_stamp(table, max(max_id, row_id), row_count + 1)
+        self.pending += 1
+        if self.pending >= 500:
+            self.flush()
+
+    def forget(self, table: str, slug: str):
+        """Drop a row deleted by the run"""
+        slugs = self.maps.get(table)
+        if slugs is None or slugs.get(slug) is None:
+            return
+        if self.journal is not None:
+            self.journal.append((table, slug, slugs[slug], self.stamps.get(table)))
+        del slugs[slug]
+        self.db.execute("DELETE FROM slug_id WHERE tbl = ? AND slug = ?", (table, slug))
+        max_id, row_count = self.stamps.get(table, (0, 0))
+        self.set_stamp(table, max_id, max(row_count - 1, 0))
+        self.pending += 1
+
+    def begin(self):
+        """Start journaling remembered rows, so they can be forgotten if their transaction is rolled back"""
+        self.journal = []
+
+    def end(self):
+        """Stop journaling, the remembered rows are kept"""
+        self.journal = None
+
+    def undo(self):
+        """Forget the rows remembered since begin(), journaling goes on until end()"""
+        if not self.journal:
+            return
+        for table, slug, row_id, stamp in reversed(self.journal):
+            slugs = self.maps.get(table)
+            if slugs is None:
+                continue
+            if row_id is None:
+                slugs.pop(slug, None)
+                self.db.execute("DELETE FROM slug_id WHERE tbl = ? AND slug = ?", (table, slug))
+            else:
+                slugs[slug] = row_id
+                self.db.execute("INSERT OR REPLACE INTO slug_id (tbl, slug, id) VALUES (?, ?, ?)", (table, slug, row_id))
+            if stamp is not None:
+                self.set_stamp(table, *stamp)
+        self.journal = []
+
+    def invalidate(self):
+        """Stop answering from memory, the next run reloads every table"""
+        if self.db is None:
+            return
+        self.maps = {}
+        self.journal = None
+        self.db.execute("DELETE FROM stamp")
+        self.db.commit()
+
+    def flush(self):
+        if self.db is not None and self.pending:
+            self.db.commit()
+            self.pending = 0
+
+    def close(self):
+        if self.db is None:
+            return
+        self.flush()
+        self.db.close()
+        self.db = None
+        self.maps = {}
+
+
+# Shared by every helper of the process
+slug_snapshot = SlugSnapshot()
@@ -0,0 +1 @@
+# src/export/__init__.py
@@ -0,0 +1,328 @@
+"""
+Static export of the catalog.
+
+Streams the cards out of the database, one set and language at a time, with an
+unbuffered cursor (rows are read from the server as they are written out), and
+writes:
+- json/<lang>/<set slug>.json: the set, its bloc and every card denormalized
+  (translation, rarity, illustrator, subtype, Pokémon, elements, variants)
+- parquet/cards/lang=<lang>/serie_id=<id>/part-0.parquet: the same cards as a
+  columnar dataset partitioned by language and set (requires pyarrow)
+
+The export is incremental: a fingerprint of every set and language is computed
+in one aggregate query over every exported column (card rows, translations,
+rarity, illustrator, Pokémon, elements, variants, payload hashes of the crawl,
+set and bloc names, card count of the set) and stored in manifest.json. Only the sets whose fingerprint
+changed are streamed and rewritten, the files of sets that left the database
+are removed. Files are replaced atomically, a reader never sees a partial one.
+A change of the Parquet columns (PARQUET_SCHEMA_VERSION) rewrites every set.
+
+Usage:
+    python main.py export [DIR] [--full] [--format json parquet]
+"""
+import json
+import os
+import shutil
+import time
+
+import mysql.connector
+from ..database.card import ensure_card_hash_table
+from ..scrapper.scrapper import language_ids
+from ..utils.logger import debug, info, error, warning
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pyarrow_parquet
+except ImportError:
+    pyarrow = None
+
+FORMATS = ("json", "parquet")
+MANIFEST_NAME = "manifest.json"
+# Bumped when the columns of the Parquet rows change, a dataset of another version is rewritten in full
+PARQUET_SCHEMA_VERSION = 2
+# Rows read from the server per round trip
+FETCH_SIZE = 500
+LANGUAGE_CODES = {language_id: code for code, language_id in language_ids.items()}
+
+# Names of the elements of a Pokémon card and of the variants of a card, in the language of the row
+ELEMENTS_SUBQUERY = """(SELECT GROUP_CONCAT(et.name ORDER BY et.name SEPARATOR '|')
+            FROM pokemon_card_elements pce
+            JOIN element_translation et ON et.element_id = pce.element_id AND et.translation_language_id = ct.translation_language_id
+            WHERE pce.pokemon_card_id = pc.id)"""
+VARIANTS_SUBQUERY = """(SELECT GROUP_CONCAT(v.name ORDER BY v.name SEPARATOR '|')
+            FROM card_variants cv JOIN variant v ON v.id = cv.variant_id
+            WHERE cv.card_id = c.id)"""
+# Rows of a card written to the export, after card, card_translation and serie
+CARD_JOINS = """
+    LEFT JOIN serie_translation st ON st.serie_id = s.id AND st.translation_language_id = ct.translation_language_id
+    LEFT JOIN bloc_translation bt ON bt.bloc_id = s.bloc_id AND bt.translation_language_id = ct.translation_language_id
+    LEFT JOIN rarity_translation rt ON rt.rarity_id = c.rarity_id AND rt.translation_language_id = ct.translation_language_id
+    LEFT JOIN illustrator i ON i.id = c.illustrator_id
+    LEFT JOIN pokemon_card pc ON pc.card_id = c.id
+    LEFT JOIN pokemon_translation pt ON pt.pokemon_id = pc.pokemon_id AND pt.translation_language_id = ct.translation_language_id
+    LEFT JOIN energy_card ec ON ec.card_id = c.id
+    LEFT JOIN element_translation ect ON ect.element_id = ec.element_id AND ect.translation_language_id = ct.translation_language_id
+    LEFT JOIN trainer_card tc ON tc.card_id = c.id
+    LEFT JOIN card_content_hash h ON h.card_id = c.id
+"""
+
+# Checksum of every exported column of the cards of a set in a language
+FINGERPRINT_QUERY = f"""
+    SELECT c.serie_id, ct.translation_language_id, s.slug, COUNT(*),
+        BIT_XOR(CRC32(CONCAT_WS('|', c.id, c.position, c.category_id, c.rarity_id, c.illustrator_id,
+                                ct.slug, ct.seo_path, ct.name, ct.description, h.content_hash,
+                                rt.name, i.name, pc.pokemon_id, pt.name, pc.hp, pc.level, ect.name, tc.id IS NOT NULL,
+                                {ELEMENTS_SUBQUERY},
+                                {VARIANTS_SUBQUERY}))),
+        MAX(st.name), MAX(bt.name), MAX(s.card_number)
+    FROM card c
+    JOIN card_translation ct ON ct.card_id = c.id
+    JOIN serie s ON s.id = c.serie_id
+    {CARD_JOINS}
+    GROUP BY c.serie_id, ct.translation_language_id, s.slug
+"""
+
+# One row per card of a set in a language, ordered by position
+CARDS_QUERY = f"""
+    SELECT
+        c.id, c.slug, c.position, c.category_id,
+        ct.slug, ct.seo_path, ct.name, ct.description,
+        s.id, s.slug, s.card_number, st.name,
+        b.slug, bt.name,
+        rt.name, i.name,
+        pc.pokemon_id, pt.name, pc.hp, pc.level,
+        {ELEMENTS_SUBQUERY},
+        ect.name,
+        tc.id IS NOT NULL,
+        {VARIANTS_SUBQUERY},
+        h.content_hash,
+        ra.slug
+    FROM card c
+    JOIN card_translation ct ON ct.card_id = c.id AND ct.translation_language_id = %s
+    JOIN serie s ON s.id = c.serie_id
+    JOIN bloc b ON b.id = s.bloc_id
+    {CARD_JOINS}
+    LEFT JOIN rarity ra ON ra.id = c.rarity_id
+    WHERE c.serie_id = %s
+    ORDER BY c.position, c.id
+"""
+
+
+def split_names(value):
+    return value.split("|") if value else []
+
+def card_kind(row) -> str:
+    if row[16] is not None:
+        return "pokemon"
+    if row[21] is not None:
+        return "energy"
+    if row[22]:
+        return "trainer"
+    return None
+
+def card_record(row) -> dict:
+    """Denormalized card of a CARDS_QUERY row"""
+    return {
+        "id": row[0],
+        "slug": row[1],
+        "position": row[2],
+        "category_id": row[3],
+        "kind": card_kind(row),
+        "translation_slug": row[4],
+        "seo_path": row[5],
+        "name": row[6],
+        "description": row[7],
+        "rarity": row[14],
+        "illustrator": row[15],
+        "dex_id": row[16],
+        "pokemon": row[17],
+        "hp": row[18],
+        "level": row[19],
+        "elements": split_names(row[20]),
+        "energy_element": row[21],
+        "variants": split_names(row[23]),
+        "content_hash": row[24],
+    }
+
+def set_record(row, lang: str) -> dict:
+    return {
+        "id": row[8],
+        "slug": row[9],
+        "card_count": row[10],
+        "name": row[11],
+        "bloc": {"slug": row[12], "name": row[13]},
+        "language": lang,
+    }
+
+
+def get_set_fingerprints(conn) -> dict:
+    """Fingerprint of every (set, language) of the database, keyed by "<lang>/<set slug>" """
+    # Cards never crawled with hashing have no row there, the LEFT JOIN needs the table
+    ensure_card_hash_table(conn)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(FINGERPRINT_QUERY)
+        fingerprints = {}
+        for serie_id, language_id, serie_slug, count, checksum, serie_name, bloc_name, card_number in cursor.fetchall():
+            lang = LANGUAGE_CODES.get(language_id)
+            if lang is None:
+                continue
+            fingerprints[f"{lang}/{serie_slug}"] = {
+                "serie_id": serie_id,
+                "language_id": language_id,
+                "fingerprint": f"{count}:{checksum}:{serie_name}:{bloc_name}:{card_number}",
+                "cards": count,
+            }
+        return fingerprints
+
+    except mysql.connector.Error as err:
+        error("Error computing set fingerprints: %s", err)
+        return None
+
+    finally:
+        cursor.close()
+
+def stream_set_cards(conn, serie_id: int, language_id: int):
+    """Yield the CARDS_QUERY rows of a set, FETCH_SIZE rows per round trip"""
+    # Unbuffered: rows stay on the server until fetched, the cursor is drained before the next query
+    cursor = conn.cursor(buffered=False)
+    try:
+        cursor.execute(CARDS_QUERY, (language_id, serie_id))
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+
+def json_path(output_dir: str, key: str) -> str:
+    return os.path.join(output_dir, "json", *key.split("/")) + ".json"
+
+def parquet_dir(output_dir: str, lang: str, serie_id: int) -> str:
+    return os.path.join(output_dir, "parquet", "cards", f"lang={lang}", f"serie_id={serie_id}")
+
+def export_set(conn, output_dir: str, key: str, entry: dict, formats) -> int:
+    """Stream one set in one language to its files, returns the number of cards written"""
+    lang = LANGUAGE_CODES[entry["language_id"]]
+    path = json_path(output_dir, key)
+    tmp_path = f"{path}.tmp"
+    write_json = "json" in formats
+    write_parquet = "parquet" in formats and pyarrow is not None
+    parquet_rows = []
+    count = 0
+    json_file = None
+    try:
+        if write_json:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            json_file = open(tmp_path, "w", encoding="utf-8")
+        for row in stream_set_cards(conn, entry["serie_id"], entry["language_id"]):
+            card = card_record(row)
+            if count == 0 and json_file:
+                json_file.write('{"set": ' + json.dumps(set_record(row, lang), ensure_ascii=False) + ', "cards": [\n')
+            if json_file:
+                json_file.write(("" if count == 0 else ",\n") + json.dumps(card, ensure_ascii=False))
+            if write_parquet:
+                # The rarity slug is the label of the language-neutral statistics
+                card = dict(card, lang=lang, set_slug=row[9], set_name=row[11], set_card_count=row[10],
+                            bloc_slug=row[12], bloc_name=row[13], rarity_slug=row[25])
+                parquet_rows.append(card)
+            count += 1
+        if json_file:
+            json_file.write("\n]}\n" if count else '{"set": null, "cards": []}\n')
+            json_file.close()
+            json_file = None
+            os.replace(tmp_path, path)
+    finally:
+        if json_file:
+            json_file.close()
+            os.remove(tmp_path)
+
+    if write_parquet and parquet_rows:
+        directory = parquet_dir(output_dir, lang, entry["serie_id"])
+        os.makedirs(directory, exist_ok=True)
+        target = os.path.join(directory, "part-0.parquet")
+        pyarrow_parquet.write_table(pyarrow.Table.from_pylist(parquet_rows), f"{target}.tmp")
+        os.replace(f"{target}.tmp", target)
+    return count
+
+def remove_set(output_dir: str, key: str, entry: dict):
+    """Remove the files of a set that is no longer in the database"""
+    path = json_path(output_dir, key)
+    if os.path.exists(path):
+        os.remove(path)
+    lang = key.split("/", 1)[0]
+    directory = parquet_dir(output_dir, lang, entry["serie_id"])
+    if os.path.isdir(directory):
+        shutil.rmtree(directory)
+
+
+def load_manifest(output_dir: str) -> dict:
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {"formats": [], "sets": {}}
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError) as err:
+        warning("Unreadable export manifest %s, exporting everything: %s", path, err)
+        return {"formats": [], "sets": {}}
+
+def save_manifest(output_dir: str, manifest: dict):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def export_catalog(conn, output_dir: str, formats=FORMATS, full: bool = False) -> dict:
+    """
+    Export the sets whose data changed since the last export (every set with full=True).
+    Returns the statistics of the run, None if the database could not be read.
+    """
+    formats = tuple(formats)
+    if "parquet" in formats and pyarrow is None:
+        warning("pyarrow is not installed, the Parquet dataset is skipped (python3 -m pip install pyarrow)")
+        formats = tuple(name for name in formats if name != "parquet")
+    os.makedirs(output_dir, exist_ok=True)
+    started = time.monotonic()
+
+    fingerprints = get_set_fingerprints(conn)
+    if fingerprints is None:
+        return None
+    manifest = load_manifest(output_dir)
+    previous = manifest.get("sets", {})
+    # A format that was not exported last time needs every set, so does a Parquet dataset of older columns
+    full = full or not set(formats) <= set(manifest.get("formats", []))
+    if "parquet" in formats and manifest.get("parquet_schema") != PARQUET_SCHEMA_VERSION:
+        full = True
+
+    stats = {"sets": len(fingerprints), "exported": 0, "unchanged": 0, "removed": 0, "cards": 0}
+    exported_sets = {}
+    for key, entry in sorted(fingerprints.items()):
+        if not full and previous.get(key, {}).get("fingerprint") == entry["fingerprint"]:
+            exported_sets[key] = previous[key]
+            stats["unchanged"] += 1
+            continue
+        try:
+            stats["cards"] += export_set(conn, output_dir, key, entry, formats)
+        except (mysql.connector.Error, OSError) as err:
+            # Left out of the manifest, exported again by the next run
+            error("Error exporting set %s: %s", key, err)
+            continue
+        exported_sets[key] = entry
+        stats["exported"] += 1
+        debug("Exported set %s (%s card(s))", key, entry["cards"])
+
+    for key, entry in previous.items():
+        if key not in fingerprints:
+            remove_set(output_dir, key, entry)
+            stats["removed"] += 1
+
+    save_manifest(output_dir, {"formats": list(formats), "exported_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                               "parquet_schema": PARQUET_SCHEMA_VERSION, "sets": exported_sets})
+    stats["seconds"] = round(time.monotonic() - started, 2)
+    info("Export: %s set(s) exported (%s card(s)), %s unchanged, %s removed in %ss to %s",
+         stats["exported"], stats["cards"], stats["unchanged"], stats["removed"], stats["seconds"], output_dir)
+    return stats
@@ -0,0 +1 @@
+# src/images/__init__.py
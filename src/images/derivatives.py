@@ -0,0 +1,180 @@
+"""
+Thumbnail and WebP/AVIF derivatives of the stored card images.
+
+Originals recorded in the image table by the downloader are converted in a
+process pool sized to the cores. Derivatives live next to the originals under
+derivatives/<source sha256>/<name>.<ext> and are registered in the image table
+with their mime type. An original whose derivatives are all recorded and on disk
+is skipped, so the generator can run after every crawl and only handles the new
+images; a file on disk that was never recorded is only registered.
+
+Requires Pillow (python3 -m pip install Pillow). AVIF output is produced when
+Pillow was built with AVIF support or pillow-avif-plugin is installed.
+
+Usage:
+    python3 -m src.images.derivatives <image_dir>
+"""
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ..database.image import Image, insert_images, get_existing_image_paths
+from ..utils.logger import debug, info, error
+
+try:
+    from PIL import Image as PILImage
+    try:
+        import pillow_avif  # noqa: F401 - registers the AVIF codec on older Pillow
+    except ImportError:
+        pass
+except ImportError:
+    PILImage = None
+
+DERIVATIVES_DIR = "derivatives"
+
+# name, bounding box (None keeps the original size), format, extension, mime type, save options
+DERIVATIVES = (
+    ("thumbnail", (245, 342), "WEBP", ".webp", "image/webp", {"quality": 80, "method": 6}),
+    ("full", None, "WEBP", ".webp", "image/webp", {"quality": 85, "method": 6}),
+    ("full", None, "AVIF", ".avif", "image/avif", {"quality": 60}),
+)
+
+def avif_supported() -> bool:
+    return PILImage is not None and ".avif" in PILImage.registered_extensions()
+
+def get_derivative_specs():
+    return [spec for spec in DERIVATIVES if spec[2] != "AVIF" or avif_supported()]
+
+def derivative_path(source_path: str, name: str, extension: str) -> str:
+    """Relative path of a derivative, keyed by the content hash of its original"""
+    source_hash = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(DERIVATIVES_DIR, source_hash, f"{name}{extension}")
+
+def missing_derivatives(storage_dir: str, source_path: str, specs, recorded: set) -> tuple:
+    """Split the derivatives of an original that are not done into (specs to generate, unrecorded images already on disk)"""
+    to_generate, to_record = [], []
+    for spec in specs:
+        relative_path = derivative_path(source_path, spec[0], spec[3])
+        if not os.path.exists(os.path.join(storage_dir, relative_path)):
+            to_generate.append(spec)
+        elif relative_path not in recorded:
+            to_record.append(Image(relative_path, spec[4]))
+    return to_generate, to_record
+
+def generate_derivatives(storage_dir: str, source_path: str, specs) -> list:
+    """Worker: create the given derivatives of one original, returns [(relative path, mime type)]"""
+    created = []
+    with PILImage.open(os.path.join(storage_dir, source_path)) as original:
+        original.load()
+        for name, size, image_format, extension, mime_type, options in specs:
+            relative_path = derivative_path(source_path, name, extension)
+            target = os.path.join(storage_dir, relative_path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+
+            derivative = original.copy()
+            if size:
+                derivative.thumbnail(size, PILImage.LANCZOS)
+
+            # Write then rename so an interrupted run never leaves a truncated file behind
+            tmp_target = f"{target}.tmp"
+            derivative.save(tmp_target, format=image_format, **options)
+            os.replace(tmp_target, target)
+            created.append((relative_path, mime_type))
+    return created
+
+def get_original_images(conn) -> list:
+    """Paths of the originals recorded by the downloader (derivatives excluded)"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT path FROM image WHERE path NOT LIKE %s",
+            (f"{DERIVATIVES_DIR}/%",)
+        )
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+def get_recorded_derivatives(conn) -> set:
+    """Paths of the derivatives recorded in the image table"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT path FROM image WHERE path LIKE %s",
+            (f"{DERIVATIVES_DIR}/%",)
+        )
+        return {row[0] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+def run_derivatives(conn, storage_dir: str, max_workers: int = None, batch_size: int = 200):
+    """Generate the missing derivatives of every original image, returns the run statistics"""
+    if PILImage is None:
+        error("Pillow is required to generate image derivatives: python3 -m pip install Pillow")
+        return None
+
+    specs = get_derivative_specs()
+    started = time.monotonic()
+    originals = get_original_images(conn)
+    recorded = get_recorded_derivatives(conn)
+    todo = []
+    pending_rows = []
+    for source_path in originals:
+        missing, unrecorded = missing_derivatives(storage_dir, source_path, specs, recorded)
+        if missing:
+            todo.append((source_path, missing))
+        pending_rows.extend(unrecorded)
+    info("Derivatives: %s original(s), %s to process, %s to record", len(originals), len(todo), len(pending_rows))
+
+    stats = {"originals": len(originals), "processed": 0, "failed": 0, "recorded": 0}
+
+    def record(force: bool = False):
+        nonlocal pending_rows
+        if not pending_rows or (not force and len(pending_rows) < batch_size):
+            return
+        existing = get_existing_image_paths(conn, [image.path for image in pending_rows])
+        new_images = [image for image in pending_rows if image.path not in existing]
+        stats["recorded"] += len(insert_images(conn, new_images))
+        pending_rows = []
+
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        futures = [(source_path, executor.submit(generate_derivatives, storage_dir, source_path, missing))
+                   for source_path, missing in todo]
+        for source_path, future in futures:
+            try:
+                created = future.result()
+            except Exception as err:
+                error("Failed to generate derivatives of %s: %s", source_path, err)
+                stats["failed"] += 1
+                continue
+            stats["processed"] += 1
+            debug("Generated %s derivative(s) of %s", len(created), source_path)
+            pending_rows.extend(Image(path, mime_type) for path, mime_type in created)
+            record()
+    record(force=True)
+
+    elapsed = time.monotonic() - started
+    stats["seconds"] = round(elapsed, 2)
+    stats["images_per_second"] = round(stats["processed"] / elapsed, 2) if elapsed > 0 else 0
+    print(f"Derivatives: {stats['processed']} image(s) in {stats['seconds']}s ({stats['images_per_second']} images/sec), "
+          f"{stats['failed']} failed, {stats['recorded']} row(s) recorded")
+    return stats
+
+def main():
+    from ..database.database import create_connection
+
+    storage_dir = sys.argv[1] if len(sys.argv) > 1 else os.getenv('IMAGE_DIR')
+    if not storage_dir:
+        print("Usage: python3 -m src.images.derivatives <image_dir>")
+        return 1
+    connection = create_connection()
+    if connection is None:
+        return 1
+    try:
+        stats = run_derivatives(connection, storage_dir)
+    finally:
+        connection.close()
+    return 0 if stats is not None else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
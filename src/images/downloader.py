@@ -0,0 +1,244 @@
+"""
+Card image ingestion.
+
+Images are downloaded by a bounded pool of threads while the crawl goes on and
+stored content-addressed by SHA-256 (<storage_dir>/ab/cd/abcd....png), so the same
+picture shared by several languages or reprints is only stored and recorded once.
+
+Database rows are written from the crawl thread, in batches: the image row
+(insert_images) and the card -> image link (card_image table). Once a batch is
+committed its downloads are appended to a manifest (one JSON line per URL) which
+makes the pipeline resumable: URLs already in the manifest are never fetched
+again. A batch that could not be written stays pending and is retried.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue, Empty
+from typing import NamedTuple
+from urllib.parse import urlparse
+
+import requests
+
+from ..database.image import Image, insert_images, get_image_uuids, ensure_card_image_table, get_linked_card_slugs, link_card_images
+from ..utils.logger import debug, info, error
+
+MIME_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".webp": "image/webp",
+    ".avif": "image/avif"
+}
+
+def card_image_url(card_data, quality: str = "high", extension: str = "png"):
+    """Build the full image URL of a tcgdex card payload, None if the card has no image"""
+    if not card_data.get("image"):
+        return None
+    return f"{card_data['image']}/{quality}.{extension}"
+
+class Download(NamedTuple):
+    url: str
+    card_slug: str
+    sha256: str
+    path: str
+    mime_type: str
+
+def content_path(sha256: str, extension: str) -> str:
+    """Relative storage path of a content hash, sharded on the first two bytes"""
+    return os.path.join(sha256[:2], sha256[2:4], f"{sha256}{extension}")
+
+
+class TokenBucket:
+    """Thread-safe byte rate limiter shared by all downloads of a host"""
+
+    def __init__(self, rate: int):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, amount: int):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount or self.tokens >= self.rate:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class ImageDownloader:
+    """
+    Download card images alongside the crawl.
+
+    submit() only blocks when max_pending downloads are already queued, results are
+    recorded in the image and card_image tables every batch_size new files and on close().
+    """
+
+    def __init__(self, connection, storage_dir: str, manifest_path: str, max_workers: int = 4,
+                 bandwidth_per_host: int = None, batch_size: int = 50, max_pending: int = None):
+        self.connection = connection
+        self.storage_dir = storage_dir
+        self.manifest_path = manifest_path
+        self.bandwidth_per_host = bandwidth_per_host
+        self.batch_size = batch_size
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image")
+        self.slots = threading.BoundedSemaphore(max_pending or max_workers * 4)
+        self.session = requests.Session()
+        self.buckets = {}
+        self.buckets_lock = threading.Lock()
+        self.manifest_lock = threading.Lock()
+        self.results = Queue()
+        self.pending_rows = []
+        self.stats = {"submitted": 0, "skipped": 0, "downloaded": 0, "deduplicated": 0, "failed": 0, "recorded": 0, "linked": 0}
+        self.stats_lock = threading.Lock()
+
+        os.makedirs(storage_dir, exist_ok=True)
+        os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+        ensure_card_image_table(connection)
+        self.done = self.load_manifest()
+        # Manifest lines of cards that are not linked (older runs, cards rolled back since) are fetched and linked again
+        linked = get_linked_card_slugs(connection)
+        if linked is not None:
+            self.done = {url: entry for url, entry in self.done.items() if entry.get("card") in linked}
+        self.submitted_urls = set(self.done)
+
+    def load_manifest(self) -> dict:
+        """Load url -> manifest entry of the downloads completed by previous runs"""
+        done = {}
+        if not os.path.exists(self.manifest_path):
+            return done
+        with open(self.manifest_path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Truncated last line of an interrupted run
+                    continue
+                done[entry["url"]] = entry
+        debug("Loaded %s downloaded images from %s", len(done), self.manifest_path)
+        return done
+
+    def count(self, key: str, amount: int = 1):
+        with self.stats_lock:
+            self.stats[key] += amount
+
+    def get_bucket(self, url: str):
+        if not self.bandwidth_per_host:
+            return None
+        host = urlparse(url).netloc
+        with self.buckets_lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.bandwidth_per_host)
+            return self.buckets[host]
+
+    def submit(self, card_slug: str, url: str):
+        """Queue the image of a card, skipping URLs already downloaded or queued"""
+        self.flush_results()
+        if url is None or url in self.submitted_urls:
+            self.count("skipped")
+            return
+        self.submitted_urls.add(url)
+        self.count("submitted")
+        self.slots.acquire()
+        future = self.executor.submit(self.download, card_slug, url)
+        future.add_done_callback(lambda _: self.slots.release())
+
+    def download(self, card_slug: str, url: str):
+        """Worker: stream the image to a temporary file while hashing it, then move it in place"""
+        bucket = self.get_bucket(url)
+        extension = os.path.splitext(urlparse(url).path)[1] or ".png"
+        tmp_dir = os.path.join(self.storage_dir, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        tmp_path = None
+        try:
+            with self.session.get(url, stream=True, timeout=30) as response:
+                if response.status_code != 200:
+                    error("Failed to download image %s (HTTP %s)", url, response.status_code)
+                    self.count("failed")
+                    return
+                sha256 = hashlib.sha256()
+                with tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False) as tmp_file:
+                    tmp_path = tmp_file.name
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        if bucket:
+                            bucket.consume(len(chunk))
+                        sha256.update(chunk)
+                        tmp_file.write(chunk)
+                mime_type = response.headers.get("Content-Type", "").split(";")[0] or MIME_TYPES.get(extension, "application/octet-stream")
+
+            digest = sha256.hexdigest()
+            relative_path = content_path(digest, extension)
+            final_path = os.path.join(self.storage_dir, relative_path)
+            if os.path.exists(final_path):
+                os.remove(tmp_path)
+                self.count("deduplicated")
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(tmp_path, final_path)
+                self.count("downloaded")
+            tmp_path = None
+            # Written to the manifest once recorded in the database
+            self.results.put(Download(url, card_slug, digest, relative_path, mime_type))
+
+        except (requests.RequestException, OSError) as err:
+            error("Failed to download image %s: %s", url, err)
+            self.count("failed")
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def flush_results(self, force: bool = False):
+        """Record the downloaded images and their cards in the database, from the calling (crawl) thread"""
+        while True:
+            try:
+                download = self.results.get_nowait()
+            except Empty:
+                break
+            self.pending_rows.append(download)
+
+        if not self.pending_rows or (not force and len(self.pending_rows) < self.batch_size):
+            return
+
+        # Content-addressed paths: an image already recorded by another card is reused
+        unique = {download.path: Image(download.path, download.mime_type) for download in self.pending_rows}
+        image_uuids = get_image_uuids(self.connection, list(unique))
+        if image_uuids is None:
+            return
+        new_images = [image for path, image in unique.items() if path not in image_uuids]
+        ids = insert_images(self.connection, new_images)
+        if len(ids) != len(new_images):
+            error("Could not record %s image(s), they stay pending", len(new_images))
+            return
+        self.count("recorded", len(ids))
+        image_uuids.update(zip((image.path for image in new_images), ids))
+
+        linked = link_card_images(self.connection, [(download.card_slug, image_uuids[download.path]) for download in self.pending_rows])
+        if linked is None:
+            return
+        self.count("linked", len(linked))
+
+        # A card rolled back has no row to link: left out of the manifest, its image is fetched again next run
+        with self.manifest_lock:
+            with open(self.manifest_path, "a", encoding="utf-8") as manifest:
+                for download in self.pending_rows:
+                    if download.card_slug not in linked:
+                        continue
+                    manifest.write(json.dumps({"url": download.url, "card": download.card_slug, "sha256": download.sha256,
+                                               "path": download.path}) + "\n")
+        self.pending_rows = []
+
+    def close(self):
+        """Wait for the queued downloads and record the remaining rows"""
+        self.executor.shutdown(wait=True)
+        self.flush_results(force=True)
+        self.session.close()
+        info("Images: %s", self.stats)
+        return self.stats
@@ -0,0 +1,72 @@
+"""
+On-disk cache of raw tcgdex responses.
+
+Disabled by default. When configured (RESPONSE_CACHE_DIR, or by the planner),
+the HTTP client serves responses younger than the TTL from disk and stores every
+successful response, keyed by the SHA-1 of the URL.
+"""
+import hashlib
+import os
+import time
+
+from ..utils.logger import debug, error
+
+
+class ResponseCache:
+    def __init__(self):
+        self.directory = None
+        self.ttl = None
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, directory: str, ttl: int = None):
+        """Enable the cache in directory, entries older than ttl seconds are ignored (None: never expire)"""
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.ttl = ttl
+        debug("Response cache enabled in %s (ttl: %s)", directory, ttl)
+
+    def disable(self):
+        self.directory = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    def path(self, url: str) -> str:
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, url: str):
+        """Raw bytes of a cached response, None on miss or when disabled"""
+        if not self.enabled:
+            return None
+        path = self.path(url)
+        try:
+            if self.ttl is not None and time.time() - os.path.getmtime(path) > self.ttl:
+                self.misses += 1
+                return None
+            with open(path, "rb") as file:
+                raw = file.read()
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return raw
+
+    def put(self, url: str, raw: bytes):
+        if not self.enabled:
+            return
+        path = self.path(url)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as file:
+                file.write(raw)
+            os.replace(tmp_path, path)
+        except OSError as err:
+            error("Could not cache response of %s: %s", url, err)
+
+
+# Shared by every fetch of the process
+response_cache = ResponseCache()
@@ -0,0 +1,276 @@
+"""
+HTTP client of the tcgdex API.
+
+Every GET of the scraper goes through one shared client that:
+- serves URLs already fetched during the run from an in-memory memo (LRU)
+- serves the on-disk response cache when it is enabled
+- coalesces concurrent requests for the same URL into a single in-flight call
+  (single-flight), the other callers wait for its result
+- retries timeouts, connection errors, 429 and 5xx responses with exponential
+  backoff and full jitter, honouring Retry-After
+- opens a per-host circuit breaker after consecutive failures: every worker
+  waits for the cooldown, then a single probe request decides whether to close it
+- counts network requests, retries, memo and cache hits and coalesced requests,
+  and the network requests of each thread, so a caller can pace only the calls
+  that reached the API (see network_requests())
+
+The GraphQL queries go through post(), which shares the retries, the circuit
+breakers and the counters of the GETs; a POST is neither memoized nor
+coalesced, its caller caches the validated response under its own key.
+
+In offline mode the disk cache is the only source: a run is replayed from the
+responses recorded by a previous one, without any network request.
+
+The client returns raw response bytes, each caller decodes its own copy.
+"""
+import random
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+
+from ..utils.logger import debug, info, error, warning
+from .cache import response_cache
+
+# Responses kept in memory, enough for every series and set detail of a language
+MEMO_SIZE = 1024
+# Statuses worth retrying, any other non-200 is final (e.g. 404 of a missing card)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RetryPolicy:
+    __slots__ = ("retries", "base_delay", "max_delay")
+
+    def __init__(self, retries: int = 4, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: float = None) -> float:
+        """Seconds to wait before retry number attempt (0-based): full jitter, at least Retry-After"""
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            return min(max(backoff, retry_after), self.max_delay)
+        return backoff
+
+def parse_retry_after(value):
+    """Seconds of a Retry-After header (delay or HTTP date), None if absent or invalid"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Per-host breaker: opens after threshold consecutive failures, then callers wait
+    for the cooldown and a single probe request is let through (half-open).
+    """
+    def __init__(self, threshold: int = 5, cooldown: float = 60.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = 0.0
+        self.probing = False
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        """Block while the circuit is open or another caller is probing it"""
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                if self.open_until <= now and not self.probing:
+                    if self.open_until:
+                        # Half-open: this caller is the probe
+                        self.probing = True
+                    return
+                wait = self.open_until - now if self.open_until > now else None
+                self.condition.wait(wait)
+
+    def success(self):
+        with self.condition:
+            if self.open_until:
+                info("Circuit closed, the API answers again")
+            self.failures = 0
+            self.open_until = 0.0
+            self.probing = False
+            self.condition.notify_all()
+
+    def failure(self, host: str):
+        with self.condition:
+            self.failures += 1
+            if self.probing or self.failures >= self.threshold:
+                warning("Circuit open for %s after %s failure(s), pausing requests for %ss", host, self.failures, self.cooldown)
+                self.open_until = time.monotonic() + self.cooldown
+            self.probing = False
+            self.condition.notify_all()
+
+
+class InFlight:
+    """A request being made, the callers asking for the same URL wait on it"""
+    __slots__ = ("done", "raw")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.raw = None
+
+
+class HttpClient:
+    def __init__(self, memo_size: int = MEMO_SIZE, timeout: int = 30):
+        self.session = requests.Session()
+        self.timeout = timeout
+        self.memo_size = memo_size
+        self.memo = OrderedDict()
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        # Per thread network request counter
+        self.local = threading.local()
+        self.retry_policy = RetryPolicy()
+        self.breaker_threshold = 5
+        self.breaker_cooldown = 60.0
+        self.breakers = {}
+        self.offline = False
+        self.metrics = {"requests": 0, "retries": 0, "failures": 0, "circuit_opens": 0,
+                        "memo_hits": 0, "cache_hits": 0, "coalesced": 0, "offline_misses": 0}
+
+    def configure(self, retries: int = 4, base_delay: float = 1.0, max_delay: float = 60.0,
+                  breaker_threshold: int = 5, breaker_cooldown: float = 60.0):
+        self.retry_policy = RetryPolicy(retries, base_delay, max_delay)
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.breakers = {}
+
+    def get_breaker(self, host: str) -> CircuitBreaker:
+        with self.lock:
+            breaker = self.breakers.get(host)
+            if breaker is None:
+                breaker = self.breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+            return breaker
+
+    def count(self, name: str, amount: int = 1):
+        with self.lock:
+            self.metrics[name] += amount
+
+    def network_requests(self) -> int:
+        """Network requests sent by the calling thread, memo, cache and offline hits excluded"""
+        return getattr(self.local, "requests", 0)
+
+    def get(self, url: str, fresh: bool = False):
+        """Raw body of a successful GET, None on failure. fresh=True skips the memo and the cache."""
+        with self.lock:
+            if not fresh and url in self.memo:
+                self.memo.move_to_end(url)
+                self.metrics["memo_hits"] += 1
+                return self.memo[url]
+            flight = self.in_flight.get(url)
+            leader = flight is None
+            if leader:
+                flight = self.in_flight[url] = InFlight()
+            else:
+                self.metrics["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            return flight.raw
+
+        try:
+            raw = None if fresh else response_cache.get(url)
+            if raw is not None:
+                self.count("cache_hits")
+            elif self.offline:
+                self.count("offline_misses")
+                debug("Offline: %s is not in the response cache", url)
+            else:
+                raw = self.request(url)
+                if raw is not None:
+                    response_cache.put(url, raw)
+            flight.raw = raw
+            if raw is not None:
+                self.remember(url, raw)
+            return raw
+        finally:
+            with self.lock:
+                del self.in_flight[url]
+            flight.done.set()
+
+    def post(self, url: str, body: dict, params: dict = None, timeout: int = None):
+        """Raw body of a successful JSON POST, None on failure or in offline mode"""
+        if self.offline:
+            self.count("offline_misses")
+            debug("Offline: no POST to %s", url)
+            return None
+        return self.request(url, body, params, timeout)
+
+    def request(self, url: str, body: dict = None, params: dict = None, timeout: int = None):
+        """GET (POST of body when given) with retries, None once they are exhausted or on a final status"""
+        host = urlparse(url).netloc
+        breaker = self.get_breaker(host)
+        policy = self.retry_policy
+        for attempt in range(policy.retries + 1):
+            breaker.acquire()
+            self.count("requests")
+            self.local.requests = self.network_requests() + 1
+            retry_after = None
+            try:
+                if body is None:
+                    response = self.session.get(url, params=params, timeout=timeout or self.timeout)
+                else:
+                    response = self.session.post(url, params=params, json=body, timeout=timeout or self.timeout)
+            except requests.RequestException as err:
+                problem = str(err)
+            else:
+                if response.status_code == 200:
+                    breaker.success()
+                    return response.content
+                if response.status_code not in RETRY_STATUSES:
+                    # The API answered, the resource is just not there
+                    breaker.success()
+                    self.count("failures")
+                    debug("HTTP %s from %s", response.status_code, url)
+                    return None
+                problem = f"HTTP {response.status_code}"
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+
+            was_open = breaker.open_until
+            breaker.failure(host)
+            if breaker.open_until and breaker.open_until != was_open:
+                self.count("circuit_opens")
+            if attempt == policy.retries:
+                break
+            delay = policy.delay(attempt, retry_after)
+            self.count("retries")
+            debug("%s from %s, retry %s/%s in %.1fs", problem, url, attempt + 1, policy.retries, delay)
+            time.sleep(delay)
+
+        self.count("failures")
+        error("Request to %s failed after %s attempt(s): %s", url, policy.retries + 1, problem)
+        return None
+
+    def remember(self, url: str, raw: bytes):
+        with self.lock:
+            self.memo[url] = raw
+            self.memo.move_to_end(url)
+            while len(self.memo) > self.memo_size:
+                self.memo.popitem(last=False)
+
+    def forget(self, url: str):
+        """Drop an URL from the memo, e.g. when its body turned out to be invalid"""
+        with self.lock:
+            self.memo.pop(url, None)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return dict(self.metrics)
+
+
+# Shared by every fetch of the process
+http_client = HttpClient()
@@ -0,0 +1,201 @@
+"""
+Decoding of tcgdex responses.
+
+Raw response bytes are decoded with the fastest JSON library installed
+(orjson, then msgspec, then the standard json module) and validated against a
+declared schema in the same pass: missing or mistyped optional fields get their
+default, missing required fields raise SchemaError, except in the items of a
+list, which are dropped (and logged) so one bad card does not reject its set.
+The number of dropped items is recorded on their parent object (see dropped()),
+so the caller can tell a partly decoded set from a complete one.
+The scraper can then index into the payload without KeyError or TypeError in
+the middle of a crawl.
+"""
+import copy
+import json
+
+from ..utils.logger import debug, error
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def get_backend() -> str:
+    if orjson is not None:
+        return "orjson"
+    if msgspec is not None:
+        return "msgspec"
+    return "json"
+
+if orjson is not None:
+    loads = orjson.loads
+elif msgspec is not None:
+    loads = msgspec.json.decode
+else:
+    loads = json.loads
+
+
+class SchemaError(ValueError):
+    """Raised when a payload lacks a required field"""
+
+# Everything decode() can raise on a bad payload
+DECODE_ERRORS = (ValueError, msgspec.DecodeError) if msgspec is not None else (ValueError,)
+
+
+# Key of the parent object holding the number of dropped items of each list field
+DROPPED_KEY = "_dropped"
+
+
+class Field:
+    """Declaration of a payload field: accepted types, default value and whether it is required"""
+    __slots__ = ("types", "default", "required", "schema")
+
+    def __init__(self, types, default=None, required: bool = False, schema: dict = None):
+        self.types = types
+        self.default = default
+        self.required = required
+        # Nested schema applied to a dict value, or to each item of a list value
+        self.schema = schema
+
+
+CARD_COUNT_SCHEMA = {
+    "total": Field(int, 0),
+    "official": Field(int, 0),
+}
+
+BRIEF_SCHEMA = {
+    "id": Field(str, required=True),
+    "name": Field(str, ""),
+}
+
+SET_BRIEF_SCHEMA = {
+    "id": Field(str, required=True),
+    "name": Field(str, ""),
+    "cardCount": Field(dict, {"total": 0, "official": 0}, schema=CARD_COUNT_SCHEMA),
+}
+
+CARD_BRIEF_SCHEMA = {
+    "id": Field(str, required=True),
+    "localId": Field(str, required=True),
+    "name": Field(str, ""),
+    "image": Field(str, None),
+}
+
+# /series
+SERIES_SCHEMA = BRIEF_SCHEMA
+
+# /series/{id}
+SERIE_SCHEMA = {
+    "id": Field(str, required=True),
+    "name": Field(str, ""),
+    "releaseDate": Field(str, None),
+    "sets": Field(list, [], schema=SET_BRIEF_SCHEMA),
+}
+
+# /sets
+SETS_SCHEMA = SET_BRIEF_SCHEMA
+
+# /sets/{id}
+SET_SCHEMA = {
+    "id": Field(str, required=True),
+    "name": Field(str, ""),
+    "releaseDate": Field(str, None),
+    "cardCount": Field(dict, {"total": 0, "official": 0}, schema=CARD_COUNT_SCHEMA),
+    "serie": Field(dict, None, schema=BRIEF_SCHEMA),
+    "cards": Field(list, [], schema=CARD_BRIEF_SCHEMA),
+}
+
+VARIANTS_SCHEMA = {
+    "firstEdition": Field(bool, False),
+    "holo": Field(bool, False),
+    "normal": Field(bool, False),
+    "reverse": Field(bool, False),
+    "wPromo": Field(bool, False),
+}
+
+# /cards/{id}
+CARD_SCHEMA = {
+    "id": Field(str, required=True),
+    "localId": Field(str, required=True),
+    "name": Field(str, required=True),
+    "category": Field(str, required=True),
+    "rarity": Field(str, "None"),
+    "illustrator": Field(str, None),
+    "hp": Field(int, None),
+    "level": Field((int, str), None),
+    "dexId": Field(list, None),
+    "types": Field(list, None),
+    "variants": Field(dict, {}, schema=VARIANTS_SCHEMA),
+    "description": Field(str, None),
+    "effect": Field(str, None),
+    "image": Field(str, None),
+    "set": Field(dict, None, schema=BRIEF_SCHEMA),
+}
+
+
+def validate(data, schema: dict, path: str = ""):
+    """Check and default the fields of a decoded object in place, returns it"""
+    if type(data) is not dict:
+        raise SchemaError(f"{path or 'payload'}: expected an object, got {type(data).__name__}")
+    get = data.get
+    for name, field in schema.items():
+        value = get(name)
+        types = field.types
+        if value is None or not isinstance(value, types) or (types is int and value.__class__ is bool):
+            if field.required:
+                raise SchemaError(f"{path}{name}: missing or invalid required field (got {value!r})")
+            if value is not None:
+                debug("Invalid value for %s%s: %r. Using default.", path, name, value)
+            default = field.default
+            data[name] = copy.copy(default) if isinstance(default, (dict, list)) else default
+            continue
+        nested = field.schema
+        if nested is not None:
+            if value.__class__ is list:
+                count = validate_items(value, nested, f"{path}{name}")
+                if count:
+                    data.setdefault(DROPPED_KEY, {})[name] = count
+            else:
+                validate(value, nested, f"{path}{name}.")
+    return data
+
+def validate_items(items: list, schema: dict, path: str = "") -> int:
+    """Validate each object of a list in place, the invalid ones are logged and dropped. Returns the dropped count"""
+    invalid = None
+    for index, item in enumerate(items):
+        try:
+            validate(item, schema)
+        except SchemaError as err:
+            error("Dropping invalid item %s[%s]: %s", path, index, err)
+            if invalid is None:
+                invalid = []
+            invalid.append(index)
+    if invalid:
+        for index in reversed(invalid):
+            del items[index]
+        return len(invalid)
+    return 0
+
+def dropped(data: dict, name: str) -> int:
+    """Number of invalid items dropped from the list field name of a decoded object"""
+    return data.get(DROPPED_KEY, {}).get(name, 0)
+
+def decode(raw: bytes, schema: dict = None):
+    """
+    Decode raw response bytes and validate them against a schema.
+    A list payload (e.g. /series) has the schema applied to each item.
+    """
+    data = loads(raw)
+    if schema is None:
+        return data
+    if isinstance(data, list):
+        validate_items(data, schema)
+        return data
+    return validate(data, schema)
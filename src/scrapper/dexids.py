@@ -0,0 +1,67 @@
+"""
+Cross-language dexId cache.
+
+tcgdex card ids (base1-4, sv01-001, ...) are shared by every language, but some
+payloads lack the dexId field. Every dexId seen in any language is stored
+against the tcgdex card id and persisted in the state directory, so a card of
+another language can be resolved without guessing the pokemon from its name.
+"""
+import json
+import os
+from ..config import get_state_dir
+from ..utils.logger import debug, error
+
+def get_dex_ids_path() -> str:
+    return os.path.join(get_state_dir(), "dex_ids.json")
+
+
+class DexIdCache:
+    def __init__(self):
+        self.dex_ids = None
+        self.dirty = False
+
+    def load(self) -> dict:
+        if self.dex_ids is not None:
+            return self.dex_ids
+        self.dex_ids = {}
+        path = get_dex_ids_path()
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as file:
+                    self.dex_ids = json.load(file)
+                debug("Loaded %s dexId(s) from %s", len(self.dex_ids), path)
+            except (OSError, ValueError) as err:
+                error("Could not read dexId cache %s: %s. Starting from scratch.", path, err)
+        return self.dex_ids
+
+    def get(self, card_id: str):
+        """dexIds known for a tcgdex card id, None if no language had them"""
+        return self.load().get(card_id)
+
+    def record(self, card_id: str, dex_ids):
+        dex_ids = list(dex_ids or ())
+        if not dex_ids:
+            return
+        known = self.load()
+        if known.get(card_id) != dex_ids:
+            known[card_id] = dex_ids
+            self.dirty = True
+
+    def save(self):
+        """Atomically write the cache if it changed"""
+        if not self.dirty:
+            return
+        path = get_dex_ids_path()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(self.dex_ids, file, separators=(",", ":"), sort_keys=True)
+            os.replace(tmp_path, path)
+            self.dirty = False
+        except OSError as err:
+            error("Could not save dexId cache %s: %s", path, err)
+
+
+# Shared by every language crawled by the process
+dex_id_cache = DexIdCache()
@@ -0,0 +1,102 @@
+"""
+GraphQL fetch backend.
+
+Fetches the details of every card of a set in a few paged GraphQL queries
+instead of one REST call per card, asking only for the fields the scraper
+stores. Cards come back in the same structure as the REST /cards/{id} payload
+(validated with CARD_SCHEMA), so the rest of the crawl does not change. Any
+error returns None and the caller falls back to REST, card by card.
+"""
+import json
+
+from ..utils.logger import debug, info, error
+from .cache import response_cache
+from .client import http_client
+from .decoding import decode, validate, DECODE_ERRORS, SchemaError, CARD_SCHEMA
+
+DEFAULT_GRAPHQL_URL = "https://api.tcgdex.net/v2/graphql"
+ITEMS_PER_PAGE = 250
+# A set never has that many pages, stop there if the endpoint ignores pagination
+MAX_PAGES = 20
+
+# Fields of a card, the ones read from the REST payload
+CARD_FIELDS = """
+    id
+    localId
+    name
+    category
+    rarity
+    illustrator
+    hp
+    level
+    dexId
+    types
+    description
+    effect
+    image
+    variants { firstEdition holo normal reverse wPromo }
+    set { id name }
+"""
+
+def build_query(id_prefix: str, page: int) -> str:
+    # Literal arguments: the input types of the endpoint are not part of its contract
+    return (f"{{ cards(filters: {{id: {json.dumps(id_prefix)}}}, "
+            f"pagination: {{page: {page}, itemsPerPage: {ITEMS_PER_PAGE}}}) {{{CARD_FIELDS}}} }}")
+
+
+def post_query(url: str, api_lang: str, id_prefix: str, page: int):
+    """Run one page of the set cards query, returns the list of cards or None on failure"""
+    cache_key = f"{url}#{api_lang}/{id_prefix}{page}"
+    raw = response_cache.get(cache_key)
+    if raw is None and http_client.offline:
+        debug("Offline: GraphQL page %s is not in the response cache", cache_key)
+        return None
+    if raw is None:
+        # Retries, circuit breaker and counters shared with the REST requests
+        raw = http_client.post(url, {"query": build_query(id_prefix, page)}, params={"lang": api_lang}, timeout=60)
+        if raw is None:
+            error("GraphQL request to %s failed", url)
+            return None
+    else:
+        debug("GraphQL page served from cache: %s", cache_key)
+
+    try:
+        payload = decode(raw)
+    except DECODE_ERRORS as err:
+        error("Invalid GraphQL response from %s: %s", url, err)
+        return None
+    if not isinstance(payload, dict) or payload.get("errors") or not isinstance(payload.get("data"), dict):
+        error("GraphQL query failed: %s", payload.get("errors") if isinstance(payload, dict) else payload)
+        return None
+    cards = payload["data"].get("cards")
+    if not isinstance(cards, list):
+        return None
+    response_cache.put(cache_key, raw)
+    return cards
+
+def fetch_set_cards(url: str, api_lang: str, set_id: str):
+    """
+    Details of every card of a set, keyed by tcgdex card id. None if the query failed.
+    Cards of other sets matched by the id filter are dropped.
+    """
+    prefix = f"{set_id}-"
+    cards = {}
+    for page in range(1, MAX_PAGES + 1):
+        page_cards = post_query(url, api_lang, prefix, page)
+        if page_cards is None:
+            return None
+        for card_data in page_cards:
+            if not isinstance(card_data, dict) or not str(card_data.get("id", "")).startswith(prefix):
+                continue
+            # GraphQL returns null for absent fields, the schema turns them into defaults
+            card_data = {key: value for key, value in card_data.items() if value is not None}
+            try:
+                cards[card_data["id"]] = validate(card_data, CARD_SCHEMA)
+            except SchemaError as err:
+                # Left out, the card will be fetched through REST
+                debug("Invalid GraphQL card in set %s: %s", set_id, err)
+        if len(page_cards) < ITEMS_PER_PAGE:
+            break
+
+    info("GraphQL: %s card(s) of set %s fetched in %s page(s)", len(cards), set_id, page)
+    return cards
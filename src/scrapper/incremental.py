@@ -0,0 +1,90 @@
+"""
+Incremental crawl support.
+
+A per-language watermark file remembers, for every set already crawled, its bloc,
+release date and card count, plus the newest set and release date seen.
+Incremental runs compare it with the /sets listing and only descend into sets
+that are new, whose card count changed, or that were released recently.
+"""
+import json
+import os
+from datetime import date, timedelta
+from ..config import get_state_dir
+from ..utils.logger import debug, error
+
+def get_watermark_path(lang: str) -> str:
+    return os.path.join(get_state_dir(), f"watermark_{lang}.json")
+
+def empty_watermark() -> dict:
+    return {
+        "newest_set": None,
+        "newest_release_date": None,
+        "sets": {},
+        "ignored": []
+    }
+
+def load_watermark(lang: str) -> dict:
+    """Load the watermark of a language, an empty one if it was never saved"""
+    path = get_watermark_path(lang)
+    if not os.path.exists(path):
+        return empty_watermark()
+    try:
+        with open(path, encoding="utf-8") as file:
+            watermark = json.load(file)
+    except (OSError, ValueError) as err:
+        error("Could not read watermark %s: %s. Starting from scratch.", path, err)
+        return empty_watermark()
+    for key, value in empty_watermark().items():
+        watermark.setdefault(key, value)
+    return watermark
+
+def save_watermark(lang: str, watermark: dict):
+    """Atomically write the watermark of a language"""
+    path = get_watermark_path(lang)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(watermark, file, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def record_set(watermark: dict, set_id: str, bloc_id: str, release_date: str, card_count: int):
+    """Remember a crawled set and move the watermark forward if it is the newest one"""
+    watermark["sets"][set_id] = {
+        "bloc": bloc_id,
+        "release_date": release_date,
+        "card_count": card_count
+    }
+    if release_date and (watermark["newest_release_date"] is None or release_date >= watermark["newest_release_date"]):
+        watermark["newest_release_date"] = release_date
+        watermark["newest_set"] = set_id
+
+def ignore_sets(watermark: dict, set_ids):
+    """Remember sets belonging to skipped blocs so they are never searched again"""
+    watermark["ignored"] = sorted(set(watermark["ignored"]) | set(set_ids))
+
+def select_sets_to_visit(watermark: dict, sets_listing: list, lookback_days: int, today: date = None) -> set:
+    """
+    Pick the ids of the sets an incremental run must descend into:
+    unknown sets, sets whose card count changed, and sets released in the look-back window.
+    """
+    today = today or date.today()
+    window_start = (today - timedelta(days=lookback_days)).isoformat()
+    ignored = set(watermark["ignored"])
+
+    selected = set()
+    for set_brief in sets_listing:
+        set_id = set_brief["id"]
+        if set_id in ignored:
+            continue
+        known = watermark["sets"].get(set_id)
+        card_count = (set_brief.get("cardCount") or {}).get("total")
+        if known is None:
+            debug("Incremental: new set %s", set_id)
+            selected.add(set_id)
+        elif card_count is not None and card_count != known["card_count"]:
+            debug("Incremental: card count of set %s changed (%s -> %s)", set_id, known["card_count"], card_count)
+            selected.add(set_id)
+        elif known["release_date"] and known["release_date"] >= window_start:
+            debug("Incremental: set %s released within the last %s days", set_id, lookback_days)
+            selected.add(set_id)
+    return selected
@@ -0,0 +1,163 @@
+"""
+Dry-run planner.
+
+Walks the same series -> sets -> cards traversal as scrap_poke_data, reading the
+API through the response cache (RESPONSE_CACHE_DIR, or a cache of the state
+directory whose entries expire after PLAN_CACHE_TTL seconds), and diffs it against the slugs already in the
+database (loaded in bulk, a handful of SELECTs per language). Nothing is written
+to MySQL. The plan lists new blocs, sets and cards, cards missing their
+pokemon/energy/trainer row, and estimates the requests and inserts of a real run.
+"""
+import json
+import os
+
+from ..config import get_state_dir
+from ..database.bloc import get_bloc_slugs_by_prefix
+from ..database.set import get_set_slugs_by_prefix
+from ..database.card import get_card_slugs_by_prefix
+from ..utils.logger import debug, info
+from .cache import response_cache
+from .decoding import SERIES_SCHEMA, SERIE_SCHEMA, SETS_SCHEMA, SET_SCHEMA
+from .incremental import load_watermark, select_sets_to_visit
+from .scrapper import fetch_data, api_langs, tcg_language_ids
+
+# Statements issued for a new card on average: card, translation, subtype row,
+# ~2 elements or variants, content hash
+INSERTS_PER_CARD = 6
+# A bloc or a set and its translation
+INSERTS_PER_CONTAINER = 2
+# Age in seconds of the responses the planner reuses when no response cache is configured
+PLAN_CACHE_TTL = 24 * 3600
+
+
+def new_plan(lang: str) -> dict:
+    return {
+        "lang": lang,
+        "new_blocs": [],
+        "new_sets": [],
+        "new_cards": 0,
+        "cards_missing_subtype": 0,
+        "sets": [],
+        "estimated_requests": 0,
+        "estimated_inserts": 0,
+    }
+
+def plan_scrap(connection, lang: str, lookback_days: int = None, refresh: bool = False) -> dict:
+    """Compute what scrap_poke_data would do for a language, without writing anything"""
+    if not response_cache.enabled:
+        response_cache.configure(os.path.join(get_state_dir(), "responses"), PLAN_CACHE_TTL)
+
+    base_url = f"https://api.tcgdex.net/v2/{api_langs[lang]}"
+    blocs_url = f"{base_url}/series"
+    sets_url = f"{base_url}/sets"
+    tcg_slug = tcg_language_ids[lang]
+
+    # Existing rows of the whole language, one query per table
+    existing_blocs = get_bloc_slugs_by_prefix(connection, f"{tcg_slug}/")
+    existing_sets = get_set_slugs_by_prefix(connection, f"{tcg_slug}/")
+    existing_cards = get_card_slugs_by_prefix(connection, f"{tcg_slug}/")
+    cards_per_set = {}
+    missing_per_set = {}
+    for card_slug, has_subtype in existing_cards.items():
+        set_slug = card_slug.rsplit("/", 1)[0]
+        cards_per_set[set_slug] = cards_per_set.get(set_slug, 0) + 1
+        if not has_subtype:
+            missing_per_set[set_slug] = missing_per_set.get(set_slug, 0) + 1
+    debug("Plan: %s bloc(s), %s set(s), %s card(s) already in database", len(existing_blocs), len(existing_sets), len(existing_cards))
+
+    plan = new_plan(lang)
+    blocs_data = fetch_data(blocs_url, SERIES_SCHEMA) or []
+    plan["estimated_requests"] += 1
+
+    sets_to_visit = None
+    if lookback_days is not None:
+        sets_to_visit = select_sets_to_visit(load_watermark(lang), fetch_data(sets_url, SETS_SCHEMA) or [], lookback_days)
+        plan["estimated_requests"] += 1
+
+    for bloc_data in blocs_data:
+        if bloc_data["id"] == "tcgp":
+            continue
+        bloc_slug = f"{tcg_slug}/{bloc_data['id']}"
+        if bloc_slug not in existing_blocs:
+            plan["new_blocs"].append(bloc_slug)
+            plan["estimated_inserts"] += INSERTS_PER_CONTAINER
+
+        bloc_detail = fetch_data(f"{blocs_url}/{bloc_data['id']}", SERIE_SCHEMA)
+        plan["estimated_requests"] += 1
+        if bloc_detail is None:
+            continue
+
+        for set_data in bloc_detail["sets"]:
+            if sets_to_visit is not None and set_data["id"] not in sets_to_visit:
+                continue
+            set_slug = f"{bloc_slug}/{set_data['id']}"
+            set_plan = plan_set(plan, sets_url, set_slug, set_data, set_slug in existing_sets,
+                                cards_per_set.get(set_slug, 0), missing_per_set.get(set_slug, 0),
+                                existing_cards, refresh)
+            if set_plan:
+                plan["sets"].append(set_plan)
+
+    plan["cache"] = {"hits": response_cache.hits, "misses": response_cache.misses}
+    return plan
+
+def plan_set(plan: dict, sets_url: str, set_slug: str, set_data, set_exists: bool, existing_count: int,
+             missing_count: int, existing_cards: dict, refresh: bool):
+    """Add the work of one set to the plan, returns the set summary or None if nothing to do"""
+    plan["estimated_requests"] += 1
+    if not set_exists:
+        plan["new_sets"].append(set_slug)
+        plan["estimated_inserts"] += INSERTS_PER_CONTAINER
+    elif not refresh and existing_count >= set_data["cardCount"]["total"]:
+        # Complete set: the crawl lists it, then skips all of its cards. Cards missing
+        # their subtype row are counted from the database alone.
+        if not missing_count:
+            return None
+        plan["cards_missing_subtype"] += missing_count
+        plan["estimated_requests"] += missing_count
+        plan["estimated_inserts"] += missing_count
+        return {"set": set_slug, "new_cards": 0, "cards_missing_subtype": missing_count}
+
+    set_detail = fetch_data(f"{sets_url}/{set_data['id']}", SET_SCHEMA)
+    if set_detail is None:
+        return None
+
+    new_cards = 0
+    missing = 0
+    for card in set_detail["cards"]:
+        card_slug = f"{set_slug}/{card['localId']}"
+        has_subtype = existing_cards.get(card_slug)
+        if has_subtype is None:
+            new_cards += 1
+        elif not has_subtype:
+            missing += 1
+        elif refresh:
+            plan["estimated_requests"] += 1
+
+    plan["new_cards"] += new_cards
+    plan["cards_missing_subtype"] += missing
+    plan["estimated_requests"] += new_cards + missing
+    plan["estimated_inserts"] += new_cards * INSERTS_PER_CARD + missing
+    if not new_cards and not missing and set_exists:
+        return None
+    return {"set": set_slug, "new_cards": new_cards, "cards_missing_subtype": missing}
+
+def print_plan(plan: dict, as_json: bool = False):
+    if as_json:
+        print(json.dumps(plan, indent=2, ensure_ascii=False))
+        return
+
+    print(f"Plan for language '{plan['lang']}' (nothing has been written)")
+    print(f"  New blocs:              {len(plan['new_blocs'])}")
+    for bloc_slug in plan["new_blocs"]:
+        print(f"    + {bloc_slug}")
+    print(f"  New sets:               {len(plan['new_sets'])}")
+    for set_slug in plan["new_sets"]:
+        print(f"    + {set_slug}")
+    print(f"  New cards:              {plan['new_cards']}")
+    print(f"  Cards missing subtype:  {plan['cards_missing_subtype']}")
+    for set_plan in plan["sets"]:
+        print(f"    {set_plan['set']}: {set_plan['new_cards']} new, {set_plan['cards_missing_subtype']} to repair")
+    print(f"  Estimated requests:     {plan['estimated_requests']}")
+    print(f"  Estimated inserts:      {plan['estimated_inserts']}")
+    print(f"  Response cache:         {plan['cache']['hits']} hit(s), {plan['cache']['misses']} miss(es)")
+    info("Plan done")
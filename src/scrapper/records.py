@@ -0,0 +1,60 @@
+"""
+Typed records for tcgdex payloads.
+
+A card payload is decoded once into a CardRecord holding only the fields we
+store. Records are NamedTuples: immutable, slotted (no per-instance __dict__)
+and cheap enough to keep thousands of cards of a batch in memory. They build
+the row tuples of the database models (Card, PokemonCard, ...) directly.
+"""
+from typing import NamedTuple, Optional, Tuple
+
+from ..database.card import Card, PokemonCard
+
+CARD_VARIANTS = ("firstEdition", "holo", "normal", "reverse", "wPromo")
+
+
+class CardRecord(NamedTuple):
+    id: str
+    local_id: str
+    name: str
+    category: str
+    rarity: str
+    illustrator: str
+    hp: int
+    level: str
+    dex_ids: Tuple[int, ...]
+    types: Tuple[str, ...]
+    variants: Tuple[str, ...]
+    description: Optional[str]
+
+    @classmethod
+    def from_api(cls, card_data) -> "CardRecord":
+        """Decode a tcgdex card payload"""
+        variants = card_data.get("variants") or {}
+        return cls(
+            id=card_data["id"],
+            local_id=card_data["localId"],
+            name=card_data["name"],
+            category=card_data["category"],
+            rarity=card_data.get("rarity"),
+            illustrator=card_data.get("illustrator") or "Unknown",
+            hp=card_data.get("hp") or 0,
+            level=card_data.get("level") or 0,
+            dex_ids=tuple(card_data.get("dexId") or ()),
+            types=tuple(card_data.get("types") or ()),
+            variants=tuple(variant for variant in CARD_VARIANTS if variants.get(variant) == True),
+            # Trainer and energy cards carry their text in "effect" instead of "description"
+            description=card_data.get("description") or card_data.get("effect") or None
+        )
+
+    def card_row(self, slug: str, category_id, rarity_id, set_id, illustrator_id) -> Card:
+        """Row of the card table"""
+        return Card(slug, self.local_id, category_id, rarity_id, set_id, illustrator_id)
+
+    def translation_row(self, slug: str, card_id, language_id) -> tuple:
+        """Arguments of insert_card_translation / update_card_translation"""
+        return (slug, card_id, language_id, self.name, self.description)
+
+    def pokemon_card_row(self, slug: str, card_id, pokemon_id) -> PokemonCard:
+        """Row of the pokemon_card table"""
+        return PokemonCard(slug, card_id, pokemon_id, self.hp, self.level)
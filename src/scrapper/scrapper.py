@@ -1,24 +1,42 @@
-import requests
 import time
 import re
+from contextlib import nullcontext
 from enum import Enum
+from typing import Optional
 from ..utils.logger import debug, info, error
 
 from ..database.bloc import Bloc, BlocTranslation, insert_bloc_translation, insert_bloc, get_tcg_language_id_by_slug
 from ..database.set import Set, SetTranslation, insert_set_translation, insert_set, get_set_id_by_slug
 from ..database.illustrator import Illustrator, insert_illustrator
 from ..database.card import Card, PokemonCard, insert_card, insert_card_translation, insert_energy_card, insert_trainer_card, insert_pokemon_card, insert_pokemon_card_element, insert_card_variant, get_card_id, check_energy_card, check_trainer_card, check_pokemon_card
+from ..database.card import compute_card_hash, ensure_card_hash_table, get_card_hash, set_card_hash, update_card, update_card_translation, update_pokemon_card, sync_pokemon_card_elements, sync_card_variants
+from ..database.card import delete_other_subtypes, update_energy_card
 from ..database.category import get_category_id_by_name
 from ..database.rarity import get_rarity_id_by_name
-from ..database.pokemon import insert_pokemon_if_not_exist, get_pokemon_id_by_name
+from ..database.batch import BatchConnection
+from ..database.pokemon import insert_pokemon_if_not_exist, pokemon_name_index
+from ..images.downloader import card_image_url
+from .records import CardRecord
+from .client import http_client
+from .decoding import decode, dropped, DECODE_ERRORS, SERIES_SCHEMA, SERIE_SCHEMA, SETS_SCHEMA, SET_SCHEMA, CARD_SCHEMA
+from .dexids import dex_id_cache
+from .graphql import fetch_set_cards
+from .incremental import load_watermark, save_watermark, record_set, ignore_sets, select_sets_to_visit
 
-def fetch_data(url):
-    response = requests.get(url)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        error("Failed to fetch data from %s", url)
-        return None
+def fetch_data(url, schema: dict = None):
+    """Fetch a tcgdex resource, decoded and validated against schema. None on failure"""
+    # A body from the memo or the disk cache that does not validate is fetched again once
+    for fresh in (False, True):
+        raw = http_client.get(url, fresh=fresh)
+        if raw is None:
+            error("Failed to fetch data from %s", url)
+            return None
+        try:
+            return decode(raw, schema)
+        except DECODE_ERRORS as err:
+            http_client.forget(url)
+            error("Invalid data from %s: %s", url, err)
+    return None
 
 def clean_pokemon_name(card_name: str) -> str:
     """
@@ -118,23 +136,430 @@ category_id_table_name= {
 }
 
 
-def scrap_poke_data(connection, lang: str):
+def resolve_card_references(connection, lang: str, card_slug: str, record: CardRecord):
+    """Resolve illustrator, category and rarity ids of a card, None if one of them is invalid"""
+    # Add or get the illustrator id ("Unknown" when the payload has none)
+    id_illustrator = insert_illustrator(connection, Illustrator(record.illustrator))
+    # Get the category id
+    id_category = get_category_id_by_name(connection, record.category)
+    # Get the rarity id (with auto-create enabled)
+    id_rarity = get_rarity_id_by_name(connection, record.rarity, language_ids[lang], auto_create=True)
+
+    # Validate required foreign keys before insert
+    if id_category == 0 or id_category is None:
+        error("Invalid category_id for card '%s'. Category: '%s'. Skipping...", card_slug, record.category)
+        return None
+
+    if id_rarity == 0 or id_rarity is None:
+        error("Invalid rarity_id for card '%s'. Rarity: '%s'. Skipping...", card_slug, record.rarity)
+        return None
+
+    return id_illustrator, id_category, id_rarity
+
+def resolve_pokemon_id(connection, lang: str, record: CardRecord):
+    """Find or create the pokemon of a pokemon card, None if it cannot be determined"""
+    # Use regex-based name cleaning instead of fragile string splitting
+    real_pokemon_name = clean_pokemon_name(record.name)
+    dex_ids = record.dex_ids
+    if dex_ids:
+        dex_id_cache.record(record.id, dex_ids)
+    else:
+        # The payload of another language may have given the dexId of this card
+        dex_ids = dex_id_cache.get(record.id)
+        if dex_ids:
+            debug("dexId of '%s' (%s) taken from another language: %s", record.name, record.id, dex_ids)
+    if dex_ids:
+        # Insert pokemon if not exists
+        # Clean the slug format for pokemon translation
+        pokemon_slug = f"{lang}/pokemon/{dex_ids[0]}"
+        pokemon_id = insert_pokemon_if_not_exist(connection, dex_ids[0], pokemon_slug, real_pokemon_name, language_ids[lang])
+        if pokemon_id is None:
+            error("Failed to create pokemon for dex_id=%s", dex_ids[0])
+            error("Pokemon data: slug='%s', name='%s'", pokemon_slug, record.name)
+            error("Original card data: %s", record)
+        return pokemon_id
+
+    # Find the pokemon name contained in the card name (exact, cleaned name, then longest match)
+    dexId = pokemon_name_index.find(connection, record.name, language_ids[lang], real_pokemon_name)
+
+    # Last chance before skipping: ask the other languages for the dexId
+    if dexId == 0:
+        dex_ids = fetch_dex_ids(lang, record.id)
+        if dex_ids:
+            return resolve_pokemon_id(connection, lang, record._replace(dex_ids=tuple(dex_ids)))
+
+    # If still not found, log error and skip this card
+    if dexId == 0:
+        error("Could not determine dexId for pokemon card: '%s' (id: %s)", record.name, record.id)
+        error("Cleaned name: '%s'. Skipping this card.", real_pokemon_name)
+        error("Original card data: %s", record)
+        return None
+
+    # Clean the slug format for pokemon translation
+    pokemon_slug = f"pokemon/{dexId}/{lang}"
+    pokemon_id = insert_pokemon_if_not_exist(connection, dexId, pokemon_slug, real_pokemon_name, language_ids[lang])
+    if pokemon_id is None:
+        error("Failed to create pokemon for dex_id=%s", dexId)
+        error("Pokemon data: slug='%s', name='%s'", pokemon_slug, record.name)
+        error("Original card data: %s", record)
+    return pokemon_id
+
+def fetch_dex_ids(lang: str, card_id: str):
+    """dexIds of a card read from its payload in the other languages, None if none has them"""
+    for other_lang, api_lang in api_langs.items():
+        if other_lang == lang:
+            continue
+        card_data = fetch_data(f"https://api.tcgdex.net/v2/{api_lang}/cards/{card_id}", CARD_SCHEMA)
+        if card_data and card_data.get("dexId"):
+            info("dexId of %s found in the '%s' payload: %s", card_id, other_lang, card_data["dexId"])
+            dex_id_cache.record(card_id, card_data["dexId"])
+            return card_data["dexId"]
+    return None
+
+def refresh_card(connection, lang: str, card_id, card_slug: str, card_data, set_id, force: bool = False) -> Optional[bool]:
+    """
+    Update an already scrapped card in place when its payload changed since the last run.
+    With force=True the card is rewritten (and missing rows recreated) even if unchanged.
+    Returns True if the card was updated, False if it was unchanged, None if it could not be updated.
+    """
+    content_hash = compute_card_hash(card_data)
+    if not force and get_card_hash(connection, card_id) == content_hash:
+        debug("Unchanged card: %s - %s", card_data["id"], card_data["name"])
+        return False
+
+    record = CardRecord.from_api(card_data)
+    references = resolve_card_references(connection, lang, card_slug, record)
+    if references is None:
+        return None
+    id_illustrator, id_category, id_rarity = references
+
+    if update_card(connection, card_id, record.card_row(card_slug, id_category, id_rarity, set_id, id_illustrator)) is None:
+        error("Failed to update card '%s'", card_slug)
+        return None
+
+    card_translation_slug = f"{card_slug}/translation/{api_langs[lang]}"
+    if update_card_translation(connection, *record.translation_row(card_translation_slug, card_id, language_ids[lang])) is None:
+        error("Failed to update card translation '%s'", card_translation_slug)
+        return None
+
+    # A category change leaves the row of the previous subtype behind
+    subtype_table = {CATEGORY_IDS.get('ENERGY', -1): "energy_card", CATEGORY_IDS.get('TRAINER', -1): "trainer_card",
+                     CATEGORY_IDS.get('POKEMON', -1): "pokemon_card"}.get(id_category)
+    if subtype_table and delete_other_subtypes(connection, card_id, subtype_table) is None:
+        return None
+
+    # Every failure returns None before the hash is stored, so the card is retried by the next run
+    if id_category == CATEGORY_IDS.get('ENERGY', -1):
+        # The element follows the energy named by the card
+        if update_energy_card(connection, f"{card_slug}/energy", card_id, card_data["name"], language_ids[lang]) is None:
+            error("Failed to update energy card for card_id=%s", card_id)
+            return None
+    elif id_category == CATEGORY_IDS.get('TRAINER', -1):
+        if insert_trainer_card(connection, f"{card_slug}/trainer", card_id) is None:
+            error("Failed to create trainer card for card_id=%s", card_id)
+            return None
+    elif id_category == CATEGORY_IDS.get('POKEMON', -1):
+        pokemon_id = resolve_pokemon_id(connection, lang, record)
+        if pokemon_id is None:
+            return None
+        pokemon_card_id = update_pokemon_card(connection, record.pokemon_card_row(f"{card_slug}/pokemon", card_id, pokemon_id))
+        if pokemon_card_id is None:
+            error("Failed to update pokemon card for card_id=%s", card_id)
+            return None
+        if sync_pokemon_card_elements(connection, pokemon_card_id, record.types, language_ids[lang]) is None:
+            return None
+
+    if sync_card_variants(connection, card_id, record.variants) is None:
+        return None
+    set_card_hash(connection, card_id, content_hash)
+    info("Refreshed card: %s - %s", card_data["id"], card_data["name"])
+    return True
+
+
+def insert_new_card(connection, lang: str, card_slug: str, card_data, set_id):
+    """Insert a card with its translation, subtype row, elements and variants. Returns the card id or None"""
+    record = CardRecord.from_api(card_data)
+    references = resolve_card_references(connection, lang, card_slug, record)
+    if references is None:
+        return None
+    id_illustrator, id_category, id_rarity = references
+
+    # Insert the card (use cleaned position format)
+    card_id = insert_card(connection, record.card_row(card_slug, id_category, id_rarity, set_id, id_illustrator))
+
+    if card_id is None:
+        error("Failed to create card '%s'. Skipping...", card_slug)
+        error("Card data received from API: %s", card_data)
+        error("Card object details: slug='%s', position='%s', category_id=%s, rarity_id=%s, set_id=%s, illustrator_id=%s",
+              card_slug, card_data["localId"], id_category, id_rarity, set_id, id_illustrator)
+        return None
+
+    # Add card translation
+    description = record.description
+    card_translation_slug = f"{card_slug}/translation/{api_langs[lang]}"
+    translation_id = insert_card_translation(connection, *record.translation_row(card_translation_slug, card_id, language_ids[lang]))
+
+    if translation_id is None:
+        error("Failed to create card translation for card_id=%s", card_id)
+        error("Card translation data: slug='%s', name='%s', description='%s', language_id=%s", 
+              card_translation_slug, card_data["name"], description, language_ids[lang])
+        error("Original card data: %s", card_data)
+
+    # Insert the card type
+    debug("Processing card type with category ID: %s", id_category)
+    debug("Available category IDs: %s", CATEGORY_IDS)
+
+    if id_category == CATEGORY_IDS.get('ENERGY', -1):
+        energy_card_slug = f"{card_slug}/energy"
+        energy_result = insert_energy_card(connection, energy_card_slug, card_id, card_data["name"], language_ids[lang])
+        if energy_result is None:
+            error("Failed to create energy card for card_id=%s", card_id)
+            error("Energy card data: slug='%s', energy_type='%s'", energy_card_slug, card_data["name"])
+            error("Original card data: %s", card_data)
+    elif id_category == CATEGORY_IDS.get('TRAINER', -1):
+        trainer_card_slug = f"{card_slug}/trainer"
+        trainer_result = insert_trainer_card(connection, trainer_card_slug, card_id)
+        if trainer_result is None:
+            error("Failed to create trainer card for card_id=%s", card_id)
+            error("Trainer card data: slug='%s'", trainer_card_slug)
+            error("Original card data: %s", card_data)
+    elif id_category == CATEGORY_IDS.get('POKEMON', -1):
+        pokemon_id = resolve_pokemon_id(connection, lang, record)
+        if pokemon_id is None and not record.dex_ids:
+            return None
+        # Insert the pokemon card
+        pokemon_card_slug = f"{card_slug}/pokemon"
+        pokemon_card_row = record.pokemon_card_row(pokemon_card_slug, card_id, pokemon_id)
+        pokemon_card_id = insert_pokemon_card(connection, pokemon_card_row)
+
+        if pokemon_card_id is None:
+            error("Failed to create pokemon card for card_id=%s", card_id)
+            error("Pokemon card data: slug='%s', pokemon_id=%s, hp=%s, level=%s", pokemon_card_slug, pokemon_id, pokemon_card_row.hp, pokemon_card_row.level)
+            error("Original card data: %s", card_data)
+
+        if record.types:
+            # Insert the pokemon card elements
+            for type in record.types:
+                insert_pokemon_card_element(connection, pokemon_card_id, type, language_ids[lang])
+    else:
+        error("Invalid category: %s", id_category)
+
+    # Note: Card rarity is already stored in card.rarity_id
+    # No need for separate card_rarity table since cards have only one rarity
+
+    # Add card variants
+    for variant in record.variants:
+        insert_card_variant(connection, card_id, variant)
+
+    # Remember the payload hash so refresh runs can detect changes
+    set_card_hash(connection, card_id, compute_card_hash(card_data))
+
+    info("Scrapped card: %s - %s", card_data["id"], card_data["name"])
+    return card_id
+
+
+def fetch_card(cards_url: str, card_id: str, set_cards: dict = None):
+    """Card detail from the GraphQL prefetch of its set when it has it, through REST otherwise"""
+    card_data = set_cards.get(card_id) if set_cards else None
+    if card_data is not None:
+        return card_data
+    return fetch_data(f"{cards_url}/{card_id}", CARD_SCHEMA)
+
+def prefetch_set_cards(graphql_url: str, lang: str, set_id: str) -> dict:
+    """Card details of a whole set through GraphQL, empty (REST for every card) when disabled or failing"""
+    if not graphql_url:
+        return {}
+    set_cards = fetch_set_cards(graphql_url, api_langs[lang], set_id)
+    if set_cards is None:
+        error("GraphQL fetch of set %s failed, falling back to REST", set_id)
+        return {}
+    return set_cards
+
+
+def card_unit(connection, card_slug: str):
+    """
+    Unit of work of one card: rolled back as a whole and recorded for retry when
+    writing through a BatchConnection, a no-op context otherwise.
+    """
+    if isinstance(connection, BatchConnection):
+        return connection.unit(card_slug)
+    return nullcontext()
+
+
+def parse_card_ref(card_ref: str):
+    """
+    Split a work list entry into (tcg language slug or None, set id, local id).
+    Accepts card slugs (poke-fr/sv/sv01/001) and tcgdex ids (sv01-001).
+    """
+    card_ref = card_ref.strip()
+    if "/" in card_ref:
+        parts = card_ref.split("/")
+        if len(parts) != 4:
+            return None
+        return parts[0], parts[2], parts[3]
+    set_id, separator, local_id = card_ref.rpartition("-")
+    if not separator or not set_id or not local_id:
+        return None
+    return None, set_id, local_id
+
+def scrap_cards(connection, lang: str, card_refs, image_downloader=None, graphql_url: str = None):
+    """
+    Fetch and repair only the given cards (card slugs or tcgdex ids), e.g. the work list
+    written by scripts/verify_serie_cards.py --worklist. Bloc and set must already exist:
+    their context is taken from the set detail and the database.
+    """
+    get_category_ids_mapping(connection)
+    ensure_card_hash_table(connection)
+
+    base_url = f"https://api.tcgdex.net/v2/{api_langs[lang]}"
+    sets_url = f"{base_url}/sets"
+    cards_url = f"{base_url}/cards"
+
+    # Group the cards by set so each set detail is fetched once
+    cards_by_set = {}
+    for card_ref in card_refs:
+        parsed = parse_card_ref(card_ref)
+        if parsed is None:
+            error("Invalid card reference: '%s'. Skipping...", card_ref)
+            continue
+        tcg_lang_slug, set_code, local_id = parsed
+        if tcg_lang_slug is not None and tcg_lang_slug != tcg_language_ids[lang]:
+            error("Card '%s' does not belong to language %s. Skipping...", card_ref, lang)
+            continue
+        cards_by_set.setdefault(set_code, []).append(local_id)
+
+    repaired = 0
+    for set_code, local_ids in cards_by_set.items():
+        set_detail = fetch_data(f"{sets_url}/{set_code}", SET_SCHEMA)
+        if set_detail is None or not set_detail["serie"]:
+            error("Set '%s' not found in the API. Skipping...", set_code)
+            continue
+        set_slug = f"{tcg_language_ids[lang]}/{set_detail["serie"]["id"]}/{set_code}"
+        set_id = get_set_id_by_slug(connection, set_slug)
+        if set_id is None:
+            error("Set '%s' is not scrapped yet, run a full crawl for it. Skipping...", set_slug)
+            continue
+
+        cards_by_local_id = {card["localId"]: card for card in set_detail["cards"]}
+        set_cards = prefetch_set_cards(graphql_url, lang, set_code) if len(local_ids) > 1 else {}
+        for local_id in local_ids:
+            card_global_data = cards_by_local_id.get(local_id)
+            if card_global_data is None:
+                error("Card %s not found in set %s. Skipping...", local_id, set_code)
+                continue
+            card_slug = f"{set_slug}/{local_id}"
+            card_data = fetch_card(cards_url, card_global_data["id"], set_cards)
+            if card_data is None:
+                continue
+            if image_downloader is not None:
+                image_downloader.submit(card_slug, card_image_url(card_data))
+
+            card_id = get_card_id(connection, card_slug)
+            with card_unit(connection, card_slug) as unit:
+                if card_id != 0:
+                    success = refresh_card(connection, lang, card_id, card_slug, card_data, set_id, force=True) is not None
+                else:
+                    success = insert_new_card(connection, lang, card_slug, card_data, set_id) is not None
+                if not success and unit:
+                    unit.fail()
+            if success:
+                repaired += 1
+
+    dex_id_cache.save()
+    info("Repaired %s card(s) out of %s", repaired, len(card_refs))
+    info("HTTP: %s", http_client.stats())
+    return repaired
+
+
+def locate_sets_blocs(blocs_data, blocs_url: str, watermark: dict, sets_to_visit: set, bloc_details: dict) -> set:
+    """
+    Find the blocs holding the sets to visit. Known sets come from the watermark, new ones
+    are searched from the newest bloc backward so only the last bloc details are fetched.
+    """
+    wanted_blocs = {watermark["sets"][set_id]["bloc"] for set_id in sets_to_visit if set_id in watermark["sets"]}
+    pending = {set_id for set_id in sets_to_visit if set_id not in watermark["sets"]}
+    for bloc_data in reversed(blocs_data):
+        if not pending:
+            break
+        bloc_detail = fetch_data(f"{blocs_url}/{bloc_data["id"]}", SERIE_SCHEMA)
+        bloc_details[bloc_data["id"]] = bloc_detail
+        bloc_set_ids = {set_data["id"] for set_data in bloc_detail["sets"]} if bloc_detail else set()
+        if bloc_data["id"] == "tcgp":
+            ignore_sets(watermark, bloc_set_ids)
+        elif bloc_set_ids & pending:
+            wanted_blocs.add(bloc_data["id"])
+        pending -= bloc_set_ids
+    if pending:
+        error("Could not find the bloc of sets: %s", sorted(pending))
+    return wanted_blocs
+
+
+def scrap_poke_data(connection, lang: str, refresh: bool = False, lookback_days: int = None, card_refs=None, image_downloader=None,
+                    graphql_url: str = None, bloc_ids: set = None, set_ids: set = None):
+    """
+    Scrap every bloc, set and card of a language.
+    With refresh=True, already scrapped cards are fetched again and updated in place
+    when the hash of their payload changed since the last run.
+    With lookback_days set (incremental mode), only sets that are new, whose card count
+    changed or that were released in the last lookback_days days are visited.
+    With card_refs (card slugs or tcgdex ids), only those cards are fetched and repaired.
+    With an image_downloader, the image of every fetched card is queued for download.
+    With graphql_url, the cards of a set are fetched in a few GraphQL queries (REST per card on failure).
+    With bloc_ids and/or set_ids (tcgdex ids), only the sets of those blocs and those sets are visited.
+    """
+    if card_refs:
+        return scrap_cards(connection, lang, card_refs, image_downloader, graphql_url)
+
     # Load category IDs from database
     category_ids = get_category_ids_mapping(connection)
+    ensure_card_hash_table(connection)
     
     base_url = f"https://api.tcgdex.net/v2/{api_langs[lang]}"
     blocs_url = f"{base_url}/series"
     sets_url = f"{base_url}/sets"
     cards_url = f"{base_url}/cards"
     
+    watermark = load_watermark(lang)
+    incremental = lookback_days is not None
+    sets_to_visit = None
+    bloc_details = {}
+
     # Get bloc list
-    blocs_data = fetch_data(blocs_url)
+    blocs_data = fetch_data(blocs_url, SERIES_SCHEMA)
     debug("Blocs data: %s", blocs_data)
+    if blocs_data and incremental:
+        sets_listing = fetch_data(sets_url, SETS_SCHEMA)
+        if sets_listing is None:
+            # Without the listing every set would look unchanged
+            error("Could not fetch the sets listing, incremental pass of '%s' aborted", lang)
+            return
+        sets_to_visit = select_sets_to_visit(watermark, sets_listing, lookback_days)
+        info("Incremental mode: %s set(s) to visit (watermark: %s, %s)", len(sets_to_visit), watermark["newest_set"], watermark["newest_release_date"])
+        wanted_blocs = locate_sets_blocs(blocs_data, blocs_url, watermark, sets_to_visit, bloc_details)
+        save_watermark(lang, watermark)
+
+    scoped = bool(bloc_ids or set_ids)
+    bloc_ids = set(bloc_ids or ())
+    set_ids = set(set_ids or ())
+    scope_blocs = set(bloc_ids)
+    if blocs_data and set_ids:
+        # Bloc of each requested set, read from the set detail (memoized for the crawl)
+        for set_code in set_ids:
+            scoped_set = fetch_data(f"{sets_url}/{set_code}", SET_SCHEMA)
+            if scoped_set is None or not scoped_set["serie"]:
+                error("Set '%s' not found in the API. Skipping...", set_code)
+                continue
+            scope_blocs.add(scoped_set["serie"]["id"])
     if blocs_data:
         for bloc_position, bloc_data in enumerate(blocs_data, 1):
             if bloc_data["id"] == "tcgp":
                 debug("Skipping bloc: %s", bloc_data["id"])
                 continue
+            if incremental and bloc_data["id"] not in wanted_blocs:
+                debug("Incremental mode: nothing to visit in bloc %s", bloc_data["id"])
+                continue
+            if scoped and bloc_data["id"] not in scope_blocs:
+                continue
             info("Scrapping bloc: %s", bloc_data["id"])
             
             # Get the actual tcg_language_id (integer) from database
@@ -158,9 +583,13 @@ def scrap_poke_data(connection, lang: str):
             translation_slug = f"{bloc_slug}/translation/{api_langs[lang]}"
             insert_bloc_translation(connection, BlocTranslation(translation_slug, bloc_id, bloc_data["name"], "", language_ids[lang]))
             # Fetch the sets
-            sets_data = fetch_data(f"{blocs_url}/{bloc_data["id"]}")
+            sets_data = bloc_details.get(bloc_data["id"]) or fetch_data(f"{blocs_url}/{bloc_data["id"]}", SERIE_SCHEMA)
             if sets_data:
                 for set_position, set_data in enumerate(sets_data["sets"], 1):
+                    if sets_to_visit is not None and set_data["id"] not in sets_to_visit:
+                        continue
+                    if scoped and bloc_data["id"] not in bloc_ids and set_data["id"] not in set_ids:
+                        continue
                     # Insert the sets
                     # Create set slug in the format: poke-fr/sv/sv1 (using bloc slug + clean set id)
                     set_slug = f"{bloc_slug}/{set_data['id']}"
@@ -177,170 +606,80 @@ def scrap_poke_data(connection, lang: str):
                     insert_set_translation(connection, SetTranslation(set_translation_slug, set_id, set_data["name"], "", language_ids[lang]))
             
                     # Fetch the set cards
-                    sets_data = fetch_data(f"{sets_url}/{set_data["id"]}")
-                    for card_position, card_global_data in enumerate(sets_data["cards"]): 
+                    set_detail = fetch_data(f"{sets_url}/{set_data["id"]}", SET_SCHEMA)
+                    if set_detail is None:
+                        continue
+                    # GraphQL prefetch, done on the first card that has to be fetched
+                    set_cards = None
+                    # Cards skipped, dropped by the validation or rolled back, the watermark only moves past a complete set
+                    set_failures = dropped(set_detail, "cards")
+                    failed_before = len(getattr(connection, "failed", ()))
+                    for card_position, card_global_data in enumerate(set_detail["cards"]): 
                         # Create card slug in the format: set_slug/card_localId (with cleaned format)
                         card_slug = f"{set_slug}/{card_global_data['localId']}"
                         
                         debug("Processing card with slug: '%s' (position: %s)", card_slug, card_global_data['localId'])
                         exist = get_card_id(connection, card_slug)
+                        already_scrapped = False
                         if exist != 0:
                             if check_pokemon_card(connection, exist) != 0 or check_energy_card(connection, exist) != 0 or check_trainer_card(connection, exist) != 0:
-                                debug("Already scrapped Card: %s - %s", card_global_data["id"], card_global_data["name"])
-                                continue
+                                already_scrapped = True
+                                if not refresh:
+                                    debug("Already scrapped Card: %s - %s", card_global_data["id"], card_global_data["name"])
+                                    # Backfill: the image URL of the set listing, cards scrapped before the downloader existed
+                                    if image_downloader is not None:
+                                        image_downloader.submit(card_slug, card_image_url(card_global_data))
+                                    continue
                         # Fetch the card data
-                        card_data = fetch_data(f"{cards_url}/{card_global_data["id"]}")
+                        if set_cards is None:
+                            set_cards = prefetch_set_cards(graphql_url, lang, set_data["id"])
+                        requests_before = http_client.network_requests()
+                        card_data = fetch_card(cards_url, card_global_data["id"], set_cards)
+                        # Only a card fetched from the API is paced, not one from GraphQL, the memo or the cache
+                        fetched = http_client.network_requests() != requests_before
                         if card_data == None:
+                            set_failures += 1
                             continue
                         debug("Card data: %s", card_data)
-                        
-                        # Add or get the illustrator id
-                        if card_data.get("illustrator"):
-                            id_illustrator = insert_illustrator(connection, Illustrator(card_data["illustrator"]))
-                        else:
-                            id_illustrator = insert_illustrator(connection, Illustrator("Unknown"))
-                        # Get the category id
-                        id_category = get_category_id_by_name(connection, card_data["category"])
-                        # Get the rarity id (with auto-create enabled)
-                        id_rarity = get_rarity_id_by_name(connection, card_data["rarity"], language_ids[lang], auto_create=True)
-
-                        # Validate required foreign keys before insert
-                        if id_category == 0 or id_category is None:
-                            error("Invalid category_id for card '%s'. Category: '%s'. Skipping...", card_slug, card_data["category"])
-                            continue
-
-                        if id_rarity == 0 or id_rarity is None:
-                            error("Invalid rarity_id for card '%s'. Rarity: '%s'. Skipping...", card_slug, card_data["rarity"])
-                            continue
 
-                        # Insert the card (use cleaned position format)
-                        card_id = insert_card(connection, Card(card_slug, card_data["localId"], id_category, id_rarity, set_id, id_illustrator))
+                        if image_downloader is not None:
+                            image_downloader.submit(card_slug, card_image_url(card_data))
 
-                        if card_id is None:
-                            error("Failed to create card '%s'. Skipping...", card_slug)
-                            error("Card data received from API: %s", card_data)
-                            error("Card object details: slug='%s', position='%s', category_id=%s, rarity_id=%s, set_id=%s, illustrator_id=%s",
-                                  card_slug, card_data["localId"], id_category, id_rarity, set_id, id_illustrator)
+                        if already_scrapped:
+                            with card_unit(connection, card_slug) as unit:
+                                # Only a failed update rolls the card back, an unchanged one is fine
+                                if refresh_card(connection, lang, exist, card_slug, card_data, set_id) is None:
+                                    if unit:
+                                        unit.fail()
+                                    else:
+                                        set_failures += 1
+                            # Sleep to avoid overwhelming the API
+                            if fetched:
+                                time.sleep(0.5)
                             continue
-                            
-                        # Add card translation
-                        if card_data.get("description"):
-                            description = card_data["description"]
-                        elif card_data.get("effect"):
-                            description = card_data["effect"]
-                        else:
-                            description = None
-                        card_translation_slug = f"{card_slug}/translation/{api_langs[lang]}"
-                        translation_id = insert_card_translation(connection, card_translation_slug, card_id, language_ids[lang], card_data["name"], description)
                         
-                        if translation_id is None:
-                            error("Failed to create card translation for card_id=%s", card_id)
-                            error("Card translation data: slug='%s', name='%s', description='%s', language_id=%s", 
-                                  card_translation_slug, card_data["name"], description, language_ids[lang])
-                            error("Original card data: %s", card_data)
-                        
-                        # Insert the card type
-                        debug("Processing card type with category ID: %s", id_category)
-                        debug("Available category IDs: %s", CATEGORY_IDS)
-                        
-                        if id_category == CATEGORY_IDS.get('ENERGY', -1):
-                            energy_card_slug = f"{card_slug}/energy"
-                            energy_result = insert_energy_card(connection, energy_card_slug, card_id, card_data["name"], language_ids[lang])
-                            if energy_result is None:
-                                error("Failed to create energy card for card_id=%s", card_id)
-                                error("Energy card data: slug='%s', energy_type='%s'", energy_card_slug, card_data["name"])
-                                error("Original card data: %s", card_data)
-                        elif id_category == CATEGORY_IDS.get('TRAINER', -1):
-                            trainer_card_slug = f"{card_slug}/trainer"
-                            trainer_result = insert_trainer_card(connection, trainer_card_slug, card_id)
-                            if trainer_result is None:
-                                error("Failed to create trainer card for card_id=%s", card_id)
-                                error("Trainer card data: slug='%s'", trainer_card_slug)
-                                error("Original card data: %s", card_data)
-                        elif id_category == CATEGORY_IDS.get('POKEMON', -1):
-                            # Use regex-based name cleaning instead of fragile string splitting
-                            real_pokemon_name = clean_pokemon_name(card_data["name"])
-                            if card_data.get("dexId"):
-                                # Insert pokemon if not exists
-                                # Clean the slug format for pokemon translation
-                                pokemon_slug = f"{lang}/pokemon/{card_data['dexId'][0]}"
-                                pokemon_id = insert_pokemon_if_not_exist(connection, card_data["dexId"][0], pokemon_slug, real_pokemon_name, language_ids[lang])
-                                if pokemon_id is None:
-                                    error("Failed to create pokemon for dex_id=%s", card_data["dexId"][0])
-                                    error("Pokemon data: slug='%s', name='%s'", pokemon_slug, card_data["name"])
-                                    error("Original card data: %s", card_data)
-                            else:
-                                # Try multiple strategies to find the pokemon
-                                dexId = 0
-
-                                # Strategy 1: Try first word of card name
-                                name_parts = card_data["name"].split(' ')
-                                if name_parts:
-                                    dexId = get_pokemon_id_by_name(connection, name_parts[0], language_ids[lang])
-
-                                # Strategy 2: Try second word if available
-                                if dexId == 0 and len(name_parts) > 1:
-                                    dexId = get_pokemon_id_by_name(connection, name_parts[1], language_ids[lang])
-
-                                # Strategy 3: Try cleaned pokemon name
-                                if dexId == 0:
-                                    dexId = get_pokemon_id_by_name(connection, real_pokemon_name, language_ids[lang])
-
-                                # If still not found, log error and skip this card
-                                if dexId == 0:
-                                    error("Could not determine dexId for pokemon card: '%s' (id: %s)", card_data["name"], card_data["id"])
-                                    error("Cleaned name: '%s'. Skipping this card.", real_pokemon_name)
-                                    error("Original card data: %s", card_data)
-                                    continue
-
-                                # Clean the slug format for pokemon translation
-                                pokemon_slug = f"pokemon/{dexId}/{lang}"
-                                pokemon_id = insert_pokemon_if_not_exist(connection, dexId, pokemon_slug, real_pokemon_name, language_ids[lang])
-                                if pokemon_id is None:
-                                    error("Failed to create pokemon for dex_id=%s", dexId)
-                                    error("Pokemon data: slug='%s', name='%s'", pokemon_slug, card_data["name"])
-                                    error("Original card data: %s", card_data)
-                            # Insert the pokemon card
-                            if card_data.get("level"):
-                                level = card_data["level"]
-                            else:
-                                level = 0
-                            if card_data.get("hp"):
-                                hp = card_data["hp"]
-                            else:
-                                hp = 0
-                            pokemon_card_slug = f"{card_slug}/pokemon"
-                            pokemon_card_id = insert_pokemon_card(connection, PokemonCard(pokemon_card_slug, card_id, pokemon_id, hp, level))
-                            
-                            if pokemon_card_id is None:
-                                error("Failed to create pokemon card for card_id=%s", card_id)
-                                error("Pokemon card data: slug='%s', pokemon_id=%s, hp=%s, level=%s", pokemon_card_slug, pokemon_id, hp, level)
-                                error("Original card data: %s", card_data)
-                            
-                            if  card_data.get("types"):
-                                # Insert the pokemon card elements
-                                for type in card_data["types"]:
-                                    insert_pokemon_card_element(connection, pokemon_card_id, type, language_ids[lang])
-                        else:
-                            error("Invalid category: %s", id_category)
-
-                        # Note: Card rarity is already stored in card.rarity_id
-                        # No need for separate card_rarity table since cards have only one rarity
-
-                        # Add card variants
-                        if card_data["variants"]["firstEdition"] == True:
-                            insert_card_variant(connection, card_id, "firstEdition")
-                        if card_data["variants"]["holo"] == True:
-                            insert_card_variant(connection, card_id, "holo")
-                        if card_data["variants"]["normal"] == True:
-                            insert_card_variant(connection, card_id, "normal")
-                        if card_data["variants"]["reverse"] == True:
-                            insert_card_variant(connection, card_id, "reverse")
-                        if card_data["variants"]["wPromo"] == True:
-                            insert_card_variant(connection, card_id, "wPromo")
-
-                        info("Scrapped card: %s - %s", card_data["id"], card_data["name"])
+                        with card_unit(connection, card_slug) as unit:
+                            if insert_new_card(connection, lang, card_slug, card_data, set_id) is None:
+                                # A failed unit is counted through connection.failed
+                                if unit:
+                                    unit.fail()
+                                else:
+                                    set_failures += 1
                         # Sleep to avoid overwhelming the API
-                        time.sleep(0.5)
+                        if fetched:
+                            time.sleep(0.5)
+
+                    # Commit the cards of the set before moving the watermark
+                    connection.commit()
+                    set_failures += len(getattr(connection, "failed", ())) - failed_before
+                    if set_failures:
+                        error("Set '%s': %s card(s) failed, the watermark is not moved past it", set_slug, set_failures)
+                    else:
+                        # Move the watermark forward once the whole set went through
+                        record_set(watermark, set_data["id"], bloc_data["id"], set_detail.get("releaseDate"), set_data["cardCount"]["total"])
+                        save_watermark(lang, watermark)
+                    dex_id_cache.save()
+
+            info("Scrapped Bloc: %s", bloc_data["name"])
 
-            info("Scrapped Bloc: %s", bloc_data["name"])
\ No newline at end of file
+    info("HTTP: %s", http_client.stats())
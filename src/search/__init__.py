@@ -0,0 +1 @@
+# src/search/__init__.py
@@ -0,0 +1,220 @@
+"""
+Fuzzy search over card and Pokémon names.
+
+Names of card_translation and pokemon_translation are folded like the SEO paths
+(clean_seo_name: lower case, accents replaced, punctuation dropped) and split
+into trigrams, every word padded as "  word ". Each language has an inverted
+index trigram -> sorted ids of the distinct folded names, each name pointing to
+the cards and Pokémon that carry it.
+
+A query is ranked by trigram similarity (shared / union of the trigram sets),
+with a bonus when the folded query is a prefix or a part of the name. A name
+needs at least min_similarity * |query trigrams| shared trigrams, so only the
+rarest posting lists are scanned, the longer ones are probed by bisection for
+the candidates they produced.
+
+refresh() brings the index up to date after a crawl: each table is checked with
+one MAX(id)/COUNT(*)/checksum query, rows appended since the last build are
+added, anything else (renamed or deleted rows) rebuilds the language maps.
+"""
+import math
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+import mysql.connector
+from ..database.card import clean_seo_name
+from ..scrapper.scrapper import language_ids
+from ..utils.logger import debug, info, error
+from ..utils.text import fold_name
+
+LANGUAGE_CODES = {language_id: code for code, language_id in language_ids.items()}
+MIN_SIMILARITY = 0.3
+SLUGS_PER_RESULT = 20
+
+# table -> rows (id, kind, lang id, name, slug) of a source, after a given id
+SOURCES = {
+    "card_translation": """
+        SELECT ct.id, 'card', ct.translation_language_id, ct.name, c.slug
+        FROM card_translation ct JOIN card c ON c.id = ct.card_id
+        WHERE ct.id > %s ORDER BY ct.id
+    """,
+    "pokemon_translation": """
+        SELECT id, 'pokemon', translation_language_id, name, slug
+        FROM pokemon_translation
+        WHERE id > %s ORDER BY id
+    """,
+}
+
+
+def fold_query(name: str) -> str:
+    """Folded form of a name, words separated by spaces"""
+    folded = clean_seo_name(name).replace("-", " ")
+    # Names without any latin letter (Japanese) are emptied by the SEO folding
+    return folded if folded else fold_name(name)
+
+def trigrams(folded: str) -> set:
+    grams = set()
+    for word in folded.split():
+        padded = f"  {word} "
+        grams.update(padded[index:index + 3] for index in range(len(padded) - 2))
+    return grams
+
+
+class LanguageIndex:
+    """Trigram index of the distinct names of one language"""
+    def __init__(self):
+        self.names = []
+        self.folded = []
+        self.gram_counts = []
+        # (kind, slug) of every card or Pokémon carrying the name
+        self.refs = []
+        self.ids = {}
+        self.postings = {}
+
+    def add(self, kind: str, name: str, slug: str):
+        folded = fold_query(name or "")
+        if not folded:
+            return
+        name_id = self.ids.get(folded)
+        if name_id is None:
+            name_id = self.ids[folded] = len(self.names)
+            grams = trigrams(folded)
+            self.names.append(name)
+            self.folded.append(folded)
+            self.gram_counts.append(len(grams))
+            self.refs.append([])
+            for gram in grams:
+                posting = self.postings.get(gram)
+                if posting is None:
+                    posting = self.postings[gram] = array("I")
+                # Ids only grow, every posting list stays sorted
+                posting.append(name_id)
+        self.refs[name_id].append((kind, slug))
+
+    def search(self, query: str, limit: int = 10, kind: str = None, min_similarity: float = MIN_SIMILARITY) -> list:
+        folded = fold_query(query)
+        grams = trigrams(folded)
+        if not grams:
+            return []
+        lists = sorted((self.postings.get(gram, ()) for gram in grams), key=len)
+        needed = max(1, math.ceil(min_similarity * len(grams)))
+        # A name missing from every one of the rarest len - needed + 1 lists cannot share needed trigrams
+        scanned = len(lists) - needed + 1
+        shared = {}
+        for posting in lists[:scanned]:
+            for name_id in posting:
+                shared[name_id] = shared.get(name_id, 0) + 1
+        for posting in lists[scanned:]:
+            size = len(posting)
+            for name_id in shared:
+                position = bisect_left(posting, name_id)
+                if position < size and posting[position] == name_id:
+                    shared[name_id] += 1
+
+        results = []
+        for name_id, count in shared.items():
+            similarity = count / (len(grams) + self.gram_counts[name_id] - count)
+            if count < needed or similarity < min_similarity:
+                continue
+            refs = self.refs[name_id] if kind is None else [ref for ref in self.refs[name_id] if ref[0] == kind]
+            if not refs:
+                continue
+            name = self.folded[name_id]
+            score = similarity + (0.5 if name.startswith(folded) else 0.25 if folded in name else 0.0)
+            results.append((score, name_id, refs))
+        results.sort(key=lambda result: (-result[0], len(self.folded[result[1]]), self.folded[result[1]]))
+
+        return [{
+            "name": self.names[name_id],
+            "score": round(score, 3),
+            "cards": sum(1 for ref_kind, _ in refs if ref_kind == "card"),
+            "pokemon": next((slug for ref_kind, slug in refs if ref_kind == "pokemon"), None),
+            "slugs": [slug for ref_kind, slug in refs if ref_kind == "card"][:SLUGS_PER_RESULT],
+        } for score, name_id, refs in results[:limit]]
+
+
+class SearchIndex:
+    def __init__(self):
+        self.languages = {}
+        # table -> (max id, row count, checksum) of the rows indexed
+        self.stamps = {}
+        self.lock = threading.Lock()
+
+    def stamp(self, cursor, table: str, up_to=None) -> tuple:
+        if up_to is None:
+            cursor.execute(f"SELECT IFNULL(MAX(id), 0), COUNT(*), IFNULL(BIT_XOR(CRC32(CONCAT_WS('|', id, name))), 0) FROM `{table}`")
+        else:
+            cursor.execute(f"SELECT IFNULL(MAX(id), 0), COUNT(*), IFNULL(BIT_XOR(CRC32(CONCAT_WS('|', id, name))), 0) FROM `{table}` WHERE id <= %s",
+                           (up_to,))
+        return tuple(int(value) for value in cursor.fetchone())
+
+    def load_rows(self, cursor, languages: dict, table: str, after_id: int) -> int:
+        cursor.execute(SOURCES[table], (after_id,))
+        count = 0
+        for _, kind, language_id, name, slug in cursor.fetchall():
+            lang = LANGUAGE_CODES.get(language_id)
+            if lang is None:
+                continue
+            if lang not in languages:
+                languages[lang] = LanguageIndex()
+            languages[lang].add(kind, name, slug)
+            count += 1
+        return count
+
+    def refresh(self, conn) -> bool:
+        """Build the index, or add the rows appended since the last build. False if the database could not be read."""
+        started = time.perf_counter()
+        cursor = None
+        try:
+            # Ends the transaction of the previous refresh, its consistent read would hide the new rows
+            conn.commit()
+            cursor = conn.cursor()
+            stamps = {table: self.stamp(cursor, table) for table in SOURCES}
+            appended = bool(self.stamps)
+            for table, (max_id, row_count, _) in stamps.items():
+                previous = self.stamps.get(table)
+                if previous is None or max_id < previous[0] or row_count < previous[1]:
+                    appended = False
+                elif self.stamp(cursor, table, previous[0]) != previous:
+                    # Rows renamed or deleted among those already indexed
+                    appended = False
+                if not appended:
+                    break
+
+            if appended and stamps == self.stamps:
+                debug("Search index up to date")
+                return True
+            with self.lock:
+                # Appends go to the live language indexes through a copy of the map (a new language
+                # must not be added to the dict readers iterate), a rebuild is swapped in once complete
+                languages = dict(self.languages) if appended else {}
+                added = 0
+                for table in SOURCES:
+                    added += self.load_rows(cursor, languages, table, self.stamps[table][0] if appended else 0)
+                self.languages = languages
+                self.stamps = stamps
+            info("Search index %s: %s name(s) added in %.0f ms (%s)", "updated" if appended else "built", added,
+                 (time.perf_counter() - started) * 1000,
+                 ", ".join(f"{lang}: {len(index.names)} names" for lang, index in sorted(self.languages.items())))
+            return True
+
+        except mysql.connector.Error as err:
+            error("Error building the search index: %s", err)
+            return False
+
+        finally:
+            if cursor:
+                cursor.close()
+
+    def search(self, query: str, lang: str = "fr", limit: int = 10, kind: str = None) -> list:
+        # Lock-free: a refresh appends to the lists of an index or swaps in a new map, both safe to read meanwhile
+        index = self.languages.get(lang)
+        if index is None:
+            return []
+        return index.search(query, limit, kind)
+
+
+# Shared by the command line and the HTTP endpoint
+search_index = SearchIndex()
@@ -0,0 +1,97 @@
+"""
+Local HTTP endpoint of the search index.
+
+    GET  /search?q=dracofeu&lang=fr&limit=10&kind=card|pokemon
+    POST /refresh    add the names written since the last build (after a crawl)
+    GET  /health
+
+Answers are JSON. The index is built at startup and refreshed every
+refresh_interval seconds when it is set. Meant for local use: it binds to
+127.0.0.1 unless told otherwise.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from ..utils.logger import info, error
+from .index import search_index
+
+MAX_LIMIT = 100
+
+
+class SearchHandler(BaseHTTPRequestHandler):
+    # Set by serve()
+    connection = None
+    connection_lock = threading.Lock()
+
+    def send_json(self, status: int, payload: dict):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/health":
+            return self.send_json(200, {"status": "ok", "languages": {lang: len(index.names) for lang, index in search_index.languages.items()}})
+        if url.path != "/search":
+            return self.send_json(404, {"error": "not found"})
+
+        params = parse_qs(url.query)
+        query = params.get("q", [""])[0].strip()
+        if not query:
+            return self.send_json(400, {"error": "missing q parameter"})
+        kind = params.get("kind", [None])[0]
+        if kind not in (None, "card", "pokemon"):
+            return self.send_json(400, {"error": "kind must be card or pokemon"})
+        try:
+            limit = min(MAX_LIMIT, max(1, int(params.get("limit", ["10"])[0])))
+        except ValueError:
+            return self.send_json(400, {"error": "limit must be an integer"})
+        lang = params.get("lang", ["fr"])[0]
+
+        started = time.perf_counter()
+        results = search_index.search(query, lang, limit, kind)
+        self.send_json(200, {"query": query, "lang": lang, "took_ms": round((time.perf_counter() - started) * 1000, 3),
+                             "results": results})
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/refresh":
+            return self.send_json(404, {"error": "not found"})
+        with self.connection_lock:
+            refreshed = search_index.refresh(self.connection)
+        self.send_json(200 if refreshed else 500, {"refreshed": refreshed})
+
+    def log_message(self, format, *args):
+        # Requests are not logged, errors go through the logger
+        pass
+
+
+def refresh_periodically(connection, interval: float, stopped: threading.Event):
+    while not stopped.wait(interval):
+        with SearchHandler.connection_lock:
+            search_index.refresh(connection)
+
+def serve(connection, host: str = "127.0.0.1", port: int = 8765, refresh_interval: float = None):
+    """Build the index and answer search requests until interrupted"""
+    if not search_index.refresh(connection):
+        error("Search index could not be built, not serving")
+        return False
+    SearchHandler.connection = connection
+    server = ThreadingHTTPServer((host, port), SearchHandler)
+    stopped = threading.Event()
+    if refresh_interval:
+        threading.Thread(target=refresh_periodically, args=(connection, refresh_interval, stopped), daemon=True).start()
+    info("Search endpoint on http://%s:%s/search?q=...", host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stopped.set()
+        server.server_close()
+    return True
@@ -0,0 +1 @@
+# src/stats/__init__.py
@@ -0,0 +1,284 @@
+"""
+Catalog statistics over a columnar card snapshot.
+
+The cards are loaded once into NumPy arrays, one per column, either from the
+database (one streamed query for the cards plus the series, rarity and
+illustrator reference tables) or from the Parquet dataset of the export. Text
+columns are encoded as integer codes, every aggregate is a bincount over
+(group code, value code) pairs, so a report of the whole catalog grouped by
+set, bloc or language takes milliseconds:
+- cards per kind (pokemon, energy, trainer, missing subtype) and untranslated cards
+- completeness: cards in the database against the card count of the set
+- rarity distribution, HP histogram (bins of HP_BIN) and mean HP
+- most frequent illustrators
+
+Requires NumPy (python3 -m pip install numpy), the Parquet source also requires pyarrow.
+
+Usage:
+    python main.py stats [--by set|bloc|lang] [--parquet DIR] [--json]
+"""
+import os
+import time
+
+import mysql.connector
+from ..utils.logger import info, error
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+GROUP_BY = ("set", "bloc", "lang")
+KINDS = ("missing", "pokemon", "energy", "trainer")
+HP_BIN = 10
+# HP above the last bin is counted in it
+HP_BINS = 34
+TOP_ILLUSTRATORS = 5
+NONE_LABEL = ""
+FETCH_SIZE = 5000
+
+SERIES_QUERY = """
+    SELECT s.id, s.slug, s.card_number, b.slug, tl.slug
+    FROM serie s
+    JOIN bloc b ON b.id = s.bloc_id
+    JOIN tcg_language tl ON tl.id = b.tcg_language_id
+"""
+
+CARDS_QUERY = """
+    SELECT c.serie_id, IFNULL(c.rarity_id, 0), IFNULL(c.illustrator_id, 0), IFNULL(pc.hp, -1),
+        CASE WHEN pc.id IS NOT NULL THEN 1 WHEN ec.id IS NOT NULL THEN 2 WHEN tc.id IS NOT NULL THEN 3 ELSE 0 END,
+        EXISTS(SELECT 1 FROM card_translation ct WHERE ct.card_id = c.id)
+    FROM card c
+    LEFT JOIN pokemon_card pc ON pc.card_id = c.id
+    LEFT JOIN energy_card ec ON ec.card_id = c.id
+    LEFT JOIN trainer_card tc ON tc.card_id = c.id
+"""
+
+# Rarities are labelled by their slug in both sources, the translated name depends on the language
+PARQUET_COLUMNS = ["lang", "set_slug", "set_card_count", "bloc_slug", "rarity_slug", "illustrator", "hp", "kind"]
+
+
+class CardSnapshot:
+    """
+    One array per column, one row per card. Text columns are (codes, labels):
+    labels[codes[i]] is the value of card i.
+    """
+    def __init__(self, sets, blocs, langs, rarities, illustrators, hp, kind, translated, set_sizes, set_groups):
+        self.sets = sets
+        self.blocs = blocs
+        self.langs = langs
+        self.rarities = rarities
+        self.illustrators = illustrators
+        # float64, NaN for cards without HP
+        self.hp = hp
+        # index in KINDS
+        self.kind = kind
+        self.translated = translated
+        # Card count announced by each set and its bloc and lang codes, aligned with the set labels
+        self.set_sizes = set_sizes
+        self.set_groups = set_groups
+
+    def __len__(self):
+        return len(self.hp)
+
+    def group(self, by: str):
+        return {"set": self.sets, "bloc": self.blocs, "lang": self.langs}[by]
+
+
+def encode(values):
+    """(codes, labels) of a column of strings, None is NONE_LABEL"""
+    labels, codes = numpy.unique(numpy.array([NONE_LABEL if value is None else str(value) for value in values], dtype=str),
+                                 return_inverse=True)
+    return codes, labels
+
+def lookup(ids, id_labels: dict):
+    """(codes, labels) of an id column through an id -> label map, vectorized"""
+    keys = numpy.array(sorted(id_labels), dtype=numpy.int64)
+    positions = numpy.searchsorted(keys, ids)
+    positions = numpy.clip(positions, 0, max(len(keys) - 1, 0))
+    known = (keys[positions] == ids) if len(keys) else numpy.zeros(len(ids), dtype=bool)
+    key_labels = numpy.array([str(id_labels[key]) for key in keys.tolist()] + [NONE_LABEL], dtype=object)
+    positions = numpy.where(known, positions, len(keys))
+    labels, inverse = numpy.unique(key_labels.astype(str), return_inverse=True)
+    return inverse[positions], labels
+
+def fetch_pairs(conn, query: str) -> dict:
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query)
+        return {row[0]: row[1] for row in cursor.fetchall()}
+
+    except mysql.connector.Error as err:
+        error("Error loading reference rows: %s", err)
+        return {}
+
+    finally:
+        cursor.close()
+
+def load_from_database(conn) -> CardSnapshot:
+    """Snapshot of every card of the database, None if it could not be read"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SERIES_QUERY)
+        series = cursor.fetchall()
+    except mysql.connector.Error as err:
+        error("Error loading series: %s", err)
+        return None
+    finally:
+        cursor.close()
+    rarities = fetch_pairs(conn, "SELECT id, slug FROM rarity")
+    illustrators = fetch_pairs(conn, "SELECT id, name FROM illustrator")
+
+    # Columns are filled chunk by chunk from an unbuffered cursor
+    chunks = []
+    cursor = conn.cursor(buffered=False)
+    try:
+        cursor.execute(CARDS_QUERY)
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            chunks.append(numpy.array(rows, dtype=numpy.float64))
+    except mysql.connector.Error as err:
+        error("Error loading cards: %s", err)
+        return None
+    finally:
+        cursor.close()
+    cards = numpy.concatenate(chunks) if chunks else numpy.empty((0, 6))
+    hp = numpy.where(cards[:, 3] < 0, numpy.nan, cards[:, 3])
+
+    serie_ids = cards[:, 0].astype(numpy.int64)
+    sets, set_labels = lookup(serie_ids, {row[0]: row[1] for row in series})
+    blocs, bloc_labels = lookup(serie_ids, {row[0]: row[3] for row in series})
+    langs, lang_labels = lookup(serie_ids, {row[0]: row[4].removeprefix("poke-") for row in series})
+    # Sets without any card are in the labels too, their bloc and language come from the series rows
+    set_ids = numpy.array([{row[1]: row[0] for row in series}.get(label, -1) for label in set_labels.tolist()], dtype=numpy.int64)
+    set_groups = {"bloc": lookup(set_ids, {row[0]: row[3] for row in series})[0],
+                  "lang": lookup(set_ids, {row[0]: row[4].removeprefix("poke-") for row in series})[0]}
+    sizes = {row[1]: row[2] or 0 for row in series}
+    return CardSnapshot(
+        (sets, set_labels), (blocs, bloc_labels), (langs, lang_labels),
+        lookup(cards[:, 1].astype(numpy.int64), rarities),
+        lookup(cards[:, 2].astype(numpy.int64), illustrators),
+        hp, cards[:, 4].astype(numpy.intp), cards[:, 5] > 0,
+        numpy.array([sizes.get(label, 0) for label in set_labels.tolist()], dtype=numpy.int64),
+        set_groups
+    )
+
+def load_from_parquet(directory: str) -> CardSnapshot:
+    """Snapshot of the Parquet dataset written by the export (DIR or DIR/parquet/cards), None if it could not be read"""
+    try:
+        import pyarrow
+        import pyarrow.parquet as pyarrow_parquet
+    except ImportError:
+        error("pyarrow is not installed, the Parquet dataset cannot be read (python3 -m pip install pyarrow)")
+        return None
+
+    dataset = os.path.join(directory, "parquet", "cards")
+    if not os.path.isdir(dataset):
+        dataset = directory
+    try:
+        # The partition keys are also columns of the files
+        table = pyarrow_parquet.read_table(dataset, columns=PARQUET_COLUMNS, partitioning=None)
+    except (OSError, ValueError, pyarrow.ArrowException) as err:
+        error("Could not read the Parquet dataset %s (an older export needs python main.py export --full): %s", dataset, err)
+        return None
+    columns = {name: table.column(name).to_pylist() for name in PARQUET_COLUMNS}
+
+    # Set slugs start with the tcg language (poke-fr/...), they are unique across languages
+    set_keys = columns["set_slug"]
+    sets = encode(set_keys)
+    sizes = dict(zip(set_keys, columns["set_card_count"]))
+    kinds = {kind: index for index, kind in enumerate(KINDS)}
+    blocs = encode(columns["bloc_slug"])
+    langs = encode(columns["lang"])
+    # Every set of the dataset has cards, its first card gives its bloc and language
+    _, first_card = numpy.unique(sets[0], return_index=True)
+    return CardSnapshot(
+        sets, blocs, langs,
+        encode(columns["rarity_slug"]), encode(columns["illustrator"]),
+        numpy.array([numpy.nan if hp is None else hp for hp in columns["hp"]], dtype=numpy.float64),
+        numpy.array([kinds.get(kind, 0) for kind in columns["kind"]], dtype=numpy.intp),
+        numpy.ones(len(set_keys), dtype=bool),
+        numpy.array([sizes[label] or 0 for label in sets[1].tolist()], dtype=numpy.int64),
+        {"bloc": blocs[0][first_card], "lang": langs[0][first_card]}
+    )
+
+
+def crosstab(group_codes, groups: int, value_codes, values: int):
+    """Counts of every (group, value) pair, shape (groups, values)"""
+    return numpy.bincount(group_codes * values + value_codes, minlength=groups * values).reshape(groups, values)
+
+def distribution(row, labels) -> dict:
+    return {str(labels[index]) or "(none)": int(row[index]) for index in numpy.flatnonzero(row)}
+
+def compute_stats(snapshot: CardSnapshot, by: str = "set") -> list:
+    """Statistics of every group of cards (set, bloc or lang), as dicts"""
+    group_codes, group_labels = snapshot.group(by)
+    groups = len(group_labels)
+    cards = numpy.bincount(group_codes, minlength=groups)
+
+    # Card count announced by the sets of each group
+    if by == "set":
+        expected = snapshot.set_sizes
+    else:
+        expected = numpy.bincount(snapshot.set_groups[by], weights=snapshot.set_sizes, minlength=groups).astype(numpy.int64)
+
+    kinds = crosstab(group_codes, groups, snapshot.kind, len(KINDS))
+    untranslated = numpy.bincount(group_codes, weights=(~snapshot.translated).astype(numpy.float64), minlength=groups).astype(numpy.int64)
+    rarity_codes, rarity_labels = snapshot.rarities
+    rarities = crosstab(group_codes, groups, rarity_codes, len(rarity_labels))
+    illustrator_codes, illustrator_labels = snapshot.illustrators
+    illustrators = crosstab(group_codes, groups, illustrator_codes, len(illustrator_labels))
+
+    has_hp = ~numpy.isnan(snapshot.hp)
+    hp_groups = group_codes[has_hp]
+    hp = snapshot.hp[has_hp]
+    hp_bins = numpy.clip((hp // HP_BIN).astype(numpy.intp), 0, HP_BINS - 1)
+    hp_histogram = crosstab(hp_groups, groups, hp_bins, HP_BINS)
+    hp_count = numpy.bincount(hp_groups, minlength=groups)
+    hp_sum = numpy.bincount(hp_groups, weights=hp, minlength=groups)
+
+    stats = []
+    for index, label in enumerate(group_labels.tolist()):
+        if not cards[index] and not expected[index]:
+            continue
+        top = numpy.argsort(illustrators[index])[::-1][:TOP_ILLUSTRATORS]
+        stats.append({
+            by: label or "(none)",
+            "cards": int(cards[index]),
+            "expected": int(expected[index]),
+            "completeness": round(float(cards[index]) / expected[index], 4) if expected[index] else None,
+            "kinds": {kind: int(kinds[index, position]) for position, kind in enumerate(KINDS)},
+            "untranslated": int(untranslated[index]),
+            "rarities": distribution(rarities[index], rarity_labels),
+            "hp_histogram": {f"{bin_index * HP_BIN}": int(count) for bin_index, count in enumerate(hp_histogram[index]) if count},
+            "hp_mean": round(float(hp_sum[index] / hp_count[index]), 1) if hp_count[index] else None,
+            "top_illustrators": {str(illustrator_labels[position]) or "(none)": int(illustrators[index, position])
+                                 for position in top if illustrators[index, position]},
+        })
+    return stats
+
+def print_stats(stats: list, by: str, elapsed: float):
+    print(f"\nCatalog statistics per {by}: {len(stats)} group(s), computed in {elapsed * 1000:.1f} ms")
+    print(f"  {by:<28} {'cards':>7} {'expected':>8} {'complete':>8} {'no type':>7} {'untrans':>7} {'hp mean':>7}  top rarity / illustrator")
+    for entry in stats:
+        completeness = f"{entry['completeness'] * 100:.1f}%" if entry["completeness"] is not None else "-"
+        rarity = max(entry["rarities"].items(), key=lambda item: item[1])[0] if entry["rarities"] else "-"
+        illustrator = next(iter(entry["top_illustrators"]), "-")
+        print(f"  {entry[by][:28]:<28} {entry['cards']:>7} {entry['expected']:>8} {completeness:>8} {entry['kinds']['missing']:>7} "
+              f"{entry['untranslated']:>7} {entry['hp_mean'] if entry['hp_mean'] is not None else '-':>7}  {rarity} / {illustrator}")
+
+def run_stats(conn=None, parquet_dir: str = None, by: str = "set"):
+    """Load the snapshot (Parquet export if parquet_dir is set, database otherwise) and compute the statistics"""
+    if numpy is None:
+        error("NumPy is not installed, statistics are unavailable (python3 -m pip install numpy)")
+        return None
+    started = time.perf_counter()
+    snapshot = load_from_parquet(parquet_dir) if parquet_dir else load_from_database(conn)
+    if snapshot is None:
+        return None
+    loaded = time.perf_counter()
+    info("Stats: %s card(s) loaded in %.1f ms", len(snapshot), (loaded - started) * 1000)
+    stats = compute_stats(snapshot, by)
+    return stats, time.perf_counter() - loaded
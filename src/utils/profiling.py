@@ -0,0 +1,162 @@
+"""
+Profiling of a crawl.
+
+run_profiled runs a function under cProfile while a sampling thread records the
+call stack of the crawl thread every few milliseconds. It writes:
+- profile.pstats: cProfile statistics (python -m pstats, snakeviz, ...)
+- profile.collapsed: sampled stacks in collapsed format ("a;b;c count"), the
+  input of flamegraph.pl, speedscope or inferno
+and prints the top cumulative hot spots and the time spent per stage:
+fetch (HTTP and cache), transform (decoding, validation, records) and every
+helper of src/database, and the wall time spent in time.sleep (API pacing and
+retry backoff, none expected in an offline run).
+
+The sleeps are timed by a wrapper installed for the run: cProfile sees the
+sampling thread too since Python 3.12 and its waits blur the timing of the
+blocking calls of the crawl thread.
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+# Stage of the functions that are not database helpers: (file suffix, function name)
+STAGES = {
+    "fetch": (("scrapper/scrapper.py", "fetch_data"), ("scrapper/graphql.py", "fetch_set_cards")),
+    "transform": (("scrapper/decoding.py", "decode"), ("scrapper/records.py", "from_api"),
+                  ("scrapper/scrapper.py", "clean_pokemon_name")),
+}
+DATABASE_DIR = "/src/database/"
+
+
+class StackSampler(threading.Thread):
+    """Samples the stack of one thread, aggregated as collapsed stacks"""
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+    def write(self, path: str):
+        with open(path, "w", encoding="utf-8") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+class SleepTimer:
+    """Replaces time.sleep for the run, adding up the wall time slept by every thread"""
+    def __init__(self):
+        self.sleep = time.sleep
+        self.calls = 0
+        self.seconds = 0.0
+        self.lock = threading.Lock()
+
+    def __call__(self, seconds):
+        started = time.perf_counter()
+        try:
+            self.sleep(seconds)
+        finally:
+            slept = time.perf_counter() - started
+            with self.lock:
+                self.calls += 1
+                self.seconds += slept
+
+    def __enter__(self):
+        time.sleep = self
+        return self
+
+    def __exit__(self, *exc):
+        time.sleep = self.sleep
+
+
+def drop_sampler_entries(stats: pstats.Stats) -> pstats.Stats:
+    """
+    Remove the entries of the sampling thread, cProfile sees every thread since
+    Python 3.12 (sys.monitoring)
+    """
+    for key in list(stats.stats):
+        filename = key[0]
+        if filename == __file__ or filename == threading.__file__ or key[2] == "<built-in method sys._current_frames>":
+            del stats.stats[key]
+    for _, _, _, _, callers in stats.stats.values():
+        for key in [key for key in callers if key not in stats.stats and key[0] != "~"]:
+            del callers[key]
+    return stats
+
+def stage_times(stats: pstats.Stats) -> list:
+    """(stage, calls, cumulative seconds) of the fetch/transform stages and of every database helper"""
+    totals = {}
+    for (filename, _, function), (_, calls, _, cumulative, _) in stats.stats.items():
+        normalized = filename.replace("\\", "/")
+        stage = None
+        if DATABASE_DIR in normalized and not function.startswith("<"):
+            stage = f"db:{os.path.splitext(os.path.basename(filename))[0]}.{function}"
+        else:
+            for name, functions in STAGES.items():
+                if any(normalized.endswith(suffix) and function == target for suffix, target in functions):
+                    stage = name
+                    break
+        if stage is None:
+            continue
+        previous_calls, previous_time = totals.get(stage, (0, 0.0))
+        totals[stage] = (previous_calls + calls, previous_time + cumulative)
+    return sorted(((stage, calls, seconds) for stage, (calls, seconds) in totals.items()), key=lambda item: item[2], reverse=True)
+
+def print_report(stats: pstats.Stats, elapsed: float, sleep: SleepTimer = None, top: int = 25):
+    print(f"\nProfile: {elapsed:.1f}s wall time")
+    if sleep is not None:
+        print(f"Sleep: {sleep.calls} call(s) {sleep.seconds:.3f}s ({sleep.seconds / elapsed if elapsed else 0:.0%} of the wall time)")
+    print("\nTime per stage (cumulative, nested stages overlap):")
+    for stage, calls, seconds in stage_times(stats)[:top]:
+        print(f"  {stage:<48} {calls:>8} call(s) {seconds:>10.3f}s")
+
+    output = io.StringIO()
+    stats.stream = output
+    stats.sort_stats("cumulative").print_stats(top)
+    print("\nTop cumulative hot spots:")
+    print(output.getvalue())
+
+def run_profiled(func, output_dir: str, *args, **kwargs):
+    """Run func(*args, **kwargs) under the profilers, write the reports to output_dir, return its result"""
+    os.makedirs(output_dir, exist_ok=True)
+    sampler = StackSampler(threading.get_ident())
+    profiler = cProfile.Profile()
+    sleep = SleepTimer()
+    started = time.perf_counter()
+    sampler.start()
+    profiler.enable()
+    try:
+        with sleep:
+            return func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        sampler.stop()
+        elapsed = time.perf_counter() - started
+
+        stats_path = os.path.join(output_dir, "profile.pstats")
+        collapsed_path = os.path.join(output_dir, "profile.collapsed")
+        profiler.dump_stats(stats_path)
+        sampler.write(collapsed_path)
+        print_report(drop_sampler_entries(pstats.Stats(profiler)), elapsed, sleep)
+        print(f"Profile written to {stats_path} and {collapsed_path} (collapsed stacks for flamegraphs)")
@@ -0,0 +1,11 @@
+import re
+import unicodedata
+
+# Gender symbols are kept as words, so Nidoran♀ and Nidoran♂ stay two names
+GENDER_SYMBOLS = str.maketrans({'♀': ' f ', '♂': ' m '})
+
+def fold_name(name: str) -> str:
+    """Case and accent insensitive form of a name, words separated by single spaces"""
+    folded = unicodedata.normalize('NFKD', name.translate(GENDER_SYMBOLS).casefold())
+    folded = ''.join(char for char in folded if not unicodedata.combining(char))
+    return ' '.join(word for word in re.split(r'[^\w]+', folded) if word)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script for the HTTP client resilience
+Tests the CircuitBreaker state machine (closed, open, half-open probe) and RetryPolicy.delay
+"""
+
+import threading
+import time
+
+from src.scrapper.client import CircuitBreaker, RetryPolicy, parse_retry_after
+
+COOLDOWN = 0.2
+
+def opens_after_threshold():
+    breaker = CircuitBreaker(threshold=3, cooldown=COOLDOWN)
+    breaker.failure("api")
+    breaker.failure("api")
+    closed = breaker.open_until == 0.0
+    breaker.failure("api")
+    return closed, breaker.open_until > time.monotonic()
+
+def success_resets_failures():
+    breaker = CircuitBreaker(threshold=2, cooldown=COOLDOWN)
+    breaker.failure("api")
+    breaker.success()
+    breaker.failure("api")
+    return breaker.failures, breaker.open_until == 0.0
+
+def waits_for_cooldown_then_probes():
+    breaker = CircuitBreaker(threshold=1, cooldown=COOLDOWN)
+    breaker.failure("api")
+    started = time.monotonic()
+    breaker.acquire()
+    return time.monotonic() - started >= COOLDOWN * 0.9, breaker.probing
+
+def one_probe_at_a_time():
+    breaker = CircuitBreaker(threshold=1, cooldown=0.0)
+    breaker.failure("api")
+    breaker.acquire()
+    waiter = threading.Thread(target=breaker.acquire)
+    waiter.start()
+    waiter.join(COOLDOWN)
+    blocked = waiter.is_alive()
+    breaker.success()
+    waiter.join(COOLDOWN)
+    return blocked, waiter.is_alive(), breaker.open_until
+
+def failed_probe_reopens():
+    breaker = CircuitBreaker(threshold=3, cooldown=COOLDOWN)
+    for _ in range(3):
+        breaker.failure("api")
+    breaker.open_until = time.monotonic()
+    breaker.acquire()
+    # A single failure of the probe opens the circuit again, whatever the threshold
+    breaker.failures = 0
+    breaker.failure("api")
+    return breaker.probing, breaker.open_until > time.monotonic()
+
+def delays_within_backoff():
+    policy = RetryPolicy(retries=4, base_delay=1.0, max_delay=60.0)
+    return all(0 <= policy.delay(attempt) <= min(60.0, 2 ** attempt) for attempt in range(8) for _ in range(200))
+
+def delay_honours_retry_after():
+    policy = RetryPolicy(retries=4, base_delay=0.01, max_delay=60.0)
+    return min(policy.delay(0, retry_after=5.0) for _ in range(100))
+
+def delay_capped():
+    policy = RetryPolicy(retries=4, base_delay=1.0, max_delay=10.0)
+    return max(policy.delay(10, retry_after=120.0) for _ in range(100))
+
+# (description, check, expected)
+test_cases = [
+    # CircuitBreaker
+    ("opens after threshold failures", opens_after_threshold, (True, True)),
+    ("success resets the failures", success_resets_failures, (1, True)),
+    ("open circuit waits for the cooldown, then probes", waits_for_cooldown_then_probes, (True, True)),
+    ("other callers wait for the probe", one_probe_at_a_time, (True, False, 0.0)),
+    ("failed probe opens the circuit again", failed_probe_reopens, (False, True)),
+
+    # RetryPolicy and Retry-After
+    ("full jitter within the backoff", delays_within_backoff, True),
+    ("delay at least Retry-After", delay_honours_retry_after, 5.0),
+    ("delay capped by max_delay", delay_capped, 10.0),
+    ("Retry-After in seconds", lambda: parse_retry_after("3"), 3.0),
+    ("Retry-After missing", lambda: parse_retry_after(None), None),
+    ("Retry-After invalid", lambda: parse_retry_after("soon"), None),
+    ("Retry-After date in the past", lambda: parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0),
+]
+
+def run_tests():
+    print("Testing the circuit breaker and the retry policy")
+    print("=" * 80)
+
+    passed = 0
+    failed = 0
+
+    for description, check, expected_output in test_cases:
+        actual_output = check()
+        status = "✓ PASS" if actual_output == expected_output else "✗ FAIL"
+
+        if actual_output == expected_output:
+            passed += 1
+            print(f"{status} | {description} -> {actual_output!r}")
+        else:
+            failed += 1
+            print(f"{status} | {description}")
+            print(f"       Expected: {expected_output!r}")
+            print(f"       Got:      {actual_output!r}")
+
+    print("=" * 80)
+    print(f"Results: {passed} passed, {failed} failed out of {len(test_cases)} tests")
+
+    if failed == 0:
+        print("✓ All tests passed!")
+        return 0
+    else:
+        print(f"✗ {failed} test(s) failed")
+        return 1
+
+
+if __name__ == "__main__":
+    exit(run_tests())
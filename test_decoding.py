@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test script for the decoding of API responses
+Tests the schema validation of decode: defaults, required fields and invalid list items
+"""
+
+from src.scrapper.decoding import decode, dropped, SchemaError, SET_SCHEMA, CARD_SCHEMA
+
+def decode_error(raw, schema):
+    try:
+        decode(raw, schema)
+    except SchemaError as err:
+        return str(err)
+    return None
+
+def dropped_cards():
+    payload = decode(b'{"id": "sv01", "cards": [{"id": "sv01-001", "localId": "001"}, {"id": "sv01-002"}, 3]}', SET_SCHEMA)
+    return [card["id"] for card in payload["cards"]], dropped(payload, "cards")
+
+def complete_set():
+    payload = decode(b'{"id": "sv01", "cards": [{"id": "sv01-001", "localId": "001"}]}', SET_SCHEMA)
+    return dropped(payload, "cards")
+
+def defaulted_card():
+    card = decode(b'{"id": "sv01-001", "localId": "001", "name": "Bulbizarre", "category": "Pokemon", "hp": "70", "dexId": [1]}',
+                  CARD_SCHEMA)
+    return card["hp"], card["dexId"], card["variants"], card["rarity"]
+
+# (description, check, expected)
+test_cases = [
+    ("invalid cards dropped and counted", dropped_cards, (["sv01-001"], 2)),
+    ("nothing dropped", complete_set, 0),
+    ("invalid optional fields defaulted", defaulted_card, (None, [1], {}, "None")),
+    ("missing required field", lambda: decode_error(b'{"name": "Bulbizarre"}', CARD_SCHEMA),
+     "id: missing or invalid required field (got None)"),
+    ("payload not an object", lambda: decode_error(b'3', CARD_SCHEMA), "payload: expected an object, got int"),
+]
+
+def run_tests():
+    print("Testing the decoding of API responses")
+    print("=" * 80)
+
+    passed = 0
+    failed = 0
+
+    for description, check, expected_output in test_cases:
+        actual_output = check()
+        status = "✓ PASS" if actual_output == expected_output else "✗ FAIL"
+
+        if actual_output == expected_output:
+            passed += 1
+            print(f"{status} | {description} -> {actual_output!r}")
+        else:
+            failed += 1
+            print(f"{status} | {description}")
+            print(f"       Expected: {expected_output!r}")
+            print(f"       Got:      {actual_output!r}")
+
+    print("=" * 80)
+    print(f"Results: {passed} passed, {failed} failed out of {len(test_cases)} tests")
+
+    if failed == 0:
+        print("✓ All tests passed!")
+        return 0
+    else:
+        print(f"✗ {failed} test(s) failed")
+        return 1
+
+
+if __name__ == "__main__":
+    exit(run_tests())
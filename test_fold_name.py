@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test script for the folding of pokemon names
+Tests fold_name and that Nidoran♀ / Nidoran♂ resolve to two pokemon (29 and 32)
+"""
+
+from src.utils.text import fold_name
+from src.database.pokemon import PokemonNameIndex, insert_pokemon_if_not_exist, pokemon_name_index
+
+FR = 1
+
+class MemoryCursor:
+    """Cursor answering the pokemon queries from the tables of a MemoryConnection"""
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+        self.rowcount = 0
+        self.lastrowid = None
+
+    def execute(self, query, params=()):
+        pokemon, translations = self.conn.pokemon, self.conn.translations
+        if query.startswith("SELECT slug, name, pokemon_id FROM pokemon_translation"):
+            self.rows = [(slug, name, pokemon_id) for slug, name, pokemon_id, lang in translations if lang == params[0]]
+        elif query.startswith("SELECT id FROM pokemon_translation"):
+            self.rows = [(index + 1,) for index, row in enumerate(translations) if row[0] == params[0]]
+        elif query.startswith("SELECT id FROM pokemon "):
+            self.rows = [(int(params[0]),)] if int(params[0]) in pokemon else []
+        elif query.startswith("INSERT INTO pokemon "):
+            pokemon.add(int(params[0]))
+        elif query.startswith("INSERT INTO pokemon_translation"):
+            translations.append(params)
+            self.lastrowid = len(translations)
+        else:
+            raise AssertionError(f"Unexpected query: {query}")
+        self.rowcount = len(self.rows)
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+class MemoryConnection:
+    def __init__(self):
+        self.pokemon = set()
+        # (slug, name, pokemon_id, translation_language_id)
+        self.translations = []
+
+    def cursor(self):
+        return MemoryCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+def nidoran_pair():
+    pokemon_name_index.reset()
+    conn = MemoryConnection()
+    female = insert_pokemon_if_not_exist(conn, 29, "fr/pokemon/29", "Nidoran♀", FR)
+    male = insert_pokemon_if_not_exist(conn, 32, "fr/pokemon/32", "Nidoran♂", FR)
+    return female, male, sorted(conn.pokemon)
+
+def nidoran_index():
+    index = PokemonNameIndex()
+    index.names[FR], index.tries[FR] = {}, {}
+    index.add(FR, "Nidoran♀", 29)
+    index.add(FR, "Nidoran♂", 32)
+    return index.find(None, "Nidoran♀", FR), index.find(None, "Nidoran♂", FR), index.find(None, "Nidoran♂ de Giovanni", FR)
+
+def known_dex_id_other_name():
+    # A pokemon found by dexId gets the translation of the new language
+    pokemon_name_index.reset()
+    conn = MemoryConnection()
+    insert_pokemon_if_not_exist(conn, 32, "fr/pokemon/32", "Nidoran♂", FR)
+    pokemon_id = insert_pokemon_if_not_exist(conn, 32, "en/pokemon/32", "Nidoran♂", 2)
+    return pokemon_id, [slug for slug, _, _, _ in conn.translations]
+
+# (description, check, expected)
+test_cases = [
+    # fold_name
+    ("case and accents", lambda: fold_name("Méga-Dracaufeu X-ex"), "mega dracaufeu x ex"),
+    ("female symbol kept as a word", lambda: fold_name("Nidoran♀"), "nidoran f"),
+    ("male symbol kept as a word", lambda: fold_name("Nidoran♂"), "nidoran m"),
+    ("symbol after a space", lambda: fold_name("Nidoran ♂ GX"), "nidoran m gx"),
+
+    # Nidoran♀ / Nidoran♂ regression
+    ("insert resolves by dexId", nidoran_pair, (29, 32, [29, 32])),
+    ("name index keeps the pair apart", nidoran_index, (29, 32, 32)),
+    ("known dexId in another language", known_dex_id_other_name, (32, ["fr/pokemon/32", "en/pokemon/32"])),
+]
+
+def run_tests():
+    print("Testing the folding of pokemon names")
+    print("=" * 80)
+
+    passed = 0
+    failed = 0
+
+    for description, check, expected_output in test_cases:
+        actual_output = check()
+        status = "✓ PASS" if actual_output == expected_output else "✗ FAIL"
+
+        if actual_output == expected_output:
+            passed += 1
+            print(f"{status} | {description} -> {actual_output!r}")
+        else:
+            failed += 1
+            print(f"{status} | {description}")
+            print(f"       Expected: {expected_output!r}")
+            print(f"       Got:      {actual_output!r}")
+
+    print("=" * 80)
+    print(f"Results: {passed} passed, {failed} failed out of {len(test_cases)} tests")
+
+    if failed == 0:
+        print("✓ All tests passed!")
+        return 0
+    else:
+        print(f"✗ {failed} test(s) failed")
+        return 1
+
+
+if __name__ == "__main__":
+    exit(run_tests())
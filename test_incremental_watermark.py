@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test script for the incremental crawl
+Tests select_sets_to_visit and the set watermark (record_set, ignore_sets)
+"""
+
+from datetime import date
+
+from src.scrapper.incremental import empty_watermark, record_set, ignore_sets, select_sets_to_visit
+
+TODAY = date(2026, 10, 19)
+
+def watermark():
+    known = empty_watermark()
+    record_set(known, "sv01", "sv", "2023-03-31", 258)
+    record_set(known, "sv08", "sv", "2026-10-01", 252)
+    ignore_sets(known, ["A1"])
+    return known
+
+def listing(*sets):
+    return [{"id": set_id, "cardCount": {"total": total}} for set_id, total in sets]
+
+# (description, check, expected)
+test_cases = [
+    ("new set", lambda: select_sets_to_visit(watermark(), listing(("sv09", 190)), 30, TODAY), {"sv09"}),
+    ("card count changed", lambda: select_sets_to_visit(watermark(), listing(("sv01", 260)), 30, TODAY), {"sv01"}),
+    ("unchanged old set", lambda: select_sets_to_visit(watermark(), listing(("sv01", 258)), 30, TODAY), set()),
+    ("recent set", lambda: select_sets_to_visit(watermark(), listing(("sv08", 252)), 30, TODAY), {"sv08"}),
+    ("ignored set", lambda: select_sets_to_visit(watermark(), listing(("A1", 286)), 30, TODAY), set()),
+    ("newest set of the watermark", lambda: watermark()["newest_set"], "sv08"),
+]
+
+def run_tests():
+    print("Testing the incremental crawl watermark")
+    print("=" * 80)
+
+    passed = 0
+    failed = 0
+
+    for description, check, expected_output in test_cases:
+        actual_output = check()
+        status = "✓ PASS" if actual_output == expected_output else "✗ FAIL"
+
+        if actual_output == expected_output:
+            passed += 1
+            print(f"{status} | {description} -> {actual_output!r}")
+        else:
+            failed += 1
+            print(f"{status} | {description}")
+            print(f"       Expected: {expected_output!r}")
+            print(f"       Got:      {actual_output!r}")
+
+    print("=" * 80)
+    print(f"Results: {passed} passed, {failed} failed out of {len(test_cases)} tests")
+
+    if failed == 0:
+        print("✓ All tests passed!")
+        return 0
+    else:
+        print(f"✗ {failed} test(s) failed")
+        return 1
+
+
+if __name__ == "__main__":
+    exit(run_tests())
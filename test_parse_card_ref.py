@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Test script for parse_card_ref
+Tests the parsing of the work list entries (tcgdex card ids and card slugs)
+"""
+
+from src.scrapper.scrapper import parse_card_ref
+
+# (description, check, expected)
+test_cases = [
+    ("tcgdex card id", lambda: parse_card_ref("sv01-001"), (None, "sv01", "001")),
+    ("set id with a dash", lambda: parse_card_ref("swsh12.5-GG01"), (None, "swsh12.5", "GG01")),
+    ("card slug", lambda: parse_card_ref("poke-fr/sv/sv01/001"), ("poke-fr", "sv01", "001")),
+    ("surrounding spaces", lambda: parse_card_ref("  sv01-001 "), (None, "sv01", "001")),
+    ("incomplete slug", lambda: parse_card_ref("sv01/001"), None),
+    ("no separator", lambda: parse_card_ref("sv01"), None),
+]
+
+def run_tests():
+    print("Testing parse_card_ref")
+    print("=" * 80)
+
+    passed = 0
+    failed = 0
+
+    for description, check, expected_output in test_cases:
+        actual_output = check()
+        status = "✓ PASS" if actual_output == expected_output else "✗ FAIL"
+
+        if actual_output == expected_output:
+            passed += 1
+            print(f"{status} | {description} -> {actual_output!r}")
+        else:
+            failed += 1
+            print(f"{status} | {description}")
+            print(f"       Expected: {expected_output!r}")
+            print(f"       Got:      {actual_output!r}")
+
+    print("=" * 80)
+    print(f"Results: {passed} passed, {failed} failed out of {len(test_cases)} tests")
+
+    if failed == 0:
+        print("✓ All tests passed!")
+        return 0
+    else:
+        print(f"✗ {failed} test(s) failed")
+        return 1
+
+
+if __name__ == "__main__":
+    exit(run_tests())
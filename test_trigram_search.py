@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test script for the trigram search index
+Tests the folding, the trigrams and the ranking of LanguageIndex.search
+"""
+
+from src.search.index import LanguageIndex, fold_query, trigrams
+
+# (kind, name, slug) indexed in one language
+NAMES = [
+    ("pokemon", "Dracaufeu", "fr/pokemon/6"),
+    ("card", "Dracaufeu", "poke-fr/sv/sv03/125"),
+    ("card", "Dracaufeu ex", "poke-fr/sv/sv03/223"),
+    ("card", "Méga-Dracaufeu X-ex", "poke-fr/xy/xy2/13"),
+    ("pokemon", "Draco", "fr/pokemon/147"),
+    ("card", "Salamèche", "poke-fr/sv/sv03/26"),
+    ("card", "Pikachu", "poke-fr/sv/sv01/63"),
+    ("card", "Pikachu V", "poke-fr/swsh/swsh4/43"),
+]
+
+index = LanguageIndex()
+for kind, name, slug in NAMES:
+    index.add(kind, name, slug)
+
+def first_name(query, **kwargs):
+    results = index.search(query, **kwargs)
+    return results[0]["name"] if results else None
+
+def names(query, **kwargs):
+    return [result["name"] for result in index.search(query, **kwargs)]
+
+# (description, actual, expected)
+test_cases = [
+    # Folding and trigrams
+    ("fold accents and case", lambda: fold_query("Méga-Dracaufeu X-ex"), "mega dracaufeu x ex"),
+    ("fold punctuation", lambda: fold_query("M. Mime"), "m mime"),
+    ("padded trigrams", lambda: sorted(trigrams("ex")), ["  e", " ex", "ex "]),
+    ("empty query", lambda: index.search(""), []),
+
+    # Ranking
+    ("exact name first", lambda: first_name("Dracaufeu"), "Dracaufeu"),
+    ("misspelled name", lambda: first_name("drakaufeu"), "Dracaufeu"),
+    ("missing accent", lambda: first_name("salameche"), "Salamèche"),
+    ("prefix bonus", lambda: names("pikachu"), ["Pikachu", "Pikachu V"]),
+    ("unrelated query", lambda: names("zzzz"), []),
+
+    # One result per distinct name, its cards and Pokémon grouped
+    ("cards of a name", lambda: index.search("Dracaufeu")[0]["cards"], 1),
+    ("pokemon of a name", lambda: index.search("Dracaufeu")[0]["pokemon"], "fr/pokemon/6"),
+    ("kind filter", lambda: first_name("draco", kind="pokemon"), "Draco"),
+    ("limit", lambda: len(index.search("dracaufeu", limit=2)), 2),
+]
+
+def run_tests():
+    print("Testing the trigram search index")
+    print("=" * 80)
+
+    passed = 0
+    failed = 0
+
+    for description, check, expected_output in test_cases:
+        actual_output = check()
+        status = "✓ PASS" if actual_output == expected_output else "✗ FAIL"
+
+        if actual_output == expected_output:
+            passed += 1
+            print(f"{status} | {description} -> {actual_output!r}")
+        else:
+            failed += 1
+            print(f"{status} | {description}")
+            print(f"       Expected: {expected_output!r}")
+            print(f"       Got:      {actual_output!r}")
+
+    print("=" * 80)
+    print(f"Results: {passed} passed, {failed} failed out of {len(test_cases)} tests")
+
+    if failed == 0:
+        print("✓ All tests passed!")
+        return 0
+    else:
+        print(f"✗ {failed} test(s) failed")
+        return 1
+
+
+if __name__ == "__main__":
+    exit(run_tests())